@@ -1,5 +1,22 @@
 import sqlite3
+import functools
+import heapq
+import itertools
+import json
 import logging
+import operator
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.parse
+from contextlib import contextmanager
+
+import esquema
+from instrumentacao import ConexaoInstrumentada, Instrumentacao, instrumentado
+from registros import COLUNAS_PRODUTO, COLUNAS_VENDA, HistoricoVendaRegistro, ProdutoRegistro, VendaRegistro
 
 
 # Configuração do logging
@@ -11,94 +28,314 @@ logging.basicConfig(
 )
 
 
-class BancoDeDados:
-    def __init__(self,nomeBD):
+# erros de "banco ocupado/travado": outro terminal está escrevendo
+def erro_transitorio(erro):
+    if not isinstance(erro, sqlite3.OperationalError):
+        return False
+    codigo = getattr(erro, "sqlite_errorcode", None)
+    if codigo is not None:
+        return codigo & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    mensagem = str(erro).lower()
+    return "locked" in mensagem or "busy" in mensagem
+
+
+# repete uma escrita do BancoDeDados quando o banco está ocupado por outro
+# terminal, esperando um tempo aleatório crescente entre as tentativas
+# (a transação inteira é desfeita antes, então repetir é seguro); dentro de
+# uma transação mais externa o erro sobe para quem a abriu
+def com_retentativa(metodo):
+    @functools.wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        tentativa = 1
+        while True:
+            try:
+                return metodo(self, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not erro_transitorio(e) or tentativa >= self.tentativas or self.pool.emprestada() is not None:
+                    raise
+                espera = random.uniform(0, min(self.espera_maxima, self.espera_inicial * 2 ** tentativa))
+                logging.warning(f"Banco ocupado em {metodo.__name__} (tentativa {tentativa}): {e}; nova tentativa em {espera:.3f}s")
+                time.sleep(espera)
+                tentativa += 1
+
+    return envoltorio
+
+
+class PoolConexoes:
+    """
+    Mantém conexões SQLite abertas e as reaproveita entre as chamadas.
+    Cada conexão é emprestada a uma única thread por vez; chamadas aninhadas
+    na mesma thread reutilizam a conexão que ela já tem em mãos.
+    Com tamanho 0 o pool abre e fecha uma conexão a cada empréstimo.
+    tempo_ocupado: segundos que o SQLite espera por um lock (busy_timeout)
+    wal: ativa o journal_mode WAL (leitores não bloqueiam o escritor)
+    """
+
+    def __init__(self, nomeBD, tamanho=5, cache_comandos=128, tempo_espera=30.0, tempo_ocupado=10.0, wal=False):
         self.nomeBD = nomeBD
-        self.conexaoBD = None
-        self.cursor = None
-    
-    
-    def conectar(self):
-        # método para conectar ao banco de dados SQLite
-        # se o banco de dados não existir, ele será criado    
+        # um banco em memória só existe dentro da própria conexão
+        self.memoria = nomeBD == ":memory:"
+        self.tamanho = 1 if self.memoria else tamanho
+        self.cache_comandos = cache_comandos
+        self.tempo_espera = tempo_espera
+        self.tempo_ocupado = tempo_ocupado
+        self.wal = wal and not self.memoria
+        self._livres = queue.LifoQueue()
+        self._criadas = 0
+        self._trava = threading.Lock()
+        self._local = threading.local()
+        self._fechado = False
+        # Instrumentacao ativa (ou None); novas conexões passam a ser medidas
+        self.instrumentacao = None
+
+    def _nova_conexao(self):
+        instrumentacao = self.instrumentacao
+        # isolation_level=None: as transações são abertas explicitamente (BEGIN)
+        conexao = sqlite3.connect(
+            self.nomeBD,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=self.cache_comandos,
+            timeout=self.tempo_ocupado,
+            factory=ConexaoInstrumentada if instrumentacao is not None else sqlite3.Connection,
+        )
+        if instrumentacao is not None:
+            conexao.instrumentacao = instrumentacao
+        # transforma as linhas em dicionários
+        conexao.row_factory = sqlite3.Row
+        # Ativa o suporte a chaves estrangeiras
+        conexao.execute("PRAGMA foreign_keys = ON")
+        if self.wal:
+            modo = conexao.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+            if modo.lower() != "wal":
+                logging.warning(f"Nao foi possivel ativar o modo WAL (journal_mode = {modo}).")
+        logging.info("Conexao com o banco de dados estabelecida com sucesso.")
+        return conexao
+
+    def _obter(self):
+        if self.tamanho == 0:
+            return self._nova_conexao()
         try:
-            # cria Conexao com o Banco de Dados
-            self.conexaoBD = sqlite3.connect(self.nomeBD)
-            # transforma as linhas em dicionários
-            self.conexaoBD.row_factory = sqlite3.Row
-            # cria cursor para executar comandos SQL
-            self.cursor = self.conexaoBD.cursor()
-            # Ativa o suporte a chaves estrangeiras
-            self.cursor.execute("PRAGMA foreign_keys = ON")   
-        except sqlite3.Error as e:
-            logging.error(f"Erro ao conectar ao banco de dados: {e}")
+            return self._livres.get_nowait()
+        except queue.Empty:
+            pass
+        with self._trava:
+            criar = self._criadas < self.tamanho
+            if criar:
+                self._criadas += 1
+        if criar:
+            try:
+                return self._nova_conexao()
+            except sqlite3.Error:
+                with self._trava:
+                    self._criadas -= 1
+                raise
+        # todas as conexões estão emprestadas: espera alguma ser devolvida
+        try:
+            return self._livres.get(timeout=self.tempo_espera)
+        except queue.Empty:
+            raise sqlite3.OperationalError("nenhuma conexao livre no pool")
+
+    def _devolver(self, conexao):
+        if conexao.in_transaction:
+            conexao.rollback()
+        # conexões criadas antes de ativar/desativar a instrumentação são descartadas
+        instrumentada = getattr(conexao, "instrumentacao", None)
+        trocar = instrumentada is not self.instrumentacao and not self.memoria
+        if self.tamanho == 0 or self._fechado or trocar:
+            conexao.close()
+            logging.info("Conexao com o banco de dados fechada.")
+            if self.tamanho:
+                with self._trava:
+                    self._criadas -= 1
+            return
+        self._livres.put(conexao)
+
+    # conexão que a thread atual já tem emprestada (ou None)
+    def emprestada(self):
+        return getattr(self._local, "conexao", None)
+
+    @contextmanager
+    def conexao(self):
+        # se a thread já possui uma conexão emprestada, reutiliza a mesma
+        atual = getattr(self._local, "conexao", None)
+        if atual is not None:
+            yield atual
+            return
+        instrumentacao = self.instrumentacao
+        if instrumentacao is None:
+            conexao = self._obter()
+        else:
+            inicio = time.perf_counter()
+            conexao = self._obter()
+            instrumentacao.registrar_fase("conectar", time.perf_counter() - inicio)
+        self._local.conexao = conexao
+        try:
+            yield conexao
         finally:
-            logging.info("Conexao com o banco de dados estabelecida com sucesso.")
-    
-    # método para desconectar do banco de dados SQLite
-    # fecha a Conexao e o cursor, se estiverem abertos
-    def desconectar(self):
-        if self.conexaoBD:
+            self._local.conexao = None
+            self._devolver(conexao)
+
+    # conexão separada e só de leitura (URI file:...?mode=ro) para leituras longas,
+    # como a exportação; não entra no pool e é fechada ao sair do bloco
+    # (um banco em memória não pode ser reaberto: usa a conexão do pool)
+    @contextmanager
+    def conexao_somente_leitura(self):
+        if self.memoria:
+            with self.conexao() as conexao:
+                yield conexao
+            return
+        instrumentacao = self.instrumentacao
+        uri = "file:" + urllib.parse.quote(os.path.abspath(self.nomeBD)) + "?mode=ro"
+        conexao = sqlite3.connect(
+            uri,
+            uri=True,
+            check_same_thread=False,
+            isolation_level=None,
+            timeout=self.tempo_ocupado,
+            factory=ConexaoInstrumentada if instrumentacao is not None else sqlite3.Connection,
+        )
+        if instrumentacao is not None:
+            conexao.instrumentacao = instrumentacao
+        try:
+            yield conexao
+        finally:
+            conexao.close()
+
+    # troca a instrumentação: as conexões livres são fechadas e as emprestadas
+    # são descartadas ao serem devolvidas, então as próximas já nascem medidas
+    # (num banco em memória a conexão é mantida, para não perder os dados)
+    def definir_instrumentacao(self, instrumentacao):
+        self.instrumentacao = instrumentacao
+        if not self.memoria:
+            self._fechar_livres()
+
+    def fechar(self):
+        self._fechado = True
+        self._fechar_livres()
+        logging.info("Pool de conexoes fechado.")
+
+    def _fechar_livres(self):
+        while True:
+            try:
+                conexao = self._livres.get_nowait()
+            except queue.Empty:
+                break
             try:
-                self.conexaoBD.close()
-                logging.info("Conexao com o banco de dados fechada.")
+                conexao.close()
             except sqlite3.Error as e:
                 logging.error(f"Erro ao fechar a Conexao com o banco de dados: {e}")
-            finally:
-                self.conexaoBD = None
-                self.cursor = None
-        else:
-            logging.warning("Tentativa de desconectar sem uma Conexao ativa.")
+            with self._trava:
+                self._criadas -= 1
+
+
+class BancoDeDados:
+    # concorrente: modo para vários terminais no mesmo arquivo (WAL); se None,
+    # usa a variável de ambiente ESTOQUE_CONCORRENTE=1
+    # tempo_ocupado: segundos de espera por um lock antes do erro "database is locked"
+    # tentativas: quantas vezes uma escrita é tentada quando o banco está ocupado
+    def __init__(self, nomeBD, tamanho_pool=5, instrumentacao=None, concorrente=None,
+                 tempo_ocupado=10.0, tentativas=5):
+        self.nomeBD = nomeBD
+        if concorrente is None:
+            concorrente = os.environ.get("ESTOQUE_CONCORRENTE", "") not in ("", "0")
+        self.concorrente = concorrente
+        self.tentativas = max(1, tentativas)
+        self.espera_inicial = 0.005
+        self.espera_maxima = 0.5
+        self.pool = PoolConexoes(nomeBD, tamanho_pool, tempo_ocupado=tempo_ocupado, wal=concorrente)
+        # passa a False se o SQLite não tiver o módulo FTS5
+        self.busca_fts = True
+        # funções chamadas com cada alerta de estoque mínimo, após o commit
+        self.ouvintes_estoque = []
+        self._local = threading.local()
+        # medições de tempo (desligadas por padrão); a variável de ambiente
+        # ESTOQUE_METRICAS=<arquivo> liga e grava o resultado ao fechar
+        self.instrumentacao = None
+        self.arquivo_metricas = os.environ.get("ESTOQUE_METRICAS")
+        if instrumentacao is None and self.arquivo_metricas:
+            lento_ms = os.environ.get("ESTOQUE_LENTO_MS")
+            instrumentacao = Instrumentacao(lento_ms=float(lento_ms) if lento_ms else None)
+        if instrumentacao is not None:
+            self.ativar_instrumentacao(instrumentacao)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastreio):
+        self.fechar()
+
+    # fecha todas as conexões mantidas pelo pool
+    def fechar(self):
+        if self.instrumentacao is not None and self.arquivo_metricas:
+            try:
+                self.instrumentacao.gravar(self.arquivo_metricas)
+            except OSError as e:
+                logging.error(f"Erro ao gravar as metricas do banco de dados: {e}")
+        self.pool.fechar()
+
+    # ---------- instrumentação ----------
+
+    # passa a medir métodos, comandos SQL e fases (conectar/executar/ler/commit)
+    # lento_ms: comandos acima desse tempo são guardados com EXPLAIN QUERY PLAN
+    def ativar_instrumentacao(self, instrumentacao=None, lento_ms=None):
+        self.instrumentacao = instrumentacao or Instrumentacao(lento_ms=lento_ms)
+        self.pool.definir_instrumentacao(self.instrumentacao)
+        return self.instrumentacao
+
+    def desativar_instrumentacao(self):
+        self.instrumentacao = None
+        self.pool.definir_instrumentacao(None)
+
+    # cópia das medições atuais (None se a instrumentação estiver desligada)
+    def metricas(self):
+        if self.instrumentacao is None:
+            return None
+        return self.instrumentacao.instantaneo()
+
+    def gravar_metricas(self, caminho):
+        if self.instrumentacao is None:
+            raise ValueError("instrumentação desativada")
+        self.instrumentacao.gravar(caminho)
+
+    # empresta uma conexão do pool (devolvida ao sair do bloco with)
+    def conexao(self):
+        return self.pool.conexao()
+
+    # abre uma transação explícita na conexão emprestada
+    # confirma ao sair do bloco e desfaz tudo se ocorrer alguma exceção
+    @contextmanager
+    def transacao(self, modo="DEFERRED"):
+        with self.conexao() as conexao:
+            if conexao.in_transaction:
+                # transação já aberta mais acima na mesma thread
+                yield conexao
+                return
+            conexao.execute(f"BEGIN {modo}")
+            self._local.alertas = []
+            try:
+                yield conexao
+            except BaseException:
+                conexao.rollback()
+                self._local.alertas = []
+                raise
+            else:
+                conexao.commit()
+                self._publicar_alertas()
     
-    #funcao para criar as tabelas Produtos e Vendas no banco de dados
-    # as tabelas serão criadas se não existirem/    
+    # cria/atualiza as tabelas aplicando as migrações pendentes (esquema.py)
+    # só consulta o banco na primeira chamada para cada arquivo no processo
+    @instrumentado
     def criar_tabelas(self):
-        #cria tabela de clientes e produtos
-        
-        #conecta ao banco de dados
-        self.conectar()
-        
-        # executa comandos SQL para criar as tabelas no banco de dados
-        try:
-            comando ="""
-                CREATE TABLE IF NOT EXISTS Produtos (
-                    ID INTEGER PRIMARY KEY AUTOINCREMENT,
-                    Nome TEXT NOT NULL,
-                    Descricao TEXT NOT NULL,
-                    Preco REAL NOT NULL CHECK (Preco >= 0),
-                    Quantidade INTEGER NOT NULL CHECK (Quantidade >= 0)
-                );
-                """
-            self.cursor.execute(comando)
-            logging.info("Tabelas criadas com sucesso.")
-        except sqlite3.Error as e:
-            logging.error(f"Erro ao criar as tabelas: {e}")
-        finally:
-            self.desconectar()
-            
-            
-            
-        #conecta ao banco de dados
-        self.conectar()
-        
-        # executa comandos SQL para criar as tabelas no banco de dados
         try:
-            comando ="""
-                CREATE TABLE IF NOT EXISTS Vendas (
-                    id_venda INTEGER PRIMARY KEY AUTOINCREMENT,
-                    id_produto INTEGER,
-                    Quantidade_vendida INTEGER NOT NULL CHECK (Quantidade_vendida >= 0),
-                    data_venda DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                    valor_total REAL NOT NULL CHECK (valor_total >= 0),
-                    FOREIGN KEY (id_produto) REFERENCES Produtos(ID)
-                );
-                """
-            self.cursor.execute(comando)
-            logging.info("Tabelas criadas com sucesso.")
+            self.busca_fts = esquema.garantir_esquema(self.nomeBD, self.conexao)
         except sqlite3.Error as e:
-            logging.error(f"Erro ao criar as tabelas: {e}")
-        finally:
-            self.desconectar()
+            logging.error(f"Erro ao atualizar o esquema do banco de dados: {e}")
+
+    # versão do esquema gravada no arquivo (PRAGMA user_version)
+    def versao_esquema(self):
+        with self.conexao() as conexao:
+            return esquema.versao(conexao)
     
     
     
@@ -107,87 +344,255 @@ class BancoDeDados:
 #---------------------------------------------------------------------------------------|operaçoes de produtos no banco de dados|-------------------------------------------------------------------------#
 #                                                                                     # |_______________________________________| #                                                                       #
     
+    @instrumentado
     def produto_existe(self, nome):
         try:
-            self.conectar()
-            comando = "SELECT COUNT(*) FROM Produtos WHERE Nome = ?"
-            self.cursor.execute(comando, (nome,))
-            resultado = self.cursor.fetchone()[0]
-            return resultado > 0  # retorna True se já existe
+            with self.conexao() as conexao:
+                # consulta resolvida pelo índice único idx_produtos_nome
+                comando = "SELECT 1 FROM Produtos WHERE Nome = ? LIMIT 1"
+                resultado = conexao.execute(comando, (nome,)).fetchone()
+            return resultado is not None  # retorna True se já existe
         except sqlite3.Error as e:
             logging.error(f"Erro ao verificar se o produto existe: {e}")
             return False
-        finally:
-            self.desconectar()
+
+    # função para buscar um único produto pela chave primária
+    # retorna um ProdutoRegistro ou None se não existir
+    @instrumentado
+    def obter_produto(self, ID):
+        try:
+            with self.conexao() as conexao:
+                comando = f"SELECT {COLUNAS_PRODUTO} FROM Produtos WHERE ID = ?"
+                return self._consultar(conexao, ProdutoRegistro, comando, (ID,)).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao buscar o produto com ID {ID}: {e}")
+            return None
+
+    # função para busca textual de produtos por Nome e Descricao
+    # cada palavra digitada é tratada como prefixo ("cafe tor" encontra
+    # "Café Torrado"); os resultados vêm ordenados por relevância (bm25)
+    @instrumentado
+    def buscar_produtos(self, texto, limite=20):
+        palavras = re.findall(r"\w+", texto or "")
+        if not palavras:
+            return []
+        try:
+            with self.conexao() as conexao:
+                if self.busca_fts:
+                    consulta = " ".join(f'"{palavra}"*' for palavra in palavras)
+                    comando = f"""
+                        SELECT {self.COLUNAS_PRODUTO_P} FROM ProdutosBusca
+                        JOIN Produtos p ON p.ID = ProdutosBusca.rowid
+                        WHERE ProdutosBusca MATCH ?
+                        ORDER BY rank
+                        LIMIT ?
+                    """
+                    parametros = (consulta, limite)
+                else:
+                    comando = f"SELECT {COLUNAS_PRODUTO} FROM Produtos WHERE Nome LIKE ? ORDER BY Nome LIMIT ?"
+                    parametros = (texto.strip() + "%", limite)
+                return self._consultar(conexao, ProdutoRegistro, comando, parametros).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao buscar produtos por '{texto}': {e}")
+            return []
+
+    # função para buscar um único produto pelo nome (índice único)
+    @instrumentado
+    def obter_produto_por_nome(self, nome):
+        try:
+            with self.conexao() as conexao:
+                comando = f"SELECT {COLUNAS_PRODUTO} FROM Produtos WHERE Nome = ?"
+                return self._consultar(conexao, ProdutoRegistro, comando, (nome,)).fetchone()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao buscar o produto '{nome}': {e}")
+            return None
+
+    # sugestões para o campo de produto do caixa, na ordem: ID exato, código
+    # de barras exato, nome começando pelo texto (sem diferenciar maiúsculas
+    # ASCII) e código de barras começando pelo texto. Cada consulta é uma
+    # busca por intervalo num índice com LIMIT, então o custo depende de
+    # `limite`, não do tamanho do catálogo (nada de LIKE '%...%' nem FTS aqui)
+    @instrumentado
+    def sugerir_produtos(self, texto, limite=10):
+        texto = (texto or "").strip()
+        if not texto or limite <= 0:
+            return []
+        # limite superior do intervalo de prefixo: nenhum texto que comece
+        # pelo prefixo passa de prefixo + U+10FFFF (o maior caractere)
+        fim = texto + "\U0010ffff"
+        consultas = []
+        if texto.isdigit() and len(texto) <= 18:
+            consultas.append(("ID = ?", (int(texto),)))
+        consultas += [
+            ("codigo_barras = ?", (texto,)),
+            ("Nome COLLATE NOCASE >= ? AND Nome COLLATE NOCASE < ? ORDER BY Nome COLLATE NOCASE", (texto, fim)),
+            ("codigo_barras >= ? AND codigo_barras < ? ORDER BY codigo_barras", (texto, fim)),
+        ]
+        sugestoes = {}
+        try:
+            with self.conexao() as conexao:
+                for condicao, parametros in consultas:
+                    comando = f"SELECT {COLUNAS_PRODUTO} FROM Produtos WHERE {condicao} LIMIT ?"
+                    for produto in self._consultar(conexao, ProdutoRegistro, comando, (*parametros, limite)):
+                        sugestoes.setdefault(produto.ID, produto)
+                    if len(sugestoes) >= limite:
+                        break
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao sugerir produtos para '{texto}': {e}")
+            return []
+        return list(sugestoes.values())[:limite]
 
     
     # funçao para inserir um novo produto na tabela Produtos
     # os parâmetros são: nome, descricao, preco e quantidade
-    def inserir_produto(self, nome, descricao, preco, quantidade):
+    # (codigo_barras é opcional e não pode repetir o de outro produto)
+    @instrumentado
+    @com_retentativa
+    def inserir_produto(self, nome, descricao, preco, quantidade, estoque_minimo=0, codigo_barras=None):
        
-        try:
-            # conecta ao banco de dados
-            self.conectar()
-            
-            # verifica se o preco e a quantidade sao maiores que zero
-            if preco < 0 or quantidade < 0:
-                raise ValueError("Preço e quantidade devem ser valores positivos.")
+        # verifica se o preco e a quantidade sao maiores que zero
+        if preco < 0 or quantidade < 0:
+            raise ValueError("Preço e quantidade devem ser valores positivos.")
+        if estoque_minimo < 0:
+            raise ValueError("Estoque mínimo deve ser um valor positivo.")
 
+        try:
             # executa comando SQL para inserir um novo produto na tabela Produtos
             # os valores são passados como parâmetros para evitar SQL Injection
             comando = """
-                INSERT INTO Produtos (Nome, Descricao, Preco, Quantidade)
-                VALUES (?, ?, ?, ?)
+                INSERT INTO Produtos (Nome, Descricao, Preco, Quantidade, estoque_minimo, codigo_barras)
+                VALUES (?, ?, ?, ?, ?, ?)
             """
-            self.cursor.execute(comando,(nome, descricao, preco, quantidade))
-            # confirma inclusão do produto no banco de dados
-            self.conexaoBD.commit()
+            # a transação confirma a inclusão do produto no banco de dados
+            with self.transacao("IMMEDIATE") as conexao:
+                if codigo_barras is not None:
+                    self._verificar_codigo_barras(conexao, codigo_barras)
+                cursor = conexao.execute(comando,(nome, descricao, preco, quantidade, estoque_minimo, codigo_barras))
+                self._registrar_movimento(conexao, cursor.lastrowid, "inicial", quantidade)
+                self._verificar_minimo(cursor.lastrowid, None, quantidade, estoque_minimo)
             logging.info(f"Produto '{nome}' inserido com sucesso.")
         except sqlite3.Error as e:
             logging.error(f"Erro ao inserir o produto: {e}")
-        finally:
-            # desconecta do banco de dados
-            self.desconectar()
+            raise
     
-    # função para listar todos os produtos na tabela Produtos
-    def listar_produtos(self):
+    # função para inserir ou atualizar vários produtos de uma vez (por Nome)
+    # linhas: lista de tuplas (nome, descricao, preco, quantidade)
+    # usa executemany numa única transação; retorna quantas linhas foram gravadas
+    @instrumentado
+    @com_retentativa
+    def upsert_produtos(self, linhas):
+        comando = """
+            INSERT INTO Produtos (Nome, Descricao, Preco, Quantidade)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (Nome) DO UPDATE SET
+                Descricao = excluded.Descricao,
+                Preco = excluded.Preco,
+                Quantidade = excluded.Quantidade
+        """
+        with self.transacao("IMMEDIATE") as conexao:
+            # a diferença de saldo de cada produto vira um movimento de estoque
+            antes = self._quantidades_por_nome(conexao, [linha[0] for linha in linhas])
+            conexao.executemany(comando, linhas)
+            depois = self._quantidades_por_nome(conexao, [linha[0] for linha in linhas])
+            movimentos = []
+            for nome, (id_produto, quantidade, minimo) in depois.items():
+                if nome not in antes:
+                    movimentos.append((id_produto, "inicial", quantidade, None))
+                    self._verificar_minimo(id_produto, None, quantidade, minimo)
+                elif quantidade != antes[nome][1]:
+                    movimentos.append((id_produto, "ajuste", quantidade - antes[nome][1], None))
+                    self._verificar_minimo(id_produto, antes[nome][1], quantidade, minimo)
+            self._registrar_movimentos(conexao, movimentos)
+        return len(linhas)
+
+    # Nome -> (ID, Quantidade, estoque_minimo) dos produtos informados
+    # (em blocos, pelo limite de parâmetros)
+    @staticmethod
+    def _quantidades_por_nome(conexao, nomes, bloco=500):
+        resultado = {}
+        nomes = list(dict.fromkeys(nomes))
+        for inicio in range(0, len(nomes), bloco):
+            parte = nomes[inicio:inicio + bloco]
+            marcadores = ", ".join("?" * len(parte))
+            for linha in conexao.execute(
+                f"SELECT ID, Nome, Quantidade, estoque_minimo FROM Produtos WHERE Nome IN ({marcadores})", parte
+            ).fetchall():
+                resultado[linha["Nome"]] = (linha["ID"], linha["Quantidade"], linha["estoque_minimo"])
+        return resultado
+
+    # função para listar os produtos na tabela Produtos
+    # paginação por chave (keyset): devolve até `limite` produtos com ID maior
+    # que `apos_id`, em ordem de ID; sem limite devolve todos
+    @instrumentado
+    def listar_produtos(self, apos_id=None, limite=None):
+        dados_produtos = []
         try:
-            # conecta ao banco de dados
-            self.conectar()
-            
-            # executa comando sql para selecionar todos osprodutos na tabela produtos
-            comando ='''
-                select * from Produtos;
+            # executa comando sql para selecionar os produtos na tabela produtos
+            comando = f'''
+                SELECT {COLUNAS_PRODUTO} FROM Produtos WHERE ID > ? ORDER BY ID LIMIT ?;
             '''
-            self.cursor.execute(comando)
-            # busca todos os produtos na tabela Produtos
-            dados_produtos = self.cursor.fetchall()
-            # converte cada linha (sqlite3.Row) em dicionário Python puro
-            produtos = [dict(linha) for linha in dados_produtos]
-            dados_produtos = produtos
+            with self.conexao() as conexao:
+                # LIMIT -1 no SQLite significa "sem limite"
+                # cada linha vira direto um ProdutoRegistro (sem dict intermediário)
+                dados_produtos = self._consultar(
+                    conexao, ProdutoRegistro, comando, (apos_id or 0, -1 if limite is None else limite)
+                ).fetchall()
+            logging.info(f"Produtos listados com sucesso")
         except sqlite3.Error as e:
             logging.error(f"Erro ao listar os produtos: {e}")
-        finally:
-            logging.info(f"Produtos listados com sucesso")
-            # desconecta do banco de dados
-            self.desconectar()
-            return dados_produtos
-            
+        return dados_produtos
+
+    # função para percorrer todos os produtos sem carregá-los de uma vez
+    # gera listas de até `tamanho_lote` produtos, em ordem de ID
+    def iterar_produtos(self, tamanho_lote=500, apos_id=None):
+        comando = f"SELECT {COLUNAS_PRODUTO} FROM Produtos WHERE ID > ? ORDER BY ID LIMIT ?"
+        yield from self._iterar_em_lotes(comando, apos_id or 0, tamanho_lote, ProdutoRegistro, "ID")
+
+    # gera os resultados em lotes, paginando pela chave `coluna` (o comando
+    # recebe a chave do último registro lido e o LIMIT); a conexão é emprestada
+    # só durante cada consulta, então um gerador parado entre dois lotes não
+    # segura uma conexão do pool
+    def _iterar_em_lotes(self, comando, apos_id, tamanho_lote, registro, coluna):
+        tamanho_lote = max(1, tamanho_lote)
+        chave = operator.attrgetter(coluna)
+        try:
+            while True:
+                with self.conexao() as conexao:
+                    lote = self._consultar(conexao, registro, comando, (apos_id, tamanho_lote)).fetchall()
+                if lote:
+                    yield lote
+                if len(lote) < tamanho_lote:
+                    break
+                apos_id = chave(lote[-1])
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao percorrer a consulta em lotes: {e}")
+
+    # colunas de ProdutoRegistro para consultas em que Produtos tem o apelido p
+    COLUNAS_PRODUTO_P = ", ".join(f"p.{coluna}" for coluna in ProdutoRegistro.__slots__)
+
+    # executa a consulta num cursor próprio cujas linhas saem como `registro`
+    # (ProdutoRegistro, VendaRegistro...); as colunas do SELECT devem seguir
+    # a ordem de registro.__slots__
+    @staticmethod
+    def _consultar(conexao, registro, comando, parametros=()):
+        cursor = conexao.cursor()
+        cursor.row_factory = registro.fabrica
+        return cursor.execute(comando, parametros)
+
 
     
     
     
     
     # funçao para editar um produto na tabela Produtos
+    @instrumentado
+    @com_retentativa
     def alterar_produto(self, ID, nome, descricao, preco, quantidade):
-        try:
-            # conecta ao banco de dados
-            self.conectar()
-            
-            # verifica se o preco e a quantidade sao maiores que zero
-            if preco < 0 or quantidade < 0:
-                raise ValueError("Preço e quantidade devem ser valores positivos.")
+        # verifica se o preco e a quantidade sao maiores que zero
+        if preco < 0 or quantidade < 0:
+            raise ValueError("Preço e quantidade devem ser valores positivos.")
 
+        try:
             # executa comando SQL para alterar um produto na tabela Produtos
             # os valores são passados como parâmetros para evitar SQL Injection
             comando = """
@@ -195,103 +600,304 @@ class BancoDeDados:
                 SET Nome = ?, Descricao = ?, Preco = ?, Quantidade = ?
                 WHERE ID = ?
             """
-            self.cursor.execute(comando,(nome, descricao, preco, quantidade, ID))
-            # confirma alteração do produto no banco de dados
-            self.conexaoBD.commit()
+            with self.transacao("IMMEDIATE") as conexao:
+                anterior = conexao.execute("SELECT Quantidade, estoque_minimo FROM Produtos WHERE ID = ?", (ID,)).fetchone()
+                conexao.execute(comando,(nome, descricao, preco, quantidade, ID))
+                if anterior is not None and quantidade != anterior["Quantidade"]:
+                    self._registrar_movimento(conexao, ID, "ajuste", quantidade - anterior["Quantidade"])
+                    self._verificar_minimo(ID, anterior["Quantidade"], quantidade, anterior["estoque_minimo"])
             logging.info(f"Produto '{nome}' alterado com sucesso.")
         except sqlite3.Error as e:
             logging.error(f"Erro ao alterar o produto: {e}")
-        finally:
-            # desconecta do banco de dados
-            self.desconectar()
+            raise
     
     
     # função para excluir um produto na tabela Produtos
+    @instrumentado
+    @com_retentativa
     def excluir_produto(self, ID):
         try:
-            # conecta ao banco de dados
-            self.conectar()
-
             # executa comando sql para excluir um produto na tabela produtos
             comando = '''
                 DELETE FROM Produtos WHERE ID = ?;
             '''
             # o ID do produto a ser excluído é passado como parâmetro para evitar SQL Injection
-            self.cursor.execute(comando, (ID,))
+            with self.transacao("IMMEDIATE") as conexao:
+                cursor = conexao.execute(comando, (ID,))
             
-            if self.cursor.rowcount == 0:
+            if cursor.rowcount == 0:
                 logging.warning(f"Nenhum produto com ID {ID} foi encontrado.")
             else:
-                # confirma exclusão do produto no banco de dados
-                self.conexaoBD.commit()
                 logging.info(f"Produto com ID {ID} excluído com sucesso.")
             
         except sqlite3.Error as e:
             logging.error(f"Erro ao excluir o produto: {e}")
-        finally:
-            # desconecta do banco de dados
-            self.desconectar()
+            raise
     
 #                                                                                     # \_______________________________________/ #                                                                       #
 #---------------------------------------------------------------------------------------| operaçoes de vendas no banco de dados |-------------------------------------------------------------------------#
 #                                                                                     # |_______________________________________| #                                                                       #
     # função para registrar uma venda na tabela Vendas
     # os parâmetros são: id_produto, quantidade_vendida e valor_total
+    @instrumentado
+    @com_retentativa
     def registrar_venda(self, id_produto, quantidade_vendida, valor_total):
-        try:
-            # conecta ao banco de dados
-            self.conectar()
+        # verifica se a quantidade vendida e o valor total sao maiores que zero
+        if quantidade_vendida < 0 or valor_total < 0:
+            raise ValueError("Quantidade vendida e valor total devem ser valores positivos.")
 
-            # verifica se a quantidade vendida e o valor total sao maiores que zero
-            if quantidade_vendida < 0 or valor_total < 0:
-                raise ValueError("Quantidade vendida e valor total devem ser valores positivos.")
-            
+        try:
             comando = '''
                 INSERT INTO Vendas (id_produto, Quantidade_vendida, valor_total)
                 VALUES (?, ?, ?);
             '''
-            self.cursor.execute(comando, (id_produto, quantidade_vendida, valor_total))
-            # confirma inclusão da venda no banco de dados
-            self.conexaoBD.commit()
+            # a transação confirma a inclusão da venda no banco de dados
+            with self.transacao("IMMEDIATE") as conexao:
+                cursor = conexao.execute(comando, (id_produto, quantidade_vendida, valor_total))
+                self._acumular_resumo(conexao, "id_venda = ?", (cursor.lastrowid,))
             logging.info(f"Venda registrada com sucesso. ID do produto: {id_produto}, Quantidade vendida: {quantidade_vendida}, Valor total: {valor_total}.")
         except sqlite3.Error as e:
             logging.error(f"Erro ao registrar a venda: {e}")
-        finally:
-            # desconecta do banco de dados
-            self.desconectar()
+            raise
     
-    # funçao para listar todas as vendas na tabela Vendas
-    def listar_vendas(self):
+    # função para registrar uma venda e baixar o estoque numa única transação
+    # a baixa só acontece se houver estoque suficiente (UPDATE condicional);
+    # se nenhuma linha for alterada a transação é desfeita e um ValueError
+    # informa o motivo. Se valor_total for None ele é calculado pelo preço.
+    # retorna o id da venda registrada
+    @instrumentado
+    @com_retentativa
+    def registrar_venda_atomica(self, id_produto, quantidade_vendida, valor_total=None):
+        if quantidade_vendida <= 0:
+            raise ValueError("quantidade vendida deve ser maior que zero")
+        if valor_total is not None and valor_total < 0:
+            raise ValueError("valor total deve ser >= 0")
+
+        # BEGIN IMMEDIATE reserva a escrita já no início: dois terminais
+        # não conseguem vender o mesmo estoque ao mesmo tempo
+        with self.transacao("IMMEDIATE") as conexao:
+            id_venda = self._gravar_venda(conexao, id_produto, quantidade_vendida, valor_total)
+        logging.info(f"Venda {id_venda} registrada com sucesso. ID do produto: {id_produto}, Quantidade vendida: {quantidade_vendida}.")
+        return id_venda
+
+    # baixa o estoque e grava a venda na transação já aberta em `conexao`
+    # a venda só é recusada (ValueError) antes de qualquer gravação: o UPDATE
+    # não encontra estoque e nada foi alterado
+    # acumular=False deixa o movimento e o resumo diário para quem chamou
+    # (registrar_vendas_em_lote grava os do lote inteiro de uma vez)
+    def _gravar_venda(self, conexao, id_produto, quantidade_vendida, valor_total=None, acumular=True):
+        baixa = conexao.execute(
+            """
+            UPDATE Produtos SET Quantidade = Quantidade - ?
+            WHERE ID = ? AND Quantidade >= ?
+            RETURNING Quantidade, estoque_minimo
+            """,
+            (quantidade_vendida, id_produto, quantidade_vendida),
+        ).fetchone()
+        if baixa is None:
+            existe = conexao.execute("SELECT 1 FROM Produtos WHERE ID = ?", (id_produto,)).fetchone()
+            if existe is None:
+                raise ValueError("produto não encontrado")
+            raise ValueError("quantidade vendida maior que o estoque disponível")
+
+        cursor = conexao.execute(
+            """
+            INSERT INTO Vendas (id_produto, Quantidade_vendida, valor_total)
+            VALUES (?, ?, COALESCE(?, (SELECT Preco FROM Produtos WHERE ID = ?) * ?));
+            """,
+            (id_produto, quantidade_vendida, valor_total, id_produto, quantidade_vendida),
+        )
+        id_venda = cursor.lastrowid
+        if acumular:
+            self._registrar_movimento(conexao, id_produto, "venda", -quantidade_vendida, id_venda)
+            self._acumular_resumo(conexao, "id_venda = ?", (id_venda,))
+        self._verificar_minimo(id_produto, baixa["Quantidade"] + quantidade_vendida, baixa["Quantidade"], baixa["estoque_minimo"])
+        return id_venda
+
+    # função para gravar várias vendas independentes num único commit
+    # vendas: lista de tuplas (id_produto, quantidade_vendida, valor_total ou None)
+    # uma venda recusada (sem estoque, produto inexistente) não grava nada e
+    # as demais seguem no mesmo commit; os movimentos de estoque e o resumo
+    # diário das vendas gravadas entram com uma instrução para o lote inteiro
+    # (os ids do lote são consecutivos: ninguém mais grava durante a transação)
+    # retorna, na mesma ordem, o id de cada venda ou o ValueError que a recusou
+    @instrumentado
+    @com_retentativa
+    def registrar_vendas_em_lote(self, vendas):
+        resultados = []
+        movimentos = []
+        with self.transacao("IMMEDIATE") as conexao:
+            for id_produto, quantidade_vendida, valor_total in vendas:
+                try:
+                    if quantidade_vendida <= 0:
+                        raise ValueError("quantidade vendida deve ser maior que zero")
+                    if valor_total is not None and valor_total < 0:
+                        raise ValueError("valor total deve ser >= 0")
+                    id_venda = self._gravar_venda(conexao, id_produto, quantidade_vendida, valor_total, acumular=False)
+                except ValueError as e:
+                    resultados.append(e)
+                    continue
+                resultados.append(id_venda)
+                movimentos.append((id_produto, "venda", -quantidade_vendida, id_venda))
+            if movimentos:
+                self._registrar_movimentos(conexao, movimentos)
+                self._acumular_resumo(conexao, "id_venda BETWEEN ? AND ?", (movimentos[0][3], movimentos[-1][3]))
+        logging.info(f"Lote de {len(vendas)} vendas gravado num unico commit.")
+        return resultados
+
+    # função para registrar um carrinho inteiro (vários produtos) de uma vez
+    # itens: lista de tuplas (id_produto, quantidade_vendida)
+    # o estoque de todas as linhas é conferido numa única consulta e as
+    # vendas/baixas são gravadas com executemany na mesma transação:
+    # se qualquer linha falhar nada é gravado (ValueError com o motivo)
+    # retorna o valor total do carrinho
+    @instrumentado
+    @com_retentativa
+    def registrar_carrinho_atomico(self, itens):
+        # soma as quantidades de linhas repetidas do mesmo produto
+        por_produto = {}
+        for id_produto, quantidade in itens:
+            if quantidade <= 0:
+                raise ValueError("quantidade vendida deve ser maior que zero")
+            por_produto[id_produto] = por_produto.get(id_produto, 0) + quantidade
+        if not por_produto:
+            raise ValueError("carrinho vazio")
+
+        with self.transacao("IMMEDIATE") as conexao:
+            marcadores = ", ".join("?" * len(por_produto))
+            linhas = conexao.execute(
+                f"SELECT ID, Preco, Quantidade, estoque_minimo FROM Produtos WHERE ID IN ({marcadores})",
+                tuple(por_produto),
+            ).fetchall()
+            estoque = {linha["ID"]: linha for linha in linhas}
+
+            for id_produto, quantidade in por_produto.items():
+                if id_produto not in estoque:
+                    raise ValueError(f"produto {id_produto} não encontrado")
+                if quantidade > estoque[id_produto]["Quantidade"]:
+                    raise ValueError(f"quantidade vendida maior que o estoque disponível (produto {id_produto})")
+
+            cursor = conexao.executemany(
+                """
+                UPDATE Produtos SET Quantidade = Quantidade - ?
+                WHERE ID = ? AND Quantidade >= ?
+                """,
+                [(quantidade, id_produto, quantidade) for id_produto, quantidade in por_produto.items()],
+            )
+            if cursor.rowcount != len(por_produto):
+                raise ValueError("estoque alterado durante a venda")
+            for id_produto, quantidade in por_produto.items():
+                antes = estoque[id_produto]["Quantidade"]
+                self._verificar_minimo(id_produto, antes, antes - quantidade, estoque[id_produto]["estoque_minimo"])
+
+            vendas = [
+                (id_produto, quantidade, estoque[id_produto]["Preco"] * quantidade)
+                for id_produto, quantidade in itens
+            ]
+            ultimo_id = conexao.execute("SELECT COALESCE(MAX(id_venda), 0) FROM Vendas").fetchone()[0]
+            conexao.executemany(
+                "INSERT INTO Vendas (id_produto, Quantidade_vendida, valor_total) VALUES (?, ?, ?)",
+                vendas,
+            )
+            conexao.execute(
+                """
+                INSERT INTO MovimentosEstoque (id_produto, tipo, quantidade, id_venda)
+                SELECT id_produto, 'venda', -Quantidade_vendida, id_venda FROM Vendas WHERE id_venda > ?
+                """,
+                (ultimo_id,),
+            )
+            self._acumular_resumo(conexao, "id_venda > ?", (ultimo_id,))
+        total = sum(venda[2] for venda in vendas)
+        logging.info(f"Carrinho com {len(vendas)} itens registrado com sucesso. Valor total: {total}.")
+        return total
+
+    # monta o WHERE das consultas de vendas a partir dos filtros opcionais
+    # data_inicio é inclusiva e data_fim exclusiva ('AAAA-MM-DD' ou 'AAAA-MM-DD HH:MM:SS')
+    @staticmethod
+    def _filtro_vendas(apos_id=None, data_inicio=None, data_fim=None, id_produto=None):
+        condicoes = ["id_venda > ?"]
+        parametros = [apos_id or 0]
+        if data_inicio is not None:
+            condicoes.append("data_venda >= ?")
+            parametros.append(data_inicio)
+        if data_fim is not None:
+            condicoes.append("data_venda < ?")
+            parametros.append(data_fim)
+        if id_produto is not None:
+            condicoes.append("id_produto = ?")
+            parametros.append(id_produto)
+        return " AND ".join(condicoes), parametros
+
+    # funçao para listar as vendas na tabela Vendas
+    # aceita paginação por chave (apos_id/limite) e filtros de data e produto,
+    # todos aplicados no próprio SQL; vendas arquivadas entram só quando o
+    # período pedido alcança a partição delas
+    @instrumentado
+    def listar_vendas(self, apos_id=None, limite=None, data_inicio=None, data_fim=None, id_produto=None):
+        dados_vendas = []
         try:
-            # conecta ao banco de dados
-            self.conectar()
-            
-            # executa comando sql para selecionar todas as vendas na tabela vendas
-            comando = '''
-                SELECT * FROM Vendas;
-            '''
-            self.cursor.execute(comando)
-            # busca todas as vendas na tabela Vendas
-            dados_vendas = self.cursor.fetchall()
+            # executa comando sql para selecionar as vendas na tabela vendas
+            filtro, parametros = self._filtro_vendas(apos_id, data_inicio, data_fim, id_produto)
+            with self.conexao() as conexao:
+                dados_vendas = self._consultar_vendas(
+                    conexao, VendaRegistro, f"SELECT {self.COLUNAS_VENDAS} FROM {{vendas}} WHERE {filtro}",
+                    parametros, data_inicio, data_fim, limite)
         except sqlite3.Error as e:
             logging.error(f"Erro ao listar as vendas: {e}")
-        finally:
-            # desconecta do banco de dados
-            self.desconectar()
-            return dados_vendas
-        
+        return dados_vendas
+
+    # função para percorrer as vendas em lotes, com os mesmos filtros de
+    # listar_vendas; cada lote é uma página (keyset por id_venda) consultada
+    # numa conexão emprestada só para ela
+    def iterar_vendas(self, tamanho_lote=500, apos_id=None, data_inicio=None, data_fim=None, id_produto=None):
+        filtro, parametros = self._filtro_vendas(apos_id, data_inicio, data_fim, id_produto)
+        consulta = f"SELECT {self.COLUNAS_VENDAS} FROM {{vendas}} WHERE {filtro}"
+        tamanho_lote = max(1, tamanho_lote)
+        try:
+            while True:
+                with self.conexao() as conexao:
+                    lote = self._consultar_vendas(conexao, VendaRegistro, consulta, parametros, data_inicio, data_fim, tamanho_lote)
+                if lote:
+                    yield lote
+                if len(lote) < tamanho_lote:
+                    break
+                # o primeiro parâmetro do filtro é o apos_id
+                parametros = [lote[-1].id_venda] + parametros[1:]
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao percorrer as vendas em lotes: {e}")
+
+    # função para o histórico de vendas já com o nome do produto (JOIN no SQL)
+    # devolve apenas as colunas exibidas na tela, com a mesma paginação e
+    # os mesmos filtros de listar_vendas
+    @instrumentado
+    def listar_historico_vendas(self, apos_id=None, limite=None, data_inicio=None, data_fim=None, id_produto=None):
+        historico = []
+        try:
+            filtro, parametros = self._filtro_vendas(apos_id, data_inicio, data_fim, id_produto)
+            consulta = f'''
+                SELECT v.id_venda, COALESCE(p.Nome, 'Desconhecido') AS Produto,
+                       v.Quantidade_vendida, v.valor_total, v.data_venda
+                FROM {{vendas}} v
+                LEFT JOIN main.Produtos p ON p.ID = v.id_produto
+                WHERE {filtro}
+            '''
+            with self.conexao() as conexao:
+                historico = self._consultar_vendas(
+                    conexao, HistoricoVendaRegistro, consulta, parametros, data_inicio, data_fim, limite)
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao listar o historico de vendas: {e}")
+        return historico
 
     # funçao para editar uma venda na tabela Vendas
     
+    @instrumentado
+    @com_retentativa
     def alterar_venda(self, id_venda, id_produto, quantidade_vendida, valor_total):
-        try:
-            # conecta ao banco de dados
-            self.conectar()
-            
-            # verifica se a quantidade vendida e o valor total sao maiores que zero
-            if quantidade_vendida < 0 or valor_total < 0:
-                raise ValueError("Quantidade vendida e valor total devem ser valores positivos.")
+        # verifica se a quantidade vendida e o valor total sao maiores que zero
+        if quantidade_vendida < 0 or valor_total < 0:
+            raise ValueError("Quantidade vendida e valor total devem ser valores positivos.")
 
+        try:
             # executa comando SQL para alterar uma venda na tabela Vendas
             # os valores são passados como parâmetros para evitar SQL Injection
             
@@ -300,41 +906,790 @@ class BancoDeDados:
                 SET id_produto = ?, Quantidade_vendida = ?, valor_total = ?
                 WHERE id_venda = ?;
             '''
-            self.cursor.execute(comando, (id_produto, quantidade_vendida, valor_total, id_venda))
-            # confirma alteração da venda no banco de dados
-            self.conexaoBD.commit()
+            with self.transacao("IMMEDIATE") as conexao:
+                # o resumo diário perde a venda antiga e ganha a nova
+                self._acumular_resumo(conexao, "id_venda = ?", (id_venda,), sinal=-1)
+                conexao.execute(comando, (id_produto, quantidade_vendida, valor_total, id_venda))
+                self._acumular_resumo(conexao, "id_venda = ?", (id_venda,))
             logging.info(f"Venda com ID {id_venda} alterada com sucesso.")
         except sqlite3.Error as e:
             logging.error(f"Erro ao alterar a venda: {e}")
-        finally:
-            # desconecta do banco de dados
-            self.desconectar()
+            raise
 
             
     # funçao para excluir uma venda na tabela Vendas
     
+    @instrumentado
+    @com_retentativa
     def excluir_venda(self, id_venda):
         try:
-            # conecta ao banco de dados
-            self.conectar()
-
             # executa comando sql para excluir uma venda na tabela vendas
-            comando = f'''
+            comando = '''
                 DELETE FROM Vendas WHERE id_venda = ?;
             '''
             # o ID da venda a ser excluída é passado como parâmetro para evitar SQL Injection
-            self.cursor.execute(comando, (id_venda,))
+            with self.transacao("IMMEDIATE") as conexao:
+                self._acumular_resumo(conexao, "id_venda = ?", (id_venda,), sinal=-1)
+                cursor = conexao.execute(comando, (id_venda,))
             
-            if self.cursor.rowcount == 0:
+            if cursor.rowcount == 0:
                 logging.warning(f"Nenhuma venda com ID {id_venda} foi encontrada.")
             else:
                 logging.info(f"Venda com ID {id_venda} excluída com sucesso.")
-            # confirma exclusão da venda no banco de dados
-            self.conexaoBD.commit()
         except sqlite3.Error as e:
             logging.error(f"Erro ao excluir a venda: {e}")
+            raise
+
+#                                                                                     # \_______________________________________/ #                                                                       #
+#---------------------------------------------------------------------------------------|  resumo de vendas para os relatórios  |-------------------------------------------------------------------------#
+#                                                                                     # |_______________________________________| #                                                                       #
+    # soma (sinal=1) ou subtrai (sinal=-1) no resumo diário as vendas que
+    # atendem ao filtro; deve ser chamado dentro da transação que grava Vendas
+    # (`tabela` permite somar as vendas de uma partição anexada)
+    @staticmethod
+    def _acumular_resumo(conexao, filtro, parametros, sinal=1, tabela="Vendas"):
+        sinal = -1 if sinal < 0 else 1
+        conexao.execute(f"""
+            INSERT INTO VendasDiarias (dia, id_produto, unidades, receita)
+            SELECT date(data_venda), id_produto, {sinal} * SUM(Quantidade_vendida), {sinal} * SUM(valor_total)
+            FROM {tabela}
+            WHERE {filtro} AND id_produto IS NOT NULL
+            GROUP BY date(data_venda), id_produto
+            ON CONFLICT (dia, id_produto) DO UPDATE SET
+                unidades = unidades + excluded.unidades,
+                receita = receita + excluded.receita
+            """, parametros)
+        if sinal < 0:
+            # dias/produtos que ficaram zerados saem do resumo
+            conexao.execute(f"""
+                DELETE FROM VendasDiarias
+                WHERE unidades = 0 AND abs(receita) < 0.005
+                  AND (dia, id_produto) IN (
+                      SELECT date(data_venda), id_produto FROM {tabela} WHERE {filtro}
+                  )
+                """, parametros)
+
+    # apaga e recalcula todo o resumo diário a partir da tabela Vendas
+    # (inclusive das vendas arquivadas nas partições). As partições são somadas
+    # grupo a grupo antes da transação, já que não se pode anexar dentro dela;
+    # elas não mudam depois de arquivadas, então só o principal precisa estar
+    # na mesma transação que apaga o resumo
+    @instrumentado
+    @com_retentativa
+    def reconstruir_resumo_vendas(self):
+        arquivadas = []
+        with self.conexao() as conexao:
+            for grupo in self._grupos_de_vendas(conexao):
+                with self._anexar_particoes(conexao, [p for p in grupo if p != "main"]) as esquemas:
+                    for nome in esquemas:
+                        arquivadas += conexao.execute(f"""
+                            SELECT date(data_venda), id_produto, SUM(Quantidade_vendida), SUM(valor_total)
+                            FROM {nome}.Vendas
+                            WHERE id_produto IS NOT NULL
+                            GROUP BY date(data_venda), id_produto
+                            """).fetchall()
+            with self.transacao("IMMEDIATE") as conexao:
+                conexao.execute("DELETE FROM VendasDiarias")
+                self._acumular_resumo(conexao, "1 = 1", ())
+                conexao.executemany("""
+                    INSERT INTO VendasDiarias (dia, id_produto, unidades, receita) VALUES (?, ?, ?, ?)
+                    ON CONFLICT (dia, id_produto) DO UPDATE SET
+                        unidades = unidades + excluded.unidades,
+                        receita = receita + excluded.receita
+                    """, arquivadas)
+                total = conexao.execute("SELECT COUNT(*) FROM VendasDiarias").fetchone()[0]
+        logging.info(f"Resumo de vendas reconstruido com {total} linhas.")
+        return total
+
+    # monta o WHERE das consultas do resumo (dia inicial inclusivo, final exclusivo)
+    @staticmethod
+    def _filtro_resumo(data_inicio=None, data_fim=None):
+        condicoes, parametros = ["1 = 1"], []
+        if data_inicio is not None:
+            condicoes.append("dia >= ?")
+            parametros.append(data_inicio)
+        if data_fim is not None:
+            condicoes.append("dia < ?")
+            parametros.append(data_fim)
+        return " AND ".join(condicoes), parametros
+
+    # produtos com maior receita no período
+    @instrumentado
+    def consultar_mais_vendidos(self, limite=10, data_inicio=None, data_fim=None):
+        filtro, parametros = self._filtro_resumo(data_inicio, data_fim)
+        comando = f"""
+            SELECT r.id_produto, COALESCE(p.Nome, 'Desconhecido') AS Produto,
+                   SUM(r.unidades) AS unidades, SUM(r.receita) AS receita
+            FROM VendasDiarias r
+            LEFT JOIN Produtos p ON p.ID = r.id_produto
+            WHERE {filtro}
+            GROUP BY r.id_produto
+            ORDER BY receita DESC
+            LIMIT ?
+        """
+        return self._consultar_resumo(comando, parametros + [limite])
+
+    # receita e unidades de cada dia do período
+    @instrumentado
+    def consultar_receita_diaria(self, data_inicio=None, data_fim=None):
+        filtro, parametros = self._filtro_resumo(data_inicio, data_fim)
+        comando = f"""
+            SELECT dia, SUM(unidades) AS unidades, SUM(receita) AS receita
+            FROM VendasDiarias
+            WHERE {filtro}
+            GROUP BY dia
+            ORDER BY dia
+        """
+        return self._consultar_resumo(comando, parametros)
+
+    # unidades vendidas de cada produto no período (ou de um único produto)
+    @instrumentado
+    def consultar_unidades_por_produto(self, data_inicio=None, data_fim=None, id_produto=None):
+        filtro, parametros = self._filtro_resumo(data_inicio, data_fim)
+        if id_produto is not None:
+            filtro += " AND id_produto = ?"
+            parametros.append(id_produto)
+        comando = f"""
+            SELECT id_produto, SUM(unidades) AS unidades, SUM(receita) AS receita
+            FROM VendasDiarias
+            WHERE {filtro}
+            GROUP BY id_produto
+            ORDER BY id_produto
+        """
+        return self._consultar_resumo(comando, parametros)
+
+    def _consultar_resumo(self, comando, parametros):
+        try:
+            with self.conexao() as conexao:
+                return [dict(linha) for linha in conexao.execute(comando, parametros).fetchall()]
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao consultar o resumo de vendas: {e}")
+            return []
+
+#                                                                                     # \_______________________________________/ #                                                                       #
+#---------------------------------------------------------------------------------------|     estoque mínimo e alertas        |-------------------------------------------------------------------------#
+#                                                                                     # |_______________________________________| #                                                                       #
+    # um produto está em falta quando Quantidade <= estoque_minimo. As escritas
+    # que mudam o saldo anotam cada produto que entrou ou saiu dessa situação;
+    # os alertas são entregues a `ouvintes_estoque` logo após o commit (e
+    # descartados se a transação for desfeita), na thread que gravou
+
+    def _alertas_pendentes(self):
+        alertas = getattr(self._local, "alertas", None)
+        if alertas is None:
+            alertas = self._local.alertas = []
+        return alertas
+
+    # antes=None: produto novo (só gera alerta se já nasce em falta)
+    def _verificar_minimo(self, id_produto, antes, depois, estoque_minimo):
+        if not self.ouvintes_estoque:
+            return
+        em_falta = depois <= estoque_minimo
+        if (antes is None and not em_falta) or (antes is not None and (antes <= estoque_minimo) == em_falta):
+            return
+        self._anotar_alerta(id_produto, depois, estoque_minimo)
+
+    def _anotar_alerta(self, id_produto, quantidade, estoque_minimo):
+        if self.ouvintes_estoque:
+            self._alertas_pendentes().append({
+                "id_produto": id_produto,
+                "quantidade": quantidade,
+                "estoque_minimo": estoque_minimo,
+                "em_falta": quantidade <= estoque_minimo,
+            })
+
+    def _publicar_alertas(self):
+        alertas = getattr(self._local, "alertas", None)
+        if not alertas:
+            return
+        self._local.alertas = []
+        for alerta in alertas:
+            for ouvinte in list(self.ouvintes_estoque):
+                try:
+                    ouvinte(alerta)
+                except Exception as e:
+                    logging.error(f"Erro ao entregar alerta de estoque: {e}")
+
+    # define o ponto de reposição de um produto; retorna a quantidade atual
+    @instrumentado
+    @com_retentativa
+    def definir_estoque_minimo(self, id_produto, estoque_minimo):
+        if estoque_minimo < 0:
+            raise ValueError("estoque mínimo deve ser >= 0")
+        with self.transacao("IMMEDIATE") as conexao:
+            anterior = conexao.execute(
+                "SELECT Quantidade, estoque_minimo FROM Produtos WHERE ID = ?", (id_produto,)
+            ).fetchone()
+            if anterior is None:
+                raise ValueError("produto não encontrado")
+            conexao.execute("UPDATE Produtos SET estoque_minimo = ? WHERE ID = ?", (estoque_minimo, id_produto))
+            quantidade = anterior["Quantidade"]
+            # a situação muda quando o limite passa por cima ou por baixo do saldo
+            if (quantidade <= anterior["estoque_minimo"]) != (quantidade <= estoque_minimo):
+                self._anotar_alerta(id_produto, quantidade, estoque_minimo)
+        logging.info(f"Estoque minimo do produto {id_produto} definido em {estoque_minimo}.")
+        return quantidade
+
+    # define (ou, com None, remove) o código de barras de um produto
+    @instrumentado
+    @com_retentativa
+    def definir_codigo_barras(self, id_produto, codigo_barras):
+        with self.transacao("IMMEDIATE") as conexao:
+            if codigo_barras is not None:
+                self._verificar_codigo_barras(conexao, codigo_barras, id_produto)
+            cursor = conexao.execute("UPDATE Produtos SET codigo_barras = ? WHERE ID = ?", (codigo_barras, id_produto))
+            if cursor.rowcount == 0:
+                raise ValueError("produto não encontrado")
+        logging.info(f"Codigo de barras do produto {id_produto} definido.")
+
+    # o índice único idx_produtos_codigo_barras já impede a repetição; a
+    # consulta antes da escrita só troca o IntegrityError por uma mensagem clara
+    @staticmethod
+    def _verificar_codigo_barras(conexao, codigo_barras, id_produto=None):
+        dono = conexao.execute("SELECT ID FROM Produtos WHERE codigo_barras = ?", (codigo_barras,)).fetchone()
+        if dono is not None and dono[0] != id_produto:
+            raise ValueError(f"código de barras já usado pelo produto {dono[0]}")
+
+    # produtos com Quantidade <= estoque_minimo, em ordem de ID (paginação por
+    # chave); a consulta percorre só o índice parcial idx_produtos_em_falta
+    @instrumentado
+    def listar_produtos_em_falta(self, apos_id=None, limite=None):
+        try:
+            with self.conexao() as conexao:
+                return self._consultar(conexao, ProdutoRegistro, f"""
+                    SELECT {COLUNAS_PRODUTO} FROM Produtos
+                    WHERE Quantidade <= estoque_minimo AND ID > ?
+                    ORDER BY ID
+                    LIMIT ?
+                    """,
+                    (apos_id or 0, -1 if limite is None else limite),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao listar os produtos em falta: {e}")
+            return []
+
+#                                                                                     # \_______________________________________/ #                                                                       #
+#---------------------------------------------------------------------------------------|    movimentos de estoque (histórico)   |-------------------------------------------------------------------------#
+#                                                                                     # |_______________________________________| #                                                                       #
+    # cada alteração de saldo vira uma linha em MovimentosEstoque, gravada na
+    # mesma transação que atualiza Produtos.Quantidade (o saldo atual);
+    # SnapshotsEstoque guarda o saldo compactado para consultas no passado
+    # (id_movimento é AUTOINCREMENT: IDs de movimentos descartados não voltam)
+
+    TIPOS_AJUSTE = ("ajuste", "reposicao")
+
+    @staticmethod
+    def _registrar_movimento(conexao, id_produto, tipo, quantidade, id_venda=None):
+        if quantidade:
+            conexao.execute(
+                "INSERT INTO MovimentosEstoque (id_produto, tipo, quantidade, id_venda) VALUES (?, ?, ?, ?)",
+                (id_produto, tipo, quantidade, id_venda),
+            )
+
+    # movimentos: lista de tuplas (id_produto, tipo, quantidade, id_venda)
+    @staticmethod
+    def _registrar_movimentos(conexao, movimentos):
+        if movimentos:
+            conexao.executemany(
+                "INSERT INTO MovimentosEstoque (id_produto, tipo, quantidade, id_venda) VALUES (?, ?, ?, ?)",
+                movimentos,
+            )
+
+    # soma `delta` ao saldo do produto sem ler a linha antes (sem perder
+    # ajustes feitos ao mesmo tempo por outro terminal); tipo 'ajuste' ou 'reposicao'
+    # retorna o novo saldo
+    @instrumentado
+    @com_retentativa
+    def ajustar_estoque(self, id_produto, delta, tipo="ajuste"):
+        if tipo not in self.TIPOS_AJUSTE:
+            raise ValueError(f"tipo de movimento inválido: {tipo}")
+        if tipo == "reposicao" and delta <= 0:
+            raise ValueError("quantidade reposta deve ser maior que zero")
+
+        with self.transacao("IMMEDIATE") as conexao:
+            linha = conexao.execute(
+                """
+                UPDATE Produtos SET Quantidade = Quantidade + ?
+                WHERE ID = ? AND Quantidade + ? >= 0
+                RETURNING Quantidade, estoque_minimo
+                """,
+                (delta, id_produto, delta),
+            ).fetchone()
+            if linha is None:
+                existe = conexao.execute("SELECT 1 FROM Produtos WHERE ID = ?", (id_produto,)).fetchone()
+                if existe is None:
+                    raise ValueError("produto não encontrado")
+                raise ValueError("quantidade resultante não pode ser negativa")
+            self._registrar_movimento(conexao, id_produto, tipo, delta)
+            self._verificar_minimo(id_produto, linha["Quantidade"] - delta, linha["Quantidade"], linha["estoque_minimo"])
+        logging.info(f"Estoque do produto {id_produto} ajustado em {delta} ({tipo}).")
+        return linha["Quantidade"]
+
+    # exclui a venda e devolve as unidades ao estoque (movimento 'estorno_venda')
+    # retorna o ID do produto da venda estornada
+    @instrumentado
+    @com_retentativa
+    def estornar_venda(self, id_venda):
+        with self.transacao("IMMEDIATE") as conexao:
+            venda = conexao.execute(
+                "SELECT id_produto, Quantidade_vendida FROM Vendas WHERE id_venda = ?", (id_venda,)
+            ).fetchone()
+            if venda is None:
+                raise ValueError("venda não encontrada")
+            self._acumular_resumo(conexao, "id_venda = ?", (id_venda,), sinal=-1)
+            conexao.execute("DELETE FROM Vendas WHERE id_venda = ?", (id_venda,))
+            devolucao = conexao.execute(
+                "UPDATE Produtos SET Quantidade = Quantidade + ? WHERE ID = ? RETURNING Quantidade, estoque_minimo",
+                (venda["Quantidade_vendida"], venda["id_produto"]),
+            ).fetchone()
+            # produto já excluído: a venda sai, mas não há saldo a devolver
+            if devolucao is not None:
+                self._registrar_movimento(
+                    conexao, venda["id_produto"], "estorno_venda", venda["Quantidade_vendida"], id_venda
+                )
+                self._verificar_minimo(venda["id_produto"], devolucao["Quantidade"] - venda["Quantidade_vendida"],
+                                       devolucao["Quantidade"], devolucao["estoque_minimo"])
+        logging.info(f"Venda {id_venda} estornada com sucesso.")
+        return venda["id_produto"]
+
+    # movimentos em ordem de ID (paginação por chave, como listar_vendas)
+    @instrumentado
+    def listar_movimentos(self, id_produto=None, apos_id=None, limite=None):
+        filtro, parametros = "id_movimento > ?", [apos_id or 0]
+        if id_produto is not None:
+            filtro += " AND id_produto = ?"
+            parametros.append(id_produto)
+        parametros.append(-1 if limite is None else limite)
+        try:
+            with self.conexao() as conexao:
+                return [dict(linha) for linha in conexao.execute(
+                    f"SELECT * FROM MovimentosEstoque WHERE {filtro} ORDER BY id_movimento LIMIT ?", parametros
+                ).fetchall()]
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao listar os movimentos de estoque: {e}")
+            return []
+
+    # última fotografia de cada produto
+    @staticmethod
+    def _ultimos_snapshots():
+        return """
+            SELECT id_produto, MAX(ate_movimento) AS ate_movimento, quantidade
+            FROM SnapshotsEstoque
+            GROUP BY id_produto
+        """
+
+    # saldo do produto num instante ('AAAA-MM-DD HH:MM:SS' em UTC, ou
+    # 'AAAA-MM-DD' = início do dia): última fotografia até lá + movimentos seguintes
+    # retorna None para um produto sem cadastro nem histórico, ou para um instante
+    # anterior aos movimentos apagados por compactar_estoque(descartar=True)
+    @instrumentado
+    def estoque_em(self, id_produto, data):
+        with self.conexao() as conexao:
+            descartado_ate = conexao.execute("SELECT MAX(data) FROM CompactacoesEstoque").fetchone()[0]
+            if descartado_ate is not None and data < descartado_ate:
+                return None
+            snapshot = conexao.execute(
+                """
+                SELECT ate_movimento, quantidade FROM SnapshotsEstoque
+                WHERE id_produto = ? AND data <= ?
+                ORDER BY ate_movimento DESC LIMIT 1
+                """,
+                (id_produto, data),
+            ).fetchone()
+            if snapshot is None and not self._produto_conhecido(conexao, id_produto):
+                return None
+            ate_movimento, quantidade = (snapshot["ate_movimento"], snapshot["quantidade"]) if snapshot else (0, 0)
+            delta = conexao.execute(
+                """
+                SELECT COALESCE(SUM(quantidade), 0) FROM MovimentosEstoque
+                WHERE id_produto = ? AND id_movimento > ? AND data <= ?
+                """,
+                (id_produto, ate_movimento, data),
+            ).fetchone()[0]
+        return quantidade + delta
+
+    # o produto está cadastrado ou já teve algum movimento (um produto excluído
+    # continua com o histórico de saldo)
+    @staticmethod
+    def _produto_conhecido(conexao, id_produto):
+        return conexao.execute(
+            """
+            SELECT EXISTS (SELECT 1 FROM Produtos WHERE ID = ?)
+                OR EXISTS (SELECT 1 FROM MovimentosEstoque WHERE id_produto = ?)
+                OR EXISTS (SELECT 1 FROM SnapshotsEstoque WHERE id_produto = ?)
+            """,
+            (id_produto, id_produto, id_produto),
+        ).fetchone()[0] == 1
+
+    # grava uma fotografia do saldo de cada produto com movimentos até `ate_data`
+    # (padrão: agora); com descartar=True apaga os movimentos já fotografados,
+    # mantendo a tabela pequena ao custo do detalhe anterior à fotografia, e
+    # registra em CompactacoesEstoque a data a partir da qual estoque_em responde
+    # retorna quantas fotografias foram gravadas
+    @instrumentado
+    @com_retentativa
+    def compactar_estoque(self, ate_data=None, descartar=False):
+        with self.transacao("IMMEDIATE") as conexao:
+            limite = conexao.execute(
+                "SELECT MAX(id_movimento) FROM MovimentosEstoque WHERE data <= COALESCE(?, CURRENT_TIMESTAMP)",
+                (ate_data,),
+            ).fetchone()[0]
+            if limite is None:
+                return 0
+            cursor = conexao.execute(
+                f"""
+                INSERT OR REPLACE INTO SnapshotsEstoque (id_produto, ate_movimento, quantidade, data)
+                SELECT m.id_produto, MAX(m.id_movimento), COALESCE(s.quantidade, 0) + SUM(m.quantidade), MAX(m.data)
+                FROM MovimentosEstoque m
+                LEFT JOIN ({self._ultimos_snapshots()}) s ON s.id_produto = m.id_produto
+                WHERE m.id_movimento > COALESCE(s.ate_movimento, 0) AND m.id_movimento <= ?
+                GROUP BY m.id_produto
+                """,
+                (limite,),
+            )
+            gravadas = cursor.rowcount
+            if descartar:
+                conexao.execute(
+                    """
+                    INSERT OR REPLACE INTO CompactacoesEstoque (ate_movimento, data)
+                    SELECT ?, MAX(data) FROM MovimentosEstoque WHERE id_movimento <= ?
+                    """,
+                    (limite, limite),
+                )
+                conexao.execute("DELETE FROM MovimentosEstoque WHERE id_movimento <= ?", (limite,))
+        logging.info(f"Estoque compactado ate o movimento {limite}: {gravadas} fotografias.")
+        return gravadas
+
+    # confere Produtos.Quantidade com o saldo calculado pelo histórico
+    # retorna os produtos divergentes (lista vazia = tudo certo)
+    @instrumentado
+    def verificar_estoque(self):
+        with self.conexao() as conexao:
+            return [dict(linha) for linha in conexao.execute(f"""
+                SELECT ID AS id_produto, Quantidade AS quantidade, calculado
+                FROM (
+                    SELECT p.ID, p.Quantidade,
+                           COALESCE(s.quantidade, 0) + COALESCE((
+                               SELECT SUM(m.quantidade) FROM MovimentosEstoque m
+                               WHERE m.id_produto = p.ID AND m.id_movimento > COALESCE(s.ate_movimento, 0)
+                           ), 0) AS calculado
+                    FROM Produtos p
+                    LEFT JOIN ({self._ultimos_snapshots()}) s ON s.id_produto = p.ID
+                )
+                WHERE Quantidade != calculado
+                """).fetchall()]
+
+    # ---------- exportação ----------
+
+    # colunas, comando e chave de paginação de cada tabela exportável;
+    # o comando recebe a chave do último registro lido, os filtros e o LIMIT
+    @staticmethod
+    def _consulta_exportacao(tabela, data_inicio=None, data_fim=None, com_nomes=True):
+        if tabela == "produtos":
+            if data_inicio is not None or data_fim is not None:
+                raise ValueError("filtro de data só se aplica à exportação de vendas")
+            colunas = ("ID", "Nome", "Descricao", "Preco", "Quantidade")
+            comando = "SELECT ID, Nome, Descricao, Preco, Quantidade FROM Produtos WHERE ID > ? ORDER BY ID LIMIT ?"
+            return colunas, comando, (0,), [], lambda linha: (linha[0],)
+        if tabela != "vendas":
+            raise ValueError(f"tabela de exportação inválida: {tabela}")
+
+        # vendas em ordem de data (e id), percorrendo o índice idx_vendas_data:
+        # o filtro de período vira um intervalo do índice, sem ordenação extra
+        condicoes = ["(v.data_venda, v.id_venda) > (?, ?)"]
+        filtros = []
+        if data_inicio is not None:
+            condicoes.append("v.data_venda >= ?")
+            filtros.append(data_inicio)
+        if data_fim is not None:
+            condicoes.append("v.data_venda < ?")
+            filtros.append(data_fim)
+        if com_nomes:
+            colunas = ("id_venda", "id_produto", "Produto", "Quantidade_vendida", "valor_total", "data_venda")
+            origem = "{vendas} v LEFT JOIN main.Produtos p ON p.ID = v.id_produto"
+            selecao = "v.id_venda, v.id_produto, p.Nome, v.Quantidade_vendida, v.valor_total, v.data_venda"
+        else:
+            colunas = ("id_venda", "id_produto", "Quantidade_vendida", "valor_total", "data_venda")
+            origem = "{vendas} v"
+            selecao = "v.id_venda, v.id_produto, v.Quantidade_vendida, v.valor_total, v.data_venda"
+        comando = f"""
+            SELECT {selecao} FROM {origem}
+            WHERE {' AND '.join(condicoes)}
+            ORDER BY v.data_venda, v.id_venda
+            LIMIT ?
+            """
+        return colunas, comando, ("", 0), filtros, lambda linha: (linha[-1], linha[0])
+
+    # exportação em streaming de "produtos" ou "vendas" (data_inicio inclusiva,
+    # data_fim exclusiva, com_nomes acrescenta o nome do produto às vendas)
+    # retorna (colunas, lotes): lotes gera listas de até `tamanho_lote` tuplas
+    def exportar(self, tabela, tamanho_lote=5000, data_inicio=None, data_fim=None, com_nomes=True):
+        colunas, comando, chave, filtros, chave_da_linha = self._consulta_exportacao(tabela, data_inicio, data_fim, com_nomes)
+        periodo = (data_inicio, data_fim) if tabela == "vendas" else None
+        return colunas, self._lotes_exportacao(comando, chave, filtros, chave_da_linha, max(1, tamanho_lote), periodo)
+
+    # lê a consulta de exportação em blocos paginados pela chave, numa conexão
+    # só de leitura; um erro interrompe a exportação (nunca gera um arquivo incompleto)
+    # nas vendas, `periodo` indica as partições a percorrer, uma após a outra
+    def _lotes_exportacao(self, comando, chave_inicial, filtros, chave_da_linha, tamanho_lote, periodo=None):
+        try:
+            with self.pool.conexao_somente_leitura() as conexao:
+                # as partições são anexadas grupo a grupo, antes de abrir a transação
+                # (ATTACH não é permitido dentro dela); como não mudam depois de
+                # arquivadas, só a leitura do principal precisa ser um instante único
+                grupos = [["main"]] if periodo is None else self._grupos_de_vendas(conexao, *periodo)
+                for grupo in grupos:
+                    with self._anexar_particoes(conexao, grupo, somente_leitura=True) as esquemas:
+                        # em WAL a leitura do grupo é uma transação de leitura: vê um único
+                        # instante do banco e não bloqueia as vendas; no journal padrão cada
+                        # bloco é uma leitura curta, para o lock de leitura não segurar os commits
+                        wal = conexao.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+                        instantaneo = wal and not conexao.in_transaction
+                        if instantaneo:
+                            conexao.execute("BEGIN")
+                        try:
+                            for nome in esquemas:
+                                consulta = comando.format(vendas=f"{nome}.Vendas")
+                                chave = chave_inicial
+                                while True:
+                                    cursor = conexao.execute(consulta, (*chave, *filtros, tamanho_lote))
+                                    linhas = cursor.fetchmany(tamanho_lote)
+                                    cursor.close()
+                                    if not linhas:
+                                        break
+                                    yield linhas
+                                    if len(linhas) < tamanho_lote:
+                                        break
+                                    chave = chave_da_linha(linhas[-1])
+                        finally:
+                            if instantaneo and conexao.in_transaction:
+                                conexao.rollback()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao exportar: {e}")
+            raise
+
+#                                                                                     # \_______________________________________/ #                                                                       #
+#---------------------------------------------------------------------------------------|   vendas arquivadas (partições)      |-------------------------------------------------------------------------#
+#                                                                                     # |_______________________________________| #                                                                       #
+    # vendas antigas podem ser movidas para arquivos de partição, um por período
+    # (ano ou mês), registrados em ParticoesVendas; as consultas de vendas anexam
+    # (ATTACH) só as partições que o período pedido alcança. O resumo diário
+    # (VendasDiarias) continua no banco principal, então os relatórios não mudam.
+    # Vendas arquivadas não podem mais ser alteradas, excluídas ou estornadas.
+
+    COLUNAS_VENDAS = COLUNAS_VENDA
+
+    # (chave, início, fim) do período que contém a data; periodo = "ano" ou "mes"
+    @staticmethod
+    def _periodo_da_data(data, periodo="ano"):
+        ano, mes = int(data[:4]), int(data[5:7])
+        if periodo == "ano":
+            return f"{ano:04d}", f"{ano:04d}-01-01", f"{ano + 1:04d}-01-01"
+        if periodo == "mes":
+            proximo_ano, proximo_mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+            return f"{ano:04d}-{mes:02d}", f"{ano:04d}-{mes:02d}-01", f"{proximo_ano:04d}-{proximo_mes:02d}-01"
+        raise ValueError(f"período de arquivamento inválido: {periodo} (use 'ano' ou 'mes')")
+
+    # os arquivos de partição ficam na mesma pasta do banco principal
+    def _caminho_particao(self, arquivo):
+        return os.path.join(os.path.dirname(os.path.abspath(self.nomeBD)), arquivo)
+
+    @staticmethod
+    def _nome_particao(periodo):
+        return "vendas_" + re.sub(r"\W", "_", periodo)
+
+    # partições que alcançam [data_inicio, data_fim), em ordem cronológica:
+    # tuplas (periodo, inicio, fim, arquivo, vendas)
+    @staticmethod
+    def _consultar_particoes(conexao, data_inicio=None, data_fim=None):
+        condicoes, parametros = ["1 = 1"], []
+        if data_inicio is not None:
+            condicoes.append("fim > ?")
+            parametros.append(data_inicio)
+        if data_fim is not None:
+            condicoes.append("inicio < ?")
+            parametros.append(data_fim)
+        try:
+            return [tuple(linha) for linha in conexao.execute(f"""
+                SELECT periodo, inicio, fim, arquivo, vendas FROM main.ParticoesVendas
+                WHERE {' AND '.join(condicoes)}
+                ORDER BY inicio, periodo
+                """, parametros).fetchall()]
+        except sqlite3.OperationalError as e:
+            # banco ainda sem a migração do registro de partições: nada arquivado
+            if "no such table" not in str(e):
+                raise
+            return []
+
+    # partições que o período alcança, divididas em grupos que cabem no limite de
+    # bancos anexados a uma conexão (SQLITE_LIMIT_ATTACHED, 10 por padrão; um
+    # lugar fica livre). Cada grupo é uma lista de tuplas de _consultar_particoes
+    # e o último termina com "main"; sem partições o resultado é [["main"]]
+    def _grupos_de_vendas(self, conexao, data_inicio=None, data_fim=None):
+        particoes = self._consultar_particoes(conexao, data_inicio, data_fim)
+        tamanho = max(1, conexao.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) - 1)
+        grupos = [particoes[inicio:inicio + tamanho] for inicio in range(0, len(particoes), tamanho)] or [[]]
+        grupos[-1] = grupos[-1] + ["main"]
+        return grupos
+
+    # anexa à conexão as partições de um grupo e devolve os esquemas a consultar,
+    # na mesma ordem do grupo; as partições anexadas aqui são desanexadas ao sair
+    # do bloco (ATTACH e DETACH não são permitidos dentro de uma transação)
+    @contextmanager
+    def _anexar_particoes(self, conexao, grupo, somente_leitura=False):
+        anexados = None
+        esquemas, novos = [], []
+        try:
+            for particao in grupo:
+                if particao == "main":
+                    esquemas.append("main")
+                    continue
+                periodo, arquivo = particao[0], particao[3]
+                nome = self._nome_particao(periodo)
+                if anexados is None:
+                    anexados = {linha[1] for linha in conexao.execute("PRAGMA database_list").fetchall()}
+                if nome not in anexados:
+                    caminho = self._caminho_particao(arquivo)
+                    if not os.path.exists(caminho):
+                        raise sqlite3.OperationalError(f"arquivo da partição de vendas {periodo} não encontrado: {caminho}")
+                    if somente_leitura:
+                        caminho = "file:" + urllib.parse.quote(caminho) + "?mode=ro"
+                    conexao.execute(f"ATTACH DATABASE ? AS {nome}", (caminho,))
+                    novos.append(nome)
+                esquemas.append(nome)
+            yield esquemas
         finally:
-            # desconecta do banco de dados
-            self.desconectar()       
-    
-            
\ No newline at end of file
+            for nome in novos:
+                conexao.execute(f"DETACH DATABASE {nome}")
+
+    # a mesma consulta em cada esquema, unida por UNION ALL: `consulta` usa
+    # {vendas} no lugar da tabela e os parâmetros se repetem em cada parte
+    @staticmethod
+    def _uniao(esquemas, consulta, parametros):
+        comando = " UNION ALL ".join(consulta.format(vendas=f"{nome}.Vendas") for nome in esquemas)
+        return comando, list(parametros) * len(esquemas)
+
+    # executa `consulta` (com {vendas} no lugar da tabela e id_venda como primeira
+    # coluna) em todas as partições do período e no banco principal, grupo a grupo,
+    # e junta os resultados em ordem de id_venda, até `limite` registros
+    def _consultar_vendas(self, conexao, registro, consulta, parametros, data_inicio=None, data_fim=None, limite=None):
+        partes = []
+        for grupo in self._grupos_de_vendas(conexao, data_inicio, data_fim):
+            with self._anexar_particoes(conexao, grupo) as esquemas:
+                comando, parametros_grupo = self._uniao(esquemas, consulta, parametros)
+                parametros_grupo.append(-1 if limite is None else limite)
+                partes.append(self._consultar(
+                    conexao, registro, comando + " ORDER BY id_venda LIMIT ?", parametros_grupo).fetchall())
+        if len(partes) == 1:
+            return partes[0]
+        return list(itertools.islice(heapq.merge(*partes, key=operator.attrgetter("id_venda")), limite))
+
+    # partições registradas (todas ou só as que alcançam o período)
+    @instrumentado
+    def listar_particoes_vendas(self, data_inicio=None, data_fim=None):
+        colunas = ("periodo", "inicio", "fim", "arquivo", "vendas")
+        with self.conexao() as conexao:
+            return [dict(zip(colunas, linha)) for linha in self._consultar_particoes(conexao, data_inicio, data_fim)]
+
+    # move para as partições as vendas com data_venda < ate_data, um arquivo por
+    # período, em transações de até `tamanho_lote` vendas; pode ser interrompido e
+    # executado de novo. Retorna {periodo: vendas movidas}.
+    @instrumentado
+    def arquivar_vendas(self, ate_data, periodo="ano", tamanho_lote=10_000):
+        if self.pool.memoria:
+            raise ValueError("o arquivamento de vendas exige um banco em arquivo")
+        self._periodo_da_data("2000-01-01", periodo)
+        tamanho_lote = max(1, tamanho_lote)
+        base = os.path.splitext(os.path.basename(self.nomeBD))[0]
+        movidas = {}
+        try:
+            with self.conexao() as conexao:
+                while True:
+                    # a venda mais antiga ainda no arquivo principal define a próxima partição
+                    mais_antiga = conexao.execute(
+                        "SELECT MIN(data_venda) FROM main.Vendas WHERE data_venda < ?", (ate_data,)
+                    ).fetchone()[0]
+                    if mais_antiga is None:
+                        break
+                    chave, inicio, fim = self._periodo_da_data(mais_antiga, periodo)
+                    arquivo = f"{base}.vendas-{chave}.sqlite"
+                    movidas[chave] = movidas.get(chave, 0) + self._arquivar_periodo(
+                        conexao, chave, inicio, arquivo, min(fim, ate_data), tamanho_lote)
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao arquivar vendas: {e}")
+            raise
+        logging.info(f"Vendas arquivadas ate {ate_data}: {movidas}")
+        return movidas
+
+    def _arquivar_periodo(self, conexao, chave, inicio, arquivo, ate_data, tamanho_lote):
+        nome = self._nome_particao(chave)
+        conexao.execute(f"ATTACH DATABASE ? AS {nome}", (self._caminho_particao(arquivo),))
+        try:
+            esquema.criar_particao_vendas(conexao, nome)
+            # em WAL o commit de dois arquivos não é atômico: grava primeiro na
+            # partição e só depois apaga do principal, então uma queda no meio
+            # deixa o lote repetido (nunca perdido) e a próxima execução corrige
+            wal = conexao.execute("PRAGMA main.journal_mode").fetchone()[0].lower() == "wal"
+            movidas = 0
+            while True:
+                with self.transacao("IMMEDIATE"):
+                    ids = json.dumps([linha[0] for linha in conexao.execute(
+                        "SELECT id_venda FROM main.Vendas WHERE data_venda >= ? AND data_venda < ? "
+                        "ORDER BY data_venda LIMIT ?", (inicio, ate_data, tamanho_lote)).fetchall()])
+                    inseridas = conexao.execute(f"""
+                        INSERT OR IGNORE INTO {nome}.Vendas ({self.COLUNAS_VENDAS})
+                        SELECT {self.COLUNAS_VENDAS} FROM main.Vendas
+                        WHERE id_venda IN (SELECT value FROM json_each(?))
+                        """, (ids,)).rowcount
+                    if not wal:
+                        apagadas = self._apagar_arquivadas(conexao, ids, chave, inicio, ate_data, arquivo, inseridas)
+                if wal:
+                    with self.transacao("IMMEDIATE"):
+                        apagadas = self._apagar_arquivadas(conexao, ids, chave, inicio, ate_data, arquivo, inseridas)
+                movidas += inseridas
+                if apagadas < tamanho_lote:
+                    break
+        finally:
+            conexao.execute(f"DETACH DATABASE {nome}")
+        return movidas
+
+    # apaga do arquivo principal as vendas já copiadas e atualiza o registro;
+    # o fim registrado é a data de corte usada (não o fim do período), então
+    # consultas posteriores ao corte não precisam anexar a partição
+    @staticmethod
+    def _apagar_arquivadas(conexao, ids, chave, inicio, fim, arquivo, inseridas):
+        apagadas = conexao.execute(
+            "DELETE FROM main.Vendas WHERE id_venda IN (SELECT value FROM json_each(?))", (ids,)
+        ).rowcount
+        conexao.execute("""
+            INSERT INTO main.ParticoesVendas (periodo, inicio, fim, arquivo, vendas) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (periodo) DO UPDATE SET
+                vendas = vendas + excluded.vendas,
+                fim = max(fim, excluded.fim)
+            """, (chave, inicio, fim, arquivo, inseridas))
+        return apagadas
+
+    # devolve ao sistema o espaço livre do arquivo principal. Na primeira vez
+    # ativa auto_vacuum = INCREMENTAL, o que exige um VACUUM completo (o banco
+    # fica bloqueado enquanto isso); depois basta o incremental_vacuum.
+    # Retorna o tamanho do arquivo (bytes) antes e depois.
+    @instrumentado
+    def compactar_banco(self):
+        if self.pool.memoria:
+            return 0, 0
+        antes = os.path.getsize(self.nomeBD)
+        try:
+            with self.conexao() as conexao:
+                if conexao.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                    conexao.execute("PRAGMA incremental_vacuum").fetchall()
+                else:
+                    conexao.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    conexao.execute("VACUUM")
+                # em WAL as páginas só saem do arquivo depois do checkpoint
+                conexao.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        except sqlite3.Error as e:
+            logging.error(f"Erro ao compactar o banco de dados: {e}")
+            raise
+        depois = os.path.getsize(self.nomeBD)
+        logging.info(f"Banco de dados compactado de {antes} para {depois} bytes.")
+        return antes, depois
@@ -10,6 +10,7 @@ import sys
 import asyncio
 import flet as ft
 from interface import main
+from negocio import encerrar
 
 # Garante que o projeto possa importar corretamente os módulos locais
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -28,3 +29,6 @@ if __name__ == "__main__":
         asyncio.run(run())
     except Exception as e:
         print(f"❌ Erro ao iniciar a aplicação: {e}")
+    finally:
+        # grava as vendas que ainda estiverem na fila de gravação em grupo
+        encerrar()
@@ -0,0 +1,652 @@
+"""
+benchmark.py — Medições de desempenho do Sistema de Gerenciamento de Estoque.
+
+Subcomandos:
+    suite     gera bancos sintéticos de vários tamanhos e mede latência e vazão
+              das operações de Produto e Venda; grava o resultado em JSON
+    comparar  compara dois resultados JSON e falha se alguma operação piorar
+              além do limite
+    pool      compara a camada de dados atual sem pool (tamanho 0: uma conexão
+              aberta e fechada por chamada) e com o pool de conexões
+    concorrencia  vários processos (terminais) vendendo no mesmo arquivo ao
+              mesmo tempo, ou pelo servidor HTTP (--servidor); confere que
+              nenhuma venda se perdeu
+    grupo     vazão de vendas com commit individual x gravação em grupo
+    memoria   bytes por produto ao carregar o catálogo inteiro: um dict por
+              linha (formato antigo) x ProdutoRegistro
+
+Uso:
+    python benchmark.py suite --conjuntos 1k,100k --saida base.json
+    python benchmark.py suite --conjuntos 1k,100k,1M --pasta /var/tmp/bench --saida atual.json
+    python benchmark.py comparar base.json atual.json --limite 0.15
+    python benchmark.py pool --operacoes 2000 --produtos 500
+    python benchmark.py concorrencia --processos 8 --vendas 500
+    python benchmark.py concorrencia --processos 4,16,32 --servidor
+    python benchmark.py grupo --threads 256 --lotes 1,20,200
+    python benchmark.py memoria --produtos 1000000
+
+Os bancos sintéticos são gerados uma única vez por pasta (--pasta) e copiados
+a cada execução, então as operações de escrita não alteram a base.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+import servidor
+from BancoDeDados import BancoDeDados
+from cliente import ClienteHTTP, VendaRemota
+from negocio import Produto, Venda
+
+# conjuntos pré-definidos: nome -> (produtos, vendas)
+CONJUNTOS = {
+    "1k": (1_000, 10_000),
+    "100k": (100_000, 1_000_000),
+    "1M": (1_000_000, 10_000_000),
+}
+
+# palavras usadas para montar descrições sintéticas
+PALAVRAS = (
+    "caneta", "caderno", "borracha", "lapis", "mochila", "regua", "tesoura", "cola",
+    "azul", "vermelho", "verde", "preto", "grande", "pequeno", "escolar", "premium",
+)
+
+# dias cobertos pelas datas das vendas sintéticas
+DIAS_DE_VENDAS = 365
+
+VERSAO_RESULTADO = 1
+
+
+def medir(funcao, repeticoes):
+    """Executa `funcao` `repeticoes` vezes e devolve as latências em microssegundos."""
+    tempos = []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(i)
+        tempos.append((time.perf_counter() - inicio) * 1_000_000)
+    return tempos
+
+
+def percentil(ordenados, fracao):
+    indice = max(0, min(len(ordenados) - 1, int(round(len(ordenados) * fracao)) - 1))
+    return ordenados[indice]
+
+
+def resumir(tempos):
+    tempos = sorted(tempos)
+    total = sum(tempos)
+    return {
+        "repeticoes": len(tempos),
+        "media_us": statistics.fmean(tempos),
+        "p50_us": percentil(tempos, 0.50),
+        "p95_us": percentil(tempos, 0.95),
+        "p99_us": percentil(tempos, 0.99),
+        "max_us": tempos[-1],
+        "ops_por_segundo": len(tempos) / (total / 1_000_000) if total else 0.0,
+    }
+
+
+def preparar_banco(caminho, produtos):
+    with BancoDeDados(caminho) as bd:
+        bd.criar_tabelas()
+        for i in range(produtos):
+            bd.inserir_produto(f"produto {i}", "carga de benchmark", 10.0, 1_000_000)
+
+
+# ---------------------------------------------------------------------------
+# suite: bancos sintéticos
+# ---------------------------------------------------------------------------
+
+def ler_conjunto(texto):
+    """Aceita um nome de CONJUNTOS ou 'produtos:vendas' (ex.: 5000:20000)."""
+    if texto in CONJUNTOS:
+        return texto, CONJUNTOS[texto]
+    try:
+        produtos, vendas = (int(parte) for parte in texto.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"conjunto inválido: {texto} (use {', '.join(CONJUNTOS)} ou produtos:vendas)")
+    return texto, (produtos, vendas)
+
+
+def gerar_banco_sintetico(caminho, produtos, vendas, semente=42, tamanho_lote=50_000):
+    """
+    Cria um banco com `produtos` produtos e `vendas` vendas aleatórias
+    (datas espalhadas pelos últimos DIAS_DE_VENDAS dias) e preenche o resumo diário.
+    """
+    aleatorio = random.Random(semente)
+    hoje = datetime.datetime(2026, 1, 1)
+
+    def linhas_produtos():
+        for i in range(produtos):
+            descricao = " ".join(aleatorio.choices(PALAVRAS, k=4))
+            yield (f"produto {i:07d}", descricao, round(aleatorio.uniform(1, 500), 2), 1_000_000_000)
+
+    def linhas_vendas(quantidade):
+        for _ in range(quantidade):
+            id_produto = aleatorio.randint(1, produtos)
+            unidades = aleatorio.randint(1, 5)
+            data = hoje - datetime.timedelta(seconds=aleatorio.randrange(DIAS_DE_VENDAS * 86_400))
+            yield (id_produto, unidades, data.strftime("%Y-%m-%d %H:%M:%S"), unidades * 10.0)
+
+    with BancoDeDados(caminho, tamanho_pool=1) as bd:
+        bd.criar_tabelas()
+        with bd.transacao("IMMEDIATE") as conexao:
+            conexao.executemany(
+                "INSERT INTO Produtos (Nome, Descricao, Preco, Quantidade) VALUES (?, ?, ?, ?)",
+                linhas_produtos(),
+            )
+        restantes = vendas
+        while restantes > 0:
+            lote = min(tamanho_lote, restantes)
+            with bd.transacao("IMMEDIATE") as conexao:
+                conexao.executemany(
+                    "INSERT INTO Vendas (id_produto, Quantidade_vendida, data_venda, valor_total) VALUES (?, ?, ?, ?)",
+                    linhas_vendas(lote),
+                )
+            restantes -= lote
+        bd.reconstruir_resumo_vendas()
+        with bd.conexao() as conexao:
+            conexao.execute("ANALYZE")
+
+
+def obter_banco_sintetico(pasta, nome, produtos, vendas):
+    """Devolve o caminho do banco sintético, gerando-o só se ainda não existir na pasta."""
+    caminho = os.path.join(pasta, f"sintetico_{produtos}_{vendas}.sqlite")
+    if not os.path.exists(caminho):
+        print(f"[{nome}] gerando {produtos} produtos e {vendas} vendas...", file=sys.stderr)
+        inicio = time.perf_counter()
+        provisorio = caminho + ".gerando"
+        if os.path.exists(provisorio):
+            os.remove(provisorio)
+        gerar_banco_sintetico(provisorio, produtos, vendas)
+        os.replace(provisorio, caminho)
+        print(f"[{nome}] gerado em {time.perf_counter() - inicio:.1f}s", file=sys.stderr)
+    return caminho
+
+
+def medir_conjunto(caminho, produtos, operacoes, semente=7):
+    """Mede cada operação de Produto e Venda numa cópia de trabalho do banco."""
+    aleatorio = random.Random(semente)
+    ids = [aleatorio.randint(1, produtos) for _ in range(operacoes)]
+    # repetições menores para as operações que percorrem muitas linhas
+    poucas = max(3, operacoes // 100)
+    resultados = {}
+    with sqlite3.connect(caminho) as conexao:
+        ultimo_id_venda = conexao.execute("SELECT MAX(id_venda) FROM Vendas").fetchone()[0] or 1
+    conexao.close()
+    inicios_venda = [aleatorio.randint(0, ultimo_id_venda) for _ in range(operacoes)]
+
+    with Produto(caminho) as produto, Venda(caminho) as venda:
+        casos = {
+            "Produto.cadastrar": (
+                lambda i: produto.cadastrar(f"benchmark {i}", "produto de benchmark", 9.9, 10), operacoes),
+            "Produto.buscar_por_id": (lambda i: produto.buscar_por_id(ids[i]), operacoes),
+            "Produto.ajustar_quantidade": (lambda i: produto.ajustar_quantidade(ids[i], 1), operacoes),
+            "Produto.listar_pagina": (lambda i: produto.listar(ids[i], 50), operacoes),
+            "Produto.listar_tudo": (lambda i: sum(len(lote) for lote in produto.iterar(1000)), poucas),
+            "Venda.registrar_venda": (lambda i: venda.registrar_venda(ids[i], 1), operacoes),
+            "Venda.historico_pagina": (
+                lambda i: venda.historico(inicios_venda[i], 50), operacoes),
+            "Venda.historico_produto": (lambda i: venda.historico(None, 50, id_produto=ids[i]), operacoes),
+            "Venda.historico_tudo": (lambda i: sum(len(lote) for lote in venda.iterar(5000)), poucas),
+        }
+        for nome, (funcao, repeticoes) in casos.items():
+            resultados[nome] = resumir(medir(funcao, repeticoes))
+    return resultados
+
+
+def executar_suite(conjuntos, operacoes, pasta):
+    resultado = {
+        "versao": VERSAO_RESULTADO,
+        "gerado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+        "ambiente": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "plataforma": platform.platform(),
+            "processador": platform.processor() or platform.machine(),
+        },
+        "operacoes": operacoes,
+        "conjuntos": {},
+    }
+    with tempfile.TemporaryDirectory() as trabalho:
+        for nome, (produtos, vendas) in conjuntos:
+            base = obter_banco_sintetico(pasta, nome, produtos, vendas)
+            copia = os.path.join(trabalho, f"{nome}.sqlite")
+            shutil.copyfile(base, copia)
+            print(f"[{nome}] medindo...", file=sys.stderr)
+            resultado["conjuntos"][nome] = {
+                "produtos": produtos,
+                "vendas": vendas,
+                "resultados": medir_conjunto(copia, produtos, operacoes),
+            }
+            os.remove(copia)
+    return resultado
+
+
+def imprimir_suite(resultado):
+    print(f"{'conjunto':<14}{'operação':<28}{'p50 (µs)':>11}{'p95 (µs)':>11}{'p99 (µs)':>11}{'ops/s':>12}")
+    for nome, conjunto in resultado["conjuntos"].items():
+        for operacao, r in conjunto["resultados"].items():
+            print(f"{nome:<14}{operacao:<28}{r['p50_us']:>11.1f}{r['p95_us']:>11.1f}"
+                  f"{r['p99_us']:>11.1f}{r['ops_por_segundo']:>12.1f}")
+
+
+# ---------------------------------------------------------------------------
+# comparar: detecção de regressões entre duas execuções
+# ---------------------------------------------------------------------------
+
+def comparar_resultados(base, atual, limite=0.10, metrica="p50_us"):
+    """
+    Compara as operações presentes nos dois resultados.
+    Devolve (linhas, regressoes); uma regressão é uma piora relativa maior que `limite`.
+    """
+    linhas = []
+    regressoes = []
+    for nome, conjunto in atual["conjuntos"].items():
+        anteriores = base["conjuntos"].get(nome, {}).get("resultados", {})
+        for operacao, r in conjunto["resultados"].items():
+            if operacao not in anteriores:
+                continue
+            antes, depois = anteriores[operacao][metrica], r[metrica]
+            variacao = (depois - antes) / antes if antes else 0.0
+            linha = (nome, operacao, antes, depois, variacao)
+            linhas.append(linha)
+            if variacao > limite:
+                regressoes.append(linha)
+    return linhas, regressoes
+
+
+# ---------------------------------------------------------------------------
+# pool: camada atual sem pool (tamanho 0) x pool de conexões
+# ---------------------------------------------------------------------------
+
+def comparar_pool(operacoes, produtos):
+    """
+    Mede as operações mais usadas com o BancoDeDados atual sem pool
+    (tamanho_pool=0, uma conexão por chamada) e com o pool. Isola o ganho do
+    pool; não é uma comparação com a implementação original, que além de
+    abrir uma conexão por chamada também não tinha os índices e transações atuais.
+    """
+    resultados = {}
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "benchmark.sqlite")
+        preparar_banco(caminho, produtos)
+
+        for rotulo, tamanho_pool in (("sem_pool", 0), ("pool", 5)):
+            with BancoDeDados(caminho, tamanho_pool=tamanho_pool) as bd:
+                casos = {
+                    "produto_existe": lambda i: bd.produto_existe(f"produto {i % produtos}"),
+                    "registrar_venda": lambda i: bd.registrar_venda(i % produtos + 1, 1, 10.0),
+                    "listar_produtos": lambda i: bd.listar_produtos(),
+                }
+                for nome, funcao in casos.items():
+                    repeticoes = operacoes if nome != "listar_produtos" else max(1, operacoes // 10)
+                    resultados.setdefault(nome, {})[rotulo] = resumir(medir(funcao, repeticoes))
+    return resultados
+
+
+# ---------------------------------------------------------------------------
+# concorrencia: vários terminais gravando vendas no mesmo arquivo
+# ---------------------------------------------------------------------------
+
+def _terminal(caminho, vendas, produtos, concorrente, tempo_ocupado, semente, resultados):
+    """Processo que simula um caixa: registra `vendas` vendas de 1 unidade."""
+    aleatorio = random.Random(semente)
+    registradas = falhas = 0
+    tempos = []
+    with BancoDeDados(caminho, tamanho_pool=1, concorrente=concorrente, tempo_ocupado=tempo_ocupado) as bd:
+        inicio = time.time()
+        for _ in range(vendas):
+            comeco = time.perf_counter()
+            try:
+                bd.registrar_venda_atomica(aleatorio.randint(1, produtos), 1)
+                registradas += 1
+            except (sqlite3.Error, ValueError):
+                # falha informada ao chamador (não é uma venda perdida)
+                falhas += 1
+            tempos.append((time.perf_counter() - comeco) * 1_000_000)
+        fim = time.time()
+    resultados.put({"registradas": registradas, "falhas": falhas, "inicio": inicio, "fim": fim, "tempos": tempos})
+
+
+def _terminal_http(url, vendas, produtos, semente, resultados):
+    """Caixa que registra `vendas` vendas de 1 unidade pelo servidor HTTP."""
+    aleatorio = random.Random(semente)
+    registradas = falhas = 0
+    tempos = []
+    cliente = ClienteHTTP(url)
+    venda = VendaRemota(cliente)
+    inicio = time.time()
+    for _ in range(vendas):
+        comeco = time.perf_counter()
+        if venda.registrar_venda(aleatorio.randint(1, produtos), 1).endswith("sucesso"):
+            registradas += 1
+        else:
+            falhas += 1
+        tempos.append((time.perf_counter() - comeco) * 1_000_000)
+    fim = time.time()
+    cliente.fechar()
+    resultados.put({"registradas": registradas, "falhas": falhas, "inicio": inicio, "fim": fim, "tempos": tempos})
+
+
+def _processo_servidor(caminho, leitores, portas):
+    os.environ["ESTOQUE_CONCORRENTE"] = "1"
+    asyncio.run(servidor.servir(caminho, porta=0, leitores=leitores, pronto=lambda endereco: portas.put(endereco[1])))
+
+
+def teste_concorrencia(processos, vendas, produtos, concorrente=True, tempo_ocupado=10.0, pelo_servidor=False):
+    """
+    Inicia `processos` terminais vendendo ao mesmo tempo e confere o banco no final:
+    vendas gravadas == vendas confirmadas e estoque baixado == unidades vendidas.
+    Com pelo_servidor os terminais não abrem o arquivo: vendem por um único
+    processo servidor.py (WAL, escritor único com gravação em grupo).
+    """
+    estoque_inicial = 1_000_000_000
+    concorrente = concorrente or pelo_servidor
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "concorrencia.sqlite")
+        with BancoDeDados(caminho, concorrente=concorrente) as bd:
+            bd.criar_tabelas()
+            bd.upsert_produtos([(f"produto {i}", "carga de concorrência", 1.0, estoque_inicial) for i in range(produtos)])
+
+        contexto = multiprocessing.get_context("spawn")
+        resultados = contexto.Queue()
+        processo_servidor = None
+        if pelo_servidor:
+            portas = contexto.Queue()
+            processo_servidor = contexto.Process(target=_processo_servidor, args=(caminho, 4, portas))
+            processo_servidor.start()
+            url = f"http://127.0.0.1:{portas.get(timeout=60)}"
+            terminais = [
+                contexto.Process(target=_terminal_http, args=(url, vendas, produtos, semente, resultados))
+                for semente in range(processos)
+            ]
+        else:
+            terminais = [
+                contexto.Process(target=_terminal,
+                                 args=(caminho, vendas, produtos, concorrente, tempo_ocupado, semente, resultados))
+                for semente in range(processos)
+            ]
+        for terminal in terminais:
+            terminal.start()
+        parciais = [resultados.get() for _ in terminais]
+        for terminal in terminais:
+            terminal.join()
+        if processo_servidor is not None:
+            # toda venda confirmada já foi gravada antes da resposta
+            processo_servidor.terminate()
+            processo_servidor.join()
+
+        with BancoDeDados(caminho) as bd:
+            bd.criar_tabelas()
+            with bd.conexao() as conexao:
+                gravadas = conexao.execute("SELECT COUNT(*) FROM Vendas").fetchone()[0]
+                baixadas = conexao.execute(
+                    "SELECT ? * COUNT(*) - SUM(Quantidade) FROM Produtos", (estoque_inicial,)
+                ).fetchone()[0]
+            divergentes = bd.verificar_estoque()
+
+    registradas = sum(p["registradas"] for p in parciais)
+    segundos = max(p["fim"] for p in parciais) - min(p["inicio"] for p in parciais)
+    resumo = resumir([t for p in parciais for t in p["tempos"]])
+    return {
+        "processos": processos,
+        "modo": "servidor" if pelo_servidor else "wal" if concorrente else "journal",
+        "registradas": registradas,
+        "falhas_informadas": sum(p["falhas"] for p in parciais),
+        "gravadas_no_banco": gravadas,
+        "unidades_baixadas": baixadas,
+        "perdidas": registradas - gravadas,
+        "estoque_divergente": len(divergentes),
+        "segundos": segundos,
+        "vendas_por_segundo": registradas / segundos if segundos else 0.0,
+        "p50_us": resumo["p50_us"],
+        "p99_us": resumo["p99_us"],
+    }
+
+
+def comando_concorrencia(args):
+    # (concorrente, pelo servidor)
+    modos = [(True, False), (False, False)] if args.comparar else [(not args.sem_wal, False)]
+    if args.servidor:
+        modos.append((True, True))
+    problemas = 0
+    print(f"{'modo':<9}{'proc.':>6}{'vendas/s':>11}{'ok':>9}{'falhas':>8}{'perdidas':>10}{'p50 (µs)':>11}{'p99 (µs)':>12}")
+    for concorrente, pelo_servidor in modos:
+        for processos in args.processos:
+            r = teste_concorrencia(processos, args.vendas, args.produtos, concorrente, args.tempo_ocupado, pelo_servidor)
+            print(f"{r['modo']:<9}{processos:>6}{r['vendas_por_segundo']:>11.1f}{r['registradas']:>9}"
+                  f"{r['falhas_informadas']:>8}{r['perdidas']:>10}{r['p50_us']:>11.1f}{r['p99_us']:>12.1f}")
+            if r["perdidas"] or r["estoque_divergente"] or r["unidades_baixadas"] != r["registradas"]:
+                problemas += 1
+                print(f"  divergência: {r}")
+    return 1 if problemas else 0
+
+
+# ---------------------------------------------------------------------------
+# grupo: commit por venda x gravação em grupo (FilaDeVendas)
+# ---------------------------------------------------------------------------
+
+def teste_gravacao_em_grupo(threads, vendas, tamanho_lote, intervalo, produtos=50):
+    """
+    `threads` chamadores registram `vendas` vendas cada um; tamanho_lote None
+    usa um commit por venda. Confere que toda venda confirmada está gravada.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, "grupo.sqlite")
+        with BancoDeDados(caminho) as bd:
+            bd.criar_tabelas()
+            bd.upsert_produtos([(f"produto {i}", "carga de benchmark", 1.0, 1_000_000_000) for i in range(produtos)])
+
+        confirmadas = [0] * threads
+        with Venda(caminho, tamanho_pool=threads) as venda:
+            if tamanho_lote is not None:
+                venda.ativar_gravacao_em_grupo(tamanho_lote, intervalo)
+
+            def caixa(numero):
+                aleatorio = random.Random(numero)
+                for _ in range(vendas):
+                    if venda.registrar_venda(aleatorio.randint(1, produtos), 1).endswith("sucesso"):
+                        confirmadas[numero] += 1
+
+            trabalhadores = [threading.Thread(target=caixa, args=(numero,)) for numero in range(threads)]
+            inicio = time.perf_counter()
+            for trabalhador in trabalhadores:
+                trabalhador.start()
+            for trabalhador in trabalhadores:
+                trabalhador.join()
+            segundos = time.perf_counter() - inicio
+
+        with sqlite3.connect(caminho) as conexao:
+            gravadas = conexao.execute("SELECT COUNT(*) FROM Vendas").fetchone()[0]
+        conexao.close()
+    return {
+        "lote": tamanho_lote or 1,
+        "confirmadas": sum(confirmadas),
+        "gravadas": gravadas,
+        "segundos": segundos,
+        "vendas_por_segundo": sum(confirmadas) / segundos,
+    }
+
+
+def comando_grupo(args):
+    print(f"{'modo':<14}{'vendas/s':>11}{'confirmadas':>13}{'gravadas':>10}")
+    problemas = 0
+    for tamanho_lote in [None] + args.lotes:
+        r = teste_gravacao_em_grupo(args.threads, args.vendas, tamanho_lote, args.intervalo)
+        rotulo = "commit/venda" if tamanho_lote is None else f"grupo {tamanho_lote}"
+        print(f"{rotulo:<14}{r['vendas_por_segundo']:>11.1f}{r['confirmadas']:>13}{r['gravadas']:>10}")
+        if r["confirmadas"] != r["gravadas"]:
+            problemas += 1
+    return 1 if problemas else 0
+
+
+# ---------------------------------------------------------------------------
+# memoria: representação das linhas (dict x registro com __slots__)
+# ---------------------------------------------------------------------------
+
+def medir_memoria(carregar):
+    """Executa `carregar()` e devolve (objeto, bytes alocados que continuam vivos, segundos)."""
+    inicio = time.perf_counter()
+    carregar()
+    segundos = time.perf_counter() - inicio
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.get_traced_memory()[0]
+        objeto = carregar()
+        depois = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return objeto, depois - antes, segundos
+
+
+def comparar_memoria(caminho):
+    """
+    Carrega o catálogo inteiro nos dois formatos e devolve, para cada um, os
+    bytes por produto (linha + valores) e o tempo de carga.
+    """
+    with BancoDeDados(caminho, tamanho_pool=1) as bd:
+        def como_dict():
+            # o que listar_produtos fazia antes: sqlite3.Row -> dict
+            with bd.conexao() as conexao:
+                return [dict(linha) for linha in conexao.execute("SELECT * FROM Produtos ORDER BY ID")]
+
+        resultados = {}
+        for rotulo, carregar in (("dict", como_dict), ("registro", bd.listar_produtos)):
+            produtos, alocados, segundos = medir_memoria(carregar)
+            resultados[rotulo] = {
+                "produtos": len(produtos),
+                "bytes_por_produto": alocados / len(produtos),
+                "bytes_da_linha": sys.getsizeof(produtos[0]),
+                "segundos": segundos,
+            }
+            del produtos
+    return resultados
+
+
+def comando_memoria(args):
+    os.makedirs(args.pasta, exist_ok=True)
+    caminho = obter_banco_sintetico(args.pasta, f"{args.produtos} produtos", args.produtos, 0)
+    resultados = comparar_memoria(caminho)
+    print(f"{'formato':<10}{'produtos':>10}{'bytes/produto':>15}{'só a linha':>12}{'carga (s)':>11}")
+    for rotulo, r in resultados.items():
+        print(f"{rotulo:<10}{r['produtos']:>10}{r['bytes_por_produto']:>15.1f}"
+              f"{r['bytes_da_linha']:>12}{r['segundos']:>11.2f}")
+    economia = 1 - resultados["registro"]["bytes_por_produto"] / resultados["dict"]["bytes_por_produto"]
+    print(f"o registro usa {economia:.0%} menos memória por produto")
+    return 0
+
+
+def comando_suite(args):
+    os.makedirs(args.pasta, exist_ok=True)
+    resultado = executar_suite(args.conjuntos, args.operacoes, args.pasta)
+    imprimir_suite(resultado)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+        print(f"resultado gravado em {args.saida}")
+    return 0
+
+
+def comando_comparar(args):
+    with open(args.base, encoding="utf-8") as arquivo:
+        base = json.load(arquivo)
+    with open(args.atual, encoding="utf-8") as arquivo:
+        atual = json.load(arquivo)
+
+    linhas, regressoes = comparar_resultados(base, atual, args.limite, args.metrica)
+    print(f"{'conjunto':<14}{'operação':<28}{'antes':>11}{'depois':>11}{'variação':>10}")
+    for nome, operacao, antes, depois, variacao in linhas:
+        marca = "  <-- regressão" if variacao > args.limite else ""
+        print(f"{nome:<14}{operacao:<28}{antes:>11.1f}{depois:>11.1f}{variacao:>+10.1%}{marca}")
+    if regressoes:
+        print(f"{len(regressoes)} operação(ões) pioraram mais de {args.limite:.0%} em {args.metrica}")
+        return 1
+    print(f"nenhuma regressão acima de {args.limite:.0%} em {args.metrica}")
+    return 0
+
+
+def comando_pool(args):
+    resultados = comparar_pool(args.operacoes, args.produtos)
+    print(f"{'operação':<18}{'modo':<14}{'média (µs)':>12}{'p50 (µs)':>12}{'p95 (µs)':>12}")
+    for nome, modos in resultados.items():
+        for rotulo, r in modos.items():
+            print(f"{nome:<18}{rotulo:<14}{r['media_us']:>12.1f}{r['p50_us']:>12.1f}{r['p95_us']:>12.1f}")
+        ganho = modos["sem_pool"]["media_us"] / modos["pool"]["media_us"]
+        print(f"{'':<18}{'ganho':<14}{ganho:>11.1f}x")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do Sistema de Gerenciamento de Estoque")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    suite = subcomandos.add_parser("suite", help="mede as operações de Produto e Venda em bancos sintéticos")
+    suite.add_argument("--conjuntos", default="1k,100k",
+                       type=lambda texto: [ler_conjunto(parte) for parte in texto.split(",")],
+                       help=f"conjuntos separados por vírgula: {', '.join(CONJUNTOS)} ou produtos:vendas")
+    suite.add_argument("--operacoes", type=int, default=1000, help="repetições por operação")
+    suite.add_argument("--pasta", default=os.path.join(tempfile.gettempdir(), "estoque-benchmark"),
+                       help="pasta onde os bancos sintéticos são gerados e reaproveitados")
+    suite.add_argument("--saida", default=None, help="arquivo JSON para gravar o resultado")
+    suite.set_defaults(funcao=comando_suite)
+
+    comparar = subcomandos.add_parser("comparar", help="compara dois resultados JSON da suite")
+    comparar.add_argument("base", help="resultado de referência")
+    comparar.add_argument("atual", help="resultado a verificar")
+    comparar.add_argument("--limite", type=float, default=0.10, help="piora relativa tolerada (0.10 = 10%%)")
+    comparar.add_argument("--metrica", default="p50_us", choices=["media_us", "p50_us", "p95_us", "p99_us"])
+    comparar.set_defaults(funcao=comando_comparar)
+
+    pool = subcomandos.add_parser("pool", help="compara a camada de dados sem pool (tamanho 0) com o pool de conexões")
+    pool.add_argument("--operacoes", type=int, default=2000, help="repetições por operação")
+    pool.add_argument("--produtos", type=int, default=500, help="produtos na carga inicial")
+    pool.set_defaults(funcao=comando_pool)
+
+    concorrencia = subcomandos.add_parser("concorrencia", help="vários processos vendendo no mesmo banco")
+    concorrencia.add_argument("--processos", default="1,2,4,8",
+                              type=lambda texto: [int(parte) for parte in texto.split(",")],
+                              help="quantidades de processos (terminais) separadas por vírgula")
+    concorrencia.add_argument("--vendas", type=int, default=300, help="vendas por processo")
+    concorrencia.add_argument("--produtos", type=int, default=50, help="produtos disputados pelos terminais")
+    concorrencia.add_argument("--tempo-ocupado", type=float, default=10.0, help="busy timeout em segundos")
+    concorrencia.add_argument("--sem-wal", action="store_true", help="usa o journal padrão em vez do WAL")
+    concorrencia.add_argument("--comparar", action="store_true", help="executa com e sem WAL")
+    concorrencia.add_argument("--servidor", action="store_true",
+                              help="executa também com os terminais vendendo pelo servidor HTTP")
+    concorrencia.set_defaults(funcao=comando_concorrencia)
+
+    grupo = subcomandos.add_parser("grupo", help="vazão de vendas com e sem gravação em grupo")
+    grupo.add_argument("--threads", type=int, default=256, help="chamadores registrando vendas ao mesmo tempo")
+    grupo.add_argument("--vendas", type=int, default=20, help="vendas por chamador")
+    grupo.add_argument("--lotes", default="1,20,200",
+                       type=lambda texto: [int(parte) for parte in texto.split(",")],
+                       help="tamanhos máximos de lote a comparar")
+    grupo.add_argument("--intervalo", type=float, default=0.05, help="espera máxima (s) para completar um lote")
+    grupo.set_defaults(funcao=comando_grupo)
+
+    memoria = subcomandos.add_parser("memoria", help="bytes por produto: dict por linha x ProdutoRegistro")
+    memoria.add_argument("--produtos", type=int, default=1_000_000, help="produtos no catálogo carregado")
+    memoria.add_argument("--pasta", default=os.path.join(tempfile.gettempdir(), "estoque-benchmark"),
+                         help="pasta dos bancos sintéticos (reaproveitados entre execuções)")
+    memoria.set_defaults(funcao=comando_memoria)
+
+    args = parser.parse_args(argv)
+    return args.funcao(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
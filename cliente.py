@@ -0,0 +1,366 @@
+"""
+cliente.py — Cliente do servidor HTTP/JSON de estoque (servidor.py).
+
+ProdutoRemoto e VendaRemota têm os mesmos métodos (e devolvem as mesmas
+mensagens e registros) que Produto e Venda, mas cada chamada vira uma
+requisição ao servidor; ProdutoRemotoAsync e VendaRemotaAsync são as
+versões para o laço de eventos da interface. Assim um caixa pode trocar o
+acesso direto ao arquivo SQLite pelo servidor sem mudar a tela:
+
+    cliente = ClienteHTTP("http://192.168.0.10:8765")
+    produto = ProdutoRemotoAsync(cliente, executor=executor, alertas=alertas)
+    venda = VendaRemotaAsync(cliente, executor=executor, alertas=alertas)
+
+Usa só a biblioteca padrão: um HTTP/1.1 mínimo sobre socket (o necessário
+para o servidor de estoque: corpo com Content-Length, sem chunked), com uma
+conexão keep-alive por thread. Custa bem menos CPU por requisição que
+http.client, que monta e interpreta os cabeçalhos com email.parser.
+Falhas de comunicação seguem o padrão da camada de negócio: escritas
+devolvem "erro: ..." e leituras devolvem lista vazia ou None (e registram o
+erro no log).
+"""
+
+import json
+import logging
+import socket
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from negocio import AlertasEstoque, EstoqueAsync, ProdutoAsync, VendaAsync
+from registros import HistoricoVendaRegistro, ProdutoRegistro, VendaRegistro
+
+# conexões paradas há mais tempo que isto (s) são reabertas antes de usar
+# (o servidor fecha as ociosas depois de servidor.TEMPO_OCIOSO)
+TEMPO_REUSO = 240.0
+# espera pedida ao servidor em cada consulta de alertas (long polling)
+ESPERA_ALERTAS = 25.0
+
+
+class ErroServidor(Exception):
+    """Falha de comunicação ou resposta de erro do servidor (status HTTP em `status`)."""
+
+    def __init__(self, mensagem, status=None):
+        super().__init__(mensagem)
+        self.status = status
+
+
+class _ConexaoHTTP:
+    """Uma conexão keep-alive com o servidor; não é segura entre threads."""
+
+    def __init__(self, host: str, porta: int, tempo_limite: float):
+        self.host = host
+        self.porta = porta
+        self._socket = socket.create_connection((host, porta), tempo_limite)
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._buffer = b""
+
+    def _receber(self) -> None:
+        dados = self._socket.recv(65536)
+        if not dados:
+            raise ConnectionError("conexão fechada pelo servidor")
+        self._buffer += dados
+
+    # envia a requisição e devolve (status, cabeçalhos em minúsculas, corpo)
+    def requisitar(self, metodo: str, caminho: str, corpo: Optional[bytes]) -> Tuple[int, Dict[str, str], bytes]:
+        linhas = [f"{metodo} {caminho} HTTP/1.1", f"Host: {self.host}:{self.porta}"]
+        if corpo is not None:
+            linhas.append("Content-Type: application/json")
+        linhas.append(f"Content-Length: {len(corpo or b'')}")
+        self._socket.sendall(("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + (corpo or b""))
+
+        fim = self._buffer.find(b"\r\n\r\n")
+        while fim < 0:
+            self._receber()
+            fim = self._buffer.find(b"\r\n\r\n")
+        cabecalho = self._buffer[:fim].decode("latin-1").split("\r\n")
+        status = int(cabecalho[0].split(None, 2)[1])
+        cabecalhos = {}
+        for linha in cabecalho[1:]:
+            nome, _, valor = linha.partition(":")
+            cabecalhos[nome.strip().lower()] = valor.strip()
+        tamanho = int(cabecalhos.get("content-length", 0))
+        inicio = fim + 4
+        while len(self._buffer) < inicio + tamanho:
+            self._receber()
+        conteudo = self._buffer[inicio:inicio + tamanho]
+        self._buffer = self._buffer[inicio + tamanho:]
+        return status, cabecalhos, conteudo
+
+    def close(self) -> None:
+        try:
+            self._socket.close()
+        except OSError:
+            pass
+
+
+class ClienteHTTP:
+    def __init__(self, url: str, tempo_limite: float = 30.0):
+        partes = urllib.parse.urlsplit(url if "://" in url else "http://" + url)
+        self.host = partes.hostname or "127.0.0.1"
+        self.porta = partes.port or 80
+        self.tempo_limite = tempo_limite
+        self._local = threading.local()
+        self._conexoes = []
+        self._trava = threading.Lock()
+        self._acompanhando = set()
+        self._fechado = threading.Event()
+
+    def _conexao(self) -> _ConexaoHTTP:
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is not None and time.monotonic() - self._local.usada_em > TEMPO_REUSO:
+            self._descartar_conexao()
+            conexao = None
+        if conexao is None:
+            # o long polling de alertas espera mais que uma requisição comum
+            conexao = _ConexaoHTTP(self.host, self.porta, self.tempo_limite + ESPERA_ALERTAS)
+            self._local.conexao = conexao
+            with self._trava:
+                self._conexoes.append(conexao)
+        self._local.usada_em = time.monotonic()
+        return conexao
+
+    # fecha a conexão desta thread e a tira da lista (uma nova é aberta na
+    # próxima requisição)
+    def _descartar_conexao(self):
+        conexao = getattr(self._local, "conexao", None)
+        if conexao is not None:
+            conexao.close()
+            self._local.conexao = None
+            with self._trava:
+                try:
+                    self._conexoes.remove(conexao)
+                except ValueError:
+                    # fechar() já a tirou da lista
+                    pass
+
+    def requisitar(self, metodo: str, caminho: str, dados: Optional[Dict] = None,
+                   consulta: Optional[Dict] = None) -> Tuple[int, Dict]:
+        """Envia a requisição e devolve (status, corpo JSON); falhas de rede viram ErroServidor."""
+        if consulta:
+            parametros = {chave: valor for chave, valor in consulta.items() if valor is not None}
+            if parametros:
+                caminho += "?" + urllib.parse.urlencode(parametros)
+        corpo = None if dados is None else json.dumps(dados, ensure_ascii=False).encode("utf-8")
+        # leituras podem ser repetidas com segurança se a conexão reaproveitada
+        # tiver sido fechada; escritas nunca são reenviadas
+        tentativas = 2 if metodo == "GET" else 1
+        for tentativa in range(tentativas):
+            try:
+                status, cabecalhos, conteudo = self._conexao().requisitar(metodo, caminho, corpo)
+                if cabecalhos.get("connection", "").lower() == "close":
+                    self._descartar_conexao()
+                return status, json.loads(conteudo) if conteudo else {}
+            except (OSError, ValueError, IndexError) as e:
+                self._descartar_conexao()
+                if tentativa + 1 == tentativas:
+                    raise ErroServidor(f"falha de comunicação com o servidor: {e}") from e
+
+    # como requisitar, mas status diferente de 200 vira ErroServidor
+    def obter(self, metodo: str, caminho: str, dados: Optional[Dict] = None,
+              consulta: Optional[Dict] = None) -> Dict:
+        status, resposta = self.requisitar(metodo, caminho, dados, consulta)
+        if status != 200:
+            raise ErroServidor(resposta.get("erro", f"HTTP {status}"), status)
+        return resposta
+
+    # repassa a `alertas` os alertas de estoque mínimo publicados no servidor
+    # (uma thread por canal, que fica consultando GET /alertas)
+    def acompanhar_alertas(self, alertas: AlertasEstoque) -> None:
+        with self._trava:
+            if id(alertas) in self._acompanhando:
+                return
+            self._acompanhando.add(id(alertas))
+        threading.Thread(target=self._consultar_alertas, args=(alertas,), name="alertas-servidor", daemon=True).start()
+
+    def _consultar_alertas(self, alertas: AlertasEstoque) -> None:
+        ultimo = None
+        while not self._fechado.is_set():
+            try:
+                resposta = self.obter("GET", "/alertas", consulta={
+                    "apos": ultimo, "espera": None if ultimo is None else ESPERA_ALERTAS})
+            except ErroServidor as e:
+                logging.warning(f"Alertas do servidor indisponíveis: {e}")
+                self._fechado.wait(2.0)
+                continue
+            # se o servidor reiniciou, a numeração recomeça
+            if ultimo is not None and resposta["ultimo"] >= ultimo:
+                for alerta in resposta["alertas"]:
+                    alertas.publicar(alerta)
+            ultimo = resposta["ultimo"]
+
+    def fechar(self) -> None:
+        self._fechado.set()
+        with self._trava:
+            conexoes, self._conexoes = self._conexoes, []
+        for conexao in conexoes:
+            conexao.close()
+
+
+class _Remoto:
+    def __init__(self, cliente: ClienteHTTP, alertas: Optional[AlertasEstoque] = None):
+        self.cliente = cliente
+        self.alertas = alertas
+        if alertas is not None:
+            cliente.acompanhar_alertas(alertas)
+
+    # escrita: devolve a mensagem do servidor ou "erro: ..." se não houver resposta
+    def _escrever(self, metodo: str, caminho: str, dados: Optional[Dict] = None, acao: str = "gravar") -> str:
+        try:
+            return self.cliente.obter(metodo, caminho, dados)["resultado"]
+        except ErroServidor as e:
+            logging.error(f"Erro ao {acao} no servidor: {e}")
+            if e.status == 400:
+                return f"erro: {e}"
+            return f"erro: falha ao {acao} (servidor indisponível)"
+
+    def _ler(self, caminho: str, registro, consulta: Optional[Dict] = None, padrao: Any = None):
+        try:
+            dados = self.cliente.obter("GET", caminho, consulta=consulta)["dados"]
+        except ErroServidor as e:
+            if e.status != 404:
+                logging.error(f"Erro ao consultar {caminho} no servidor: {e}")
+            return padrao
+        if isinstance(dados, list):
+            return [registro(**linha) for linha in dados]
+        return registro(**dados)
+
+    # operação que o servidor não oferece: devolve o erro no mesmo formato
+    # das outras escritas (em vez de AttributeError ao chamar o método)
+    @staticmethod
+    def _indisponivel(acao: str, alternativa: str = "") -> str:
+        return f"erro: {acao} não está disponível no modo servidor" + (f"; {alternativa}" if alternativa else "")
+
+    # conexões pertencem ao ClienteHTTP, que pode ser compartilhado
+    def fechar(self):
+        pass
+
+
+class ProdutoRemoto(_Remoto):
+    def cadastrar(self, nome: str, descricao: str, preco: float, quantidade: int, estoque_minimo: int = 0,
+                  codigo_barras: Optional[str] = None) -> str:
+        return self._escrever("POST", "/produtos", {
+            "nome": nome, "descricao": descricao, "preco": preco,
+            "quantidade": quantidade, "estoque_minimo": estoque_minimo, "codigo_barras": codigo_barras,
+        }, "cadastrar produto")
+
+    def listar(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[ProdutoRegistro]:
+        return self._ler("/produtos", ProdutoRegistro, {"apos_id": apos_id, "limite": limite}, [])
+
+    # percorre o catálogo em páginas de `tamanho_lote` (paginação por chave)
+    def iterar(self, tamanho_lote: int = 500, apos_id: Optional[int] = None) -> Iterator[List[ProdutoRegistro]]:
+        while True:
+            lote = self.listar(apos_id, tamanho_lote)
+            if not lote:
+                return
+            yield lote
+            apos_id = lote[-1].ID
+
+    def buscar_por_id(self, id_produto: int) -> Optional[ProdutoRegistro]:
+        return self._ler(f"/produtos/{int(id_produto)}", ProdutoRegistro)
+
+    def buscar_por_nome(self, nome: str) -> Optional[ProdutoRegistro]:
+        nome = nome.strip()
+        if not nome:
+            return None
+        return self._ler("/produtos/nome/" + urllib.parse.quote(nome, safe=""), ProdutoRegistro)
+
+    def buscar(self, texto: str, limite: int = 20) -> List[ProdutoRegistro]:
+        return self._ler("/produtos/busca", ProdutoRegistro, {"texto": texto, "limite": limite}, [])
+
+    def sugerir(self, texto: str, limite: int = 10) -> List[ProdutoRegistro]:
+        return self._ler("/produtos/sugestoes", ProdutoRegistro, {"texto": texto, "limite": limite}, [])
+
+    def atualizar(self, id_produto: int, nome: str, descricao: str, preco: float, quantidade: int) -> str:
+        return self._escrever("PUT", f"/produtos/{int(id_produto)}", {
+            "nome": nome, "descricao": descricao, "preco": preco, "quantidade": quantidade,
+        }, "atualizar produto")
+
+    def ajustar_quantidade(self, id_produto: int, delta: int) -> str:
+        return self._escrever("POST", f"/produtos/{int(id_produto)}/ajuste", {"delta": delta}, "ajustar quantidade")
+
+    def repor(self, id_produto: int, quantidade: int) -> str:
+        return self._escrever("POST", f"/produtos/{int(id_produto)}/reposicao", {"quantidade": quantidade},
+                              "repor estoque")
+
+    def definir_estoque_minimo(self, id_produto: int, estoque_minimo: int) -> str:
+        return self._escrever("PUT", f"/produtos/{int(id_produto)}/estoque-minimo",
+                              {"estoque_minimo": estoque_minimo}, "definir estoque mínimo")
+
+    def definir_codigo_barras(self, id_produto: int, codigo_barras: Optional[str]) -> str:
+        return self._escrever("PUT", f"/produtos/{int(id_produto)}/codigo-barras",
+                              {"codigo_barras": codigo_barras}, "definir código de barras")
+
+    def produtos_em_falta(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[ProdutoRegistro]:
+        return self._ler("/produtos/em-falta", ProdutoRegistro, {"apos_id": apos_id, "limite": limite}, [])
+
+    def remover(self, id_produto: int) -> str:
+        return self._escrever("DELETE", f"/produtos/{int(id_produto)}", acao="remover produto")
+
+    # importação e exportação leem/gravam arquivos: rodam onde está o banco
+    def importar(self, caminho: str, tamanho_lote: int = 1000, arquivo_rejeitados: Optional[str] = None) -> str:
+        return self._indisponivel("importar produtos", "use ferramentas.py na máquina do servidor")
+
+    def exportar(self, caminho: str, tamanho_lote: int = 5000) -> str:
+        return self._indisponivel("exportar produtos", "use ferramentas.py na máquina do servidor")
+
+
+class VendaRemota(_Remoto):
+    # o servidor já grava as vendas em grupo; o caixa envia uma a uma
+    def gravando_em_grupo(self) -> bool:
+        return False
+
+    def registrar_venda(self, id_produto: int, quantidade_vendida: int, valor_total: Optional[float] = None) -> str:
+        return self._escrever("POST", "/vendas", {
+            "id_produto": id_produto, "quantidade_vendida": quantidade_vendida, "valor_total": valor_total,
+        }, "registrar venda")
+
+    def registrar_carrinho(self, itens: List[Tuple[int, int]]) -> str:
+        return self._escrever("POST", "/carrinhos", {"itens": [list(item) for item in itens]}, "registrar carrinho")
+
+    def listar(self, apos_id: Optional[int] = None, limite: Optional[int] = None,
+               data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+               id_produto: Optional[int] = None) -> List[VendaRegistro]:
+        return self._ler("/vendas", VendaRegistro, {
+            "apos_id": apos_id, "limite": limite, "data_inicio": data_inicio,
+            "data_fim": data_fim, "id_produto": id_produto,
+        }, [])
+
+    def historico(self, apos_id: Optional[int] = None, limite: Optional[int] = None,
+                  data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                  id_produto: Optional[int] = None) -> List[HistoricoVendaRegistro]:
+        return self._ler("/vendas/historico", HistoricoVendaRegistro, {
+            "apos_id": apos_id, "limite": limite, "data_inicio": data_inicio,
+            "data_fim": data_fim, "id_produto": id_produto,
+        }, [])
+
+    def estornar_venda(self, id_venda: int) -> str:
+        return self._escrever("POST", f"/vendas/{int(id_venda)}/estorno", acao="estornar venda")
+
+    def exportar(self, caminho: str, data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                 com_nomes: bool = True, tamanho_lote: int = 5000) -> str:
+        return self._indisponivel("exportar vendas", "use ferramentas.py na máquina do servidor")
+
+    # pelo servidor uma venda só é desfeita com estorno (que devolve o estoque)
+    def remover_venda(self, id_venda: int) -> str:
+        return self._indisponivel("remover venda", "use o estorno")
+
+    def atualizar_venda(self, id_venda: int, id_produto: int, quantidade_vendida: int, valor_total: float) -> str:
+        return self._indisponivel("alterar venda", "estorne e registre de novo")
+
+
+# Versões async: os mesmos métodos de ProdutoAsync/VendaAsync, executados nas
+# threads do executor (cada uma com sua conexão HTTP)
+
+class ProdutoRemotoAsync(ProdutoAsync):
+    def __init__(self, cliente: ClienteHTTP, max_workers: int = 4,
+                 executor: Optional[ThreadPoolExecutor] = None, alertas: Optional[AlertasEstoque] = None):
+        EstoqueAsync.__init__(self, ProdutoRemoto(cliente, alertas), executor, max_workers)
+
+
+class VendaRemotaAsync(VendaAsync):
+    def __init__(self, cliente: ClienteHTTP, max_workers: int = 4,
+                 executor: Optional[ThreadPoolExecutor] = None, alertas: Optional[AlertasEstoque] = None):
+        EstoqueAsync.__init__(self, VendaRemota(cliente, alertas), executor, max_workers)
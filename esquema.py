@@ -0,0 +1,330 @@
+"""
+esquema.py — Versões do esquema do banco de dados.
+
+A versão de cada arquivo fica em `PRAGMA user_version`. As migrações são
+aplicadas em ordem, uma única vez por arquivo, todas na mesma transação
+(BEGIN IMMEDIATE): ou o banco passa para a última versão, ou nada muda.
+Dentro do processo, um arquivo já verificado não é consultado de novo, então
+criar objetos Produto/Venda não executa nenhum comando no banco.
+
+Para alterar o esquema, acrescente uma função ao final de MIGRACOES;
+nunca altere uma migração já publicada.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+
+
+# ---------- migrações ----------
+# os comandos usam IF NOT EXISTS porque bancos anteriores ao controle de
+# versão (user_version = 0) já podem ter parte dessas tabelas
+
+def _v1_tabelas(conexao):
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS Produtos (
+            ID INTEGER PRIMARY KEY AUTOINCREMENT,
+            Nome TEXT NOT NULL,
+            Descricao TEXT NOT NULL,
+            Preco REAL NOT NULL CHECK (Preco >= 0),
+            Quantidade INTEGER NOT NULL CHECK (Quantidade >= 0)
+        )
+        """)
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS Vendas (
+            id_venda INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_produto INTEGER,
+            Quantidade_vendida INTEGER NOT NULL CHECK (Quantidade_vendida >= 0),
+            data_venda DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            valor_total REAL NOT NULL CHECK (valor_total >= 0),
+            FOREIGN KEY (id_produto) REFERENCES Produtos(ID)
+        )
+        """)
+
+
+# índice único em Nome: garante a regra de nomes sem duplicidade
+# e permite buscar um produto pelo nome sem varrer a tabela
+def _v2_indice_nomes(conexao):
+    _renomear_nomes_repetidos(conexao)
+    conexao.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_produtos_nome ON Produtos (Nome)")
+
+
+# antes do índice a regra só era conferida em Python, sem trava, então um banco
+# antigo pode ter nomes repetidos: o produto de menor ID mantém o nome e as
+# cópias viram "Nome (ID n)" (as vendas continuam ligadas ao mesmo ID)
+def _renomear_nomes_repetidos(conexao):
+    repetidos = conexao.execute("""
+        SELECT ID, Nome FROM (
+            SELECT ID, Nome, ROW_NUMBER() OVER (PARTITION BY Nome ORDER BY ID) AS ordem FROM Produtos
+        )
+        WHERE ordem > 1
+        ORDER BY ID
+        """).fetchall()
+    for id_produto, nome in repetidos:
+        novo = f"{nome} (ID {id_produto})"
+        while conexao.execute("SELECT 1 FROM Produtos WHERE Nome = ?", (novo,)).fetchone() is not None:
+            novo += "'"
+        conexao.execute("UPDATE Produtos SET Nome = ? WHERE ID = ?", (novo, id_produto))
+        logging.warning(f"Produto {id_produto} tinha o nome repetido '{nome}' e foi renomeado para '{novo}'.")
+
+
+# índices usados pelo histórico de vendas (junção com Produtos e filtro por data)
+def _v3_indices_vendas(conexao):
+    conexao.execute("CREATE INDEX IF NOT EXISTS idx_vendas_produto ON Vendas (id_produto)")
+    conexao.execute("CREATE INDEX IF NOT EXISTS idx_vendas_data ON Vendas (data_venda)")
+
+
+# resumo de vendas por dia e por produto, usado pelos relatórios;
+# quando a tabela é criada num banco que já tem vendas, ela é preenchida
+def _v4_resumo_vendas(conexao):
+    existia = _existe(conexao, "table", "VendasDiarias")
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS VendasDiarias (
+            dia TEXT NOT NULL,
+            id_produto INTEGER NOT NULL,
+            unidades INTEGER NOT NULL DEFAULT 0,
+            receita REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, id_produto)
+        ) WITHOUT ROWID
+        """)
+    conexao.execute("CREATE INDEX IF NOT EXISTS idx_vendas_diarias_produto ON VendasDiarias (id_produto, dia)")
+    if not existia:
+        conexao.execute("""
+            INSERT INTO VendasDiarias (dia, id_produto, unidades, receita)
+            SELECT date(data_venda), id_produto, SUM(Quantidade_vendida), SUM(valor_total)
+            FROM Vendas
+            WHERE id_produto IS NOT NULL
+            GROUP BY date(data_venda), id_produto
+            """)
+
+
+# índice de texto completo (FTS5) sobre Nome e Descricao, mantido em
+# sincronia com Produtos por gatilhos; sem FTS5 a busca usa o prefixo do nome
+def _v5_indice_busca(conexao):
+    existia = _existe(conexao, "table", "ProdutosBusca")
+    try:
+        conexao.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS ProdutosBusca USING fts5(
+                Nome, Descricao,
+                content = 'Produtos', content_rowid = 'ID',
+                tokenize = 'unicode61 remove_diacritics 2'
+            )
+            """)
+    except sqlite3.OperationalError as e:
+        logging.warning(f"Busca de texto completo indisponivel, usando prefixo do nome: {e}")
+        return
+    conexao.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_produtos_busca_insert AFTER INSERT ON Produtos BEGIN
+            INSERT INTO ProdutosBusca (rowid, Nome, Descricao) VALUES (new.ID, new.Nome, new.Descricao);
+        END
+        """)
+    conexao.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_produtos_busca_delete AFTER DELETE ON Produtos BEGIN
+            INSERT INTO ProdutosBusca (ProdutosBusca, rowid, Nome, Descricao) VALUES ('delete', old.ID, old.Nome, old.Descricao);
+        END
+        """)
+    # só reindexa quando o texto muda (ajustes de quantidade não mexem no índice)
+    conexao.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_produtos_busca_update AFTER UPDATE OF Nome, Descricao ON Produtos BEGIN
+            INSERT INTO ProdutosBusca (ProdutosBusca, rowid, Nome, Descricao) VALUES ('delete', old.ID, old.Nome, old.Descricao);
+            INSERT INTO ProdutosBusca (rowid, Nome, Descricao) VALUES (new.ID, new.Nome, new.Descricao);
+        END
+        """)
+    if not existia:
+        # banco que já tinha produtos: indexa o catálogo existente
+        conexao.execute("INSERT INTO ProdutosBusca (ProdutosBusca) VALUES ('rebuild')")
+
+
+# livro de movimentos de estoque (só recebe inserções) e fotografias
+# periódicas do saldo; Produtos.Quantidade continua sendo o saldo atual,
+# atualizado na mesma transação de cada movimento
+def _v6_movimentos_estoque(conexao):
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS MovimentosEstoque (
+            id_movimento INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_produto INTEGER NOT NULL,
+            tipo TEXT NOT NULL CHECK (tipo IN ('inicial', 'venda', 'ajuste', 'reposicao', 'estorno_venda')),
+            quantidade INTEGER NOT NULL,
+            id_venda INTEGER,
+            data TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """)
+    conexao.execute("CREATE INDEX IF NOT EXISTS idx_movimentos_produto ON MovimentosEstoque (id_produto, id_movimento)")
+    # saldo de cada produto após o movimento `ate_movimento` (inclusive)
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS SnapshotsEstoque (
+            id_produto INTEGER NOT NULL,
+            ate_movimento INTEGER NOT NULL,
+            quantidade INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (id_produto, ate_movimento)
+        ) WITHOUT ROWID
+        """)
+    # o saldo dos produtos já cadastrados entra como movimento inicial
+    conexao.execute("""
+        INSERT INTO MovimentosEstoque (id_produto, tipo, quantidade)
+        SELECT ID, 'inicial', Quantidade FROM Produtos
+        """)
+
+
+# registro das partições de vendas arquivadas: cada uma é um arquivo
+# <banco>.vendas-<periodo>.sqlite com as vendas de data_venda em [inicio, fim)
+# (fim é a data de corte do último arquivamento, limitada ao fim do período)
+def _v7_particoes_vendas(conexao):
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS ParticoesVendas (
+            periodo TEXT PRIMARY KEY,
+            inicio TEXT NOT NULL,
+            fim TEXT NOT NULL,
+            arquivo TEXT NOT NULL,
+            vendas INTEGER NOT NULL DEFAULT 0
+        )
+        """)
+
+
+# ponto de reposição de cada produto; o índice parcial guarda só os produtos
+# com Quantidade <= estoque_minimo, então listar ou contar os produtos em falta
+# não percorre o catálogo
+def _v8_estoque_minimo(conexao):
+    colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(Produtos)").fetchall()}
+    if "estoque_minimo" not in colunas:
+        conexao.execute(
+            "ALTER TABLE Produtos ADD COLUMN estoque_minimo INTEGER NOT NULL DEFAULT 0 CHECK (estoque_minimo >= 0)"
+        )
+    conexao.execute("""
+        CREATE INDEX IF NOT EXISTS idx_produtos_em_falta ON Produtos (ID)
+        WHERE Quantidade <= estoque_minimo
+        """)
+
+
+# código de barras opcional (único quando preenchido) e índice de nomes sem
+# diferenciar maiúsculas; os dois servem à sugestão de produtos do caixa,
+# que só faz buscas por intervalo nesses índices (ver sugerir_produtos)
+def _v9_sugestao_produtos(conexao):
+    colunas = {linha[1] for linha in conexao.execute("PRAGMA table_info(Produtos)").fetchall()}
+    if "codigo_barras" not in colunas:
+        conexao.execute("ALTER TABLE Produtos ADD COLUMN codigo_barras TEXT")
+    conexao.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_produtos_codigo_barras ON Produtos (codigo_barras)
+        WHERE codigo_barras IS NOT NULL
+        """)
+    conexao.execute("CREATE INDEX IF NOT EXISTS idx_produtos_nome_nocase ON Produtos (Nome COLLATE NOCASE)")
+
+
+# compactações que apagaram movimentos: os movimentos até `ate_movimento`
+# (inclusive, todos com data <= `data`) só existem como fotografias, então o
+# saldo antes de `data` da compactação mais recente não pode mais ser calculado
+def _v10_compactacoes_estoque(conexao):
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS CompactacoesEstoque (
+            ate_movimento INTEGER PRIMARY KEY,
+            data TEXT NOT NULL
+        )
+        """)
+    # bancos já compactados com descarte: a fotografia mais recente cujo
+    # movimento foi apagado marca até onde o histórico se perdeu
+    conexao.execute("""
+        INSERT OR IGNORE INTO CompactacoesEstoque (ate_movimento, data)
+        SELECT s.ate_movimento, s.data FROM SnapshotsEstoque s
+        WHERE NOT EXISTS (SELECT 1 FROM MovimentosEstoque m WHERE m.id_movimento = s.ate_movimento)
+        ORDER BY s.ate_movimento DESC LIMIT 1
+        """)
+
+
+# (versão, descrição, função) em ordem crescente de versão
+MIGRACOES = [
+    (1, "tabelas Produtos e Vendas", _v1_tabelas),
+    (2, "indice unico de nomes de produtos", _v2_indice_nomes),
+    (3, "indices de vendas por produto e por data", _v3_indices_vendas),
+    (4, "resumo diario de vendas", _v4_resumo_vendas),
+    (5, "indice de texto completo de produtos", _v5_indice_busca),
+    (6, "movimentos e snapshots de estoque", _v6_movimentos_estoque),
+    (7, "registro de particoes de vendas arquivadas", _v7_particoes_vendas),
+    (8, "estoque minimo e indice de produtos em falta", _v8_estoque_minimo),
+    (9, "codigo de barras e indice de nomes para sugestoes", _v9_sugestao_produtos),
+    (10, "limite do historico de estoque descartado", _v10_compactacoes_estoque),
+]
+
+VERSAO_ESQUEMA = MIGRACOES[-1][0]
+
+
+# tabela Vendas de um arquivo de partição anexado como `nome_esquema`: mesmas
+# colunas do banco principal, sem a chave estrangeira (Produtos fica no principal)
+def criar_particao_vendas(conexao, nome_esquema):
+    conexao.execute(f"""
+        CREATE TABLE IF NOT EXISTS {nome_esquema}.Vendas (
+            id_venda INTEGER PRIMARY KEY,
+            id_produto INTEGER,
+            Quantidade_vendida INTEGER NOT NULL,
+            data_venda DATETIME NOT NULL,
+            valor_total REAL NOT NULL
+        )
+        """)
+    conexao.execute(f"CREATE INDEX IF NOT EXISTS {nome_esquema}.idx_vendas_produto ON Vendas (id_produto)")
+    conexao.execute(f"CREATE INDEX IF NOT EXISTS {nome_esquema}.idx_vendas_data ON Vendas (data_venda)")
+
+
+def _existe(conexao, tipo, nome):
+    return conexao.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = ? AND name = ?", (tipo, nome)
+    ).fetchone() is not None
+
+
+def versao(conexao):
+    return conexao.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrar(conexao):
+    """
+    Aplica as migrações pendentes numa única transação.
+    Retorna a lista de versões aplicadas (vazia se o banco já estava atualizado).
+    """
+    if versao(conexao) >= VERSAO_ESQUEMA:
+        return []
+    # BEGIN IMMEDIATE: outro processo que tente migrar ao mesmo tempo espera
+    # e, ao entrar, encontra a versão já atualizada
+    conexao.execute("BEGIN IMMEDIATE")
+    try:
+        atual = versao(conexao)
+        aplicadas = []
+        for numero, descricao, funcao in MIGRACOES:
+            if numero <= atual:
+                continue
+            logging.info(f"Aplicando migracao {numero}: {descricao}")
+            funcao(conexao)
+            aplicadas.append(numero)
+        if aplicadas:
+            conexao.execute(f"PRAGMA user_version = {aplicadas[-1]}")
+        conexao.commit()
+    except BaseException:
+        conexao.rollback()
+        raise
+    if aplicadas:
+        logging.info(f"Esquema atualizado da versao {atual} para {aplicadas[-1]}.")
+    return aplicadas
+
+
+# arquivos já verificados neste processo -> FTS5 disponível
+_verificados = {}
+_trava = threading.Lock()
+
+
+def garantir_esquema(nomeBD, conexao_fabrica):
+    """
+    Garante que o arquivo esteja na última versão, uma vez por processo.
+    `conexao_fabrica` é um gerenciador de contexto que empresta uma conexão
+    (só é usado na primeira vez). Retorna True se a busca FTS5 está disponível.
+    """
+    chave = None if nomeBD == ":memory:" else os.path.abspath(nomeBD)
+    if chave is not None:
+        busca_fts = _verificados.get(chave)
+        if busca_fts is not None and os.path.exists(chave):
+            return busca_fts
+    with _trava:
+        with conexao_fabrica() as conexao:
+            migrar(conexao)
+            busca_fts = _existe(conexao, "table", "ProdutosBusca")
+        if chave is not None:
+            _verificados[chave] = busca_fts
+    return busca_fts
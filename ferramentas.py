@@ -0,0 +1,182 @@
+"""
+ferramentas.py — Ferramentas de linha de comando do Sistema de Gerenciamento de Estoque.
+
+Uso:
+    python ferramentas.py importar catalogo.csv --lote 5000
+    python ferramentas.py importar catalogo.jsonl --rejeitados erros.jsonl
+    python ferramentas.py exportar vendas vendas-2026-03.jsonl.gz --mes 2026-03
+    python ferramentas.py exportar produtos catalogo.csv
+    python ferramentas.py relatorio mais-vendidos --mes 2026-03 --top 10
+    python ferramentas.py relatorio reconstruir
+    python ferramentas.py esquema
+    python ferramentas.py arquivar --ate 2025-01-01 --periodo ano
+    python ferramentas.py estoque compactar --ate "2026-01-01 00:00:00"
+    python ferramentas.py estoque verificar
+"""
+
+import argparse
+import datetime
+import sqlite3
+import sys
+
+import esquema
+from BancoDeDados import BancoDeDados
+from negocio import Produto, Venda
+from relatorios import Relatorio, intervalo_do_mes
+
+
+def comando_importar(args):
+    with Produto(args.banco) as produto:
+        relatorio = produto.importar(args.arquivo, tamanho_lote=args.lote, arquivo_rejeitados=args.rejeitados)
+    print(
+        f"{relatorio['importadas']} de {relatorio['lidas']} linhas importadas "
+        f"em {relatorio['segundos']}s ({relatorio['linhas_por_segundo']} linhas/s)"
+    )
+    if relatorio["rejeitadas"]:
+        print(f"{relatorio['rejeitadas']} linhas rejeitadas em {relatorio['arquivo_rejeitados']}")
+    return 0
+
+
+def comando_exportar(args):
+    if args.mes:
+        ano, mes = (int(parte) for parte in args.mes.split("-"))
+        data_inicio, data_fim = intervalo_do_mes(ano, mes)
+    else:
+        data_inicio, data_fim = args.inicio, args.fim
+    try:
+        if args.tabela == "produtos":
+            if data_inicio or data_fim:
+                raise ValueError("--mes/--inicio/--fim só se aplicam à exportação de vendas")
+            with Produto(args.banco) as produto:
+                relatorio = produto.exportar(args.arquivo, tamanho_lote=args.lote)
+        else:
+            with Venda(args.banco) as venda:
+                relatorio = venda.exportar(args.arquivo, data_inicio, data_fim,
+                                           com_nomes=not args.sem_nomes, tamanho_lote=args.lote)
+    except (ValueError, OSError, sqlite3.Error) as e:
+        print(f"erro: {e}")
+        return 1
+    print(
+        f"{relatorio['linhas']} linhas de {relatorio['tabela']} exportadas para {relatorio['arquivo']} "
+        f"em {relatorio['segundos']}s ({relatorio['linhas_por_segundo']} linhas/s)"
+    )
+    return 0
+
+
+def comando_relatorio(args):
+    with Relatorio(args.banco) as relatorio:
+        if args.tipo == "reconstruir":
+            print(relatorio.reconstruir())
+            return 0
+
+        if args.mes:
+            ano, mes = (int(parte) for parte in args.mes.split("-"))
+            data_inicio, data_fim = intervalo_do_mes(ano, mes)
+        else:
+            data_inicio, data_fim = args.inicio, args.fim
+
+        if args.tipo == "mais-vendidos":
+            for linha in relatorio.mais_vendidos(args.top, data_inicio, data_fim):
+                print(f"{linha['id_produto']:>8}  {linha['Produto']:<30}{linha['unidades']:>10}  R$ {linha['receita']:.2f}")
+        elif args.tipo == "receita-diaria":
+            for linha in relatorio.receita_diaria(data_inicio, data_fim):
+                print(f"{linha['dia']}  {linha['unidades']:>10}  R$ {linha['receita']:.2f}")
+        else:
+            for linha in relatorio.unidades_por_produto(data_inicio, data_fim):
+                print(f"{linha['id_produto']:>8}  {linha['unidades']:>10}")
+    return 0
+
+
+def comando_arquivar(args):
+    if args.ate:
+        ate_data = args.ate
+    else:
+        # data_venda é gravada em UTC (CURRENT_TIMESTAMP)
+        corte = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=args.manter_dias)
+        ate_data = corte.strftime("%Y-%m-%d %H:%M:%S")
+    with Venda(args.banco) as venda:
+        resultado = venda.arquivar(ate_data, args.periodo, args.lote, compactar=not args.sem_compactar)
+        print(resultado)
+        for particao in venda.particoes():
+            print(f"{particao['periodo']:<8}  {particao['vendas']:>10} vendas  {particao['arquivo']}")
+    return 1 if resultado.startswith("erro") else 0
+
+
+def comando_esquema(args):
+    with BancoDeDados(args.banco, tamanho_pool=1) as bd:
+        with bd.conexao() as conexao:
+            antes = esquema.versao(conexao)
+            aplicadas = esquema.migrar(conexao)
+    if aplicadas:
+        print(f"esquema atualizado da versão {antes} para {aplicadas[-1]} (migrações {', '.join(map(str, aplicadas))})")
+    else:
+        print(f"esquema já está na versão {antes} (última: {esquema.VERSAO_ESQUEMA})")
+    return 0
+
+
+def comando_estoque(args):
+    with Produto(args.banco) as produto:
+        if args.acao == "compactar":
+            resultado = produto.compactar_estoque(args.ate, args.descartar)
+            print(resultado)
+            return 1 if resultado.startswith("erro") else 0
+
+        divergentes = produto.bd.verificar_estoque()
+    for linha in divergentes:
+        print(f"{linha['id_produto']:>8}  saldo {linha['quantidade']:>10}  pelo histórico {linha['calculado']:>10}")
+    print(f"{len(divergentes)} produto(s) com saldo divergente do histórico de movimentos")
+    return 1 if divergentes else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ferramentas do Sistema de Gerenciamento de Estoque")
+    parser.add_argument("--banco", default="DadosProdutos.sqlite", help="arquivo do banco de dados SQLite")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    importar = subcomandos.add_parser("importar", help="importa produtos de um arquivo CSV ou JSONL")
+    importar.add_argument("arquivo", help="arquivo .csv (com cabeçalho) ou .jsonl")
+    importar.add_argument("--lote", type=int, default=1000, help="linhas gravadas por transação")
+    importar.add_argument("--rejeitados", default=None, help="arquivo JSONL para as linhas rejeitadas")
+    importar.set_defaults(funcao=comando_importar)
+
+    exportar = subcomandos.add_parser("exportar", help="exporta vendas ou produtos para CSV ou JSONL (.gz comprime)")
+    exportar.add_argument("tabela", choices=["vendas", "produtos"])
+    exportar.add_argument("arquivo", help="arquivo de saída: .csv, .jsonl, .csv.gz ou .jsonl.gz")
+    exportar.add_argument("--mes", help="vendas do mês AAAA-MM (tem prioridade sobre --inicio/--fim)")
+    exportar.add_argument("--inicio", help="data inicial AAAA-MM-DD (inclusiva)")
+    exportar.add_argument("--fim", help="data final AAAA-MM-DD (exclusiva)")
+    exportar.add_argument("--sem-nomes", action="store_true", help="não inclui o nome do produto nas vendas")
+    exportar.add_argument("--lote", type=int, default=5000, help="linhas lidas do banco por vez")
+    exportar.set_defaults(funcao=comando_exportar)
+
+    relatorio = subcomandos.add_parser("relatorio", help="relatórios de vendas a partir do resumo diário")
+    relatorio.add_argument("tipo", choices=["mais-vendidos", "receita-diaria", "unidades", "reconstruir"])
+    relatorio.add_argument("--mes", help="mês no formato AAAA-MM (tem prioridade sobre --inicio/--fim)")
+    relatorio.add_argument("--inicio", help="data inicial AAAA-MM-DD (inclusiva)")
+    relatorio.add_argument("--fim", help="data final AAAA-MM-DD (exclusiva)")
+    relatorio.add_argument("--top", type=int, default=10, help="quantidade de produtos em mais-vendidos")
+    relatorio.set_defaults(funcao=comando_relatorio)
+
+    arquivar = subcomandos.add_parser("arquivar", help="move vendas antigas para arquivos de partição por período")
+    arquivar.add_argument("--ate", default=None, help="arquiva as vendas anteriores a 'AAAA-MM-DD' (UTC)")
+    arquivar.add_argument("--manter-dias", type=int, default=365, help="sem --ate: mantém no banco principal as vendas dos últimos N dias")
+    arquivar.add_argument("--periodo", choices=["ano", "mes"], default="ano", help="um arquivo de partição por ano ou por mês")
+    arquivar.add_argument("--lote", type=int, default=10_000, help="vendas movidas por transação")
+    arquivar.add_argument("--sem-compactar", action="store_true", help="não executa VACUUM no banco principal ao final")
+    arquivar.set_defaults(funcao=comando_arquivar)
+
+    atualizar = subcomandos.add_parser("esquema", help="aplica as migrações pendentes e mostra a versão do esquema")
+    atualizar.set_defaults(funcao=comando_esquema)
+
+    estoque = subcomandos.add_parser("estoque", help="manutenção do histórico de movimentos de estoque")
+    estoque.add_argument("acao", choices=["compactar", "verificar"])
+    estoque.add_argument("--ate", default=None, help="compacta os movimentos até 'AAAA-MM-DD HH:MM:SS' UTC (padrão: agora)")
+    estoque.add_argument("--descartar", action="store_true", help="apaga os movimentos já compactados")
+    estoque.set_defaults(funcao=comando_estoque)
+
+    args = parser.parse_args(argv)
+    return args.funcao(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
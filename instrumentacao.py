@@ -0,0 +1,284 @@
+"""
+instrumentacao.py — Medições de tempo da camada de dados.
+
+Quando ativada no BancoDeDados, registra por método e por comando SQL o
+número de chamadas, as latências (p50/p95/p99), as linhas devolvidas e o tempo
+gasto em cada fase (obter a conexão, executar, ler as linhas, confirmar).
+Comandos mais lentos que um limite vão para o registro de consultas lentas,
+com o resultado de EXPLAIN QUERY PLAN.
+
+Desativada (o padrão), as conexões são sqlite3.Connection comuns e cada
+método decorado faz apenas uma verificação de atributo.
+"""
+
+import collections
+import datetime
+import functools
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+
+class Estatistica:
+    """Contagem, total e uma janela das últimas latências (em segundos)."""
+
+    __slots__ = ("chamadas", "erros", "total", "maximo", "amostras", "linhas", "linhas_afetadas")
+
+    def __init__(self, janela):
+        self.chamadas = 0
+        self.erros = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.amostras = collections.deque(maxlen=janela)
+        self.linhas = 0
+        self.linhas_afetadas = 0
+
+    def registrar(self, segundos, erro=False):
+        self.chamadas += 1
+        self.total += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+        if erro:
+            self.erros += 1
+        self.amostras.append(segundos)
+
+    def resumo(self):
+        ordenadas = sorted(self.amostras)
+
+        def percentil(fracao):
+            if not ordenadas:
+                return 0.0
+            indice = max(0, min(len(ordenadas) - 1, int(round(len(ordenadas) * fracao)) - 1))
+            return ordenadas[indice] * 1000
+
+        return {
+            "chamadas": self.chamadas,
+            "erros": self.erros,
+            "total_ms": self.total * 1000,
+            "media_ms": self.total * 1000 / self.chamadas if self.chamadas else 0.0,
+            "p50_ms": percentil(0.50),
+            "p95_ms": percentil(0.95),
+            "p99_ms": percentil(0.99),
+            "max_ms": self.maximo * 1000,
+            "linhas": self.linhas,
+            "linhas_afetadas": self.linhas_afetadas,
+        }
+
+
+class Instrumentacao:
+    """
+    Acumula as medições de um BancoDeDados.
+
+    lento_ms: comandos que demorarem mais que isso entram em `lentas`
+              (None desliga o registro de consultas lentas)
+    janela:   quantas latências recentes são guardadas para os percentis
+    """
+
+    FASES = ("conectar", "executar", "ler", "commit")
+
+    def __init__(self, lento_ms=None, janela=10_000, maximo_lentas=200):
+        self.lento_ms = lento_ms
+        self.janela = janela
+        self._trava = threading.Lock()
+        self.metodos = {}
+        self.comandos = {}
+        self.fases = {fase: Estatistica(janela) for fase in self.FASES}
+        self.lentas = collections.deque(maxlen=maximo_lentas)
+        self.inicio = datetime.datetime.now()
+
+    @staticmethod
+    def normalizar(comando):
+        return re.sub(r"\s+", " ", comando).strip()
+
+    def _estatistica(self, tabela, chave):
+        estatistica = tabela.get(chave)
+        if estatistica is None:
+            estatistica = tabela[chave] = Estatistica(self.janela)
+        return estatistica
+
+    def registrar_metodo(self, nome, segundos, erro=False):
+        with self._trava:
+            self._estatistica(self.metodos, nome).registrar(segundos, erro)
+
+    def registrar_fase(self, fase, segundos):
+        with self._trava:
+            self.fases[fase].registrar(segundos)
+
+    def registrar_comando(self, comando, segundos, linhas_afetadas=0, erro=False):
+        with self._trava:
+            estatistica = self._estatistica(self.comandos, comando)
+            estatistica.registrar(segundos, erro)
+            if linhas_afetadas > 0:
+                estatistica.linhas_afetadas += linhas_afetadas
+            self.fases["executar"].registrar(segundos)
+
+    def registrar_leitura(self, comando, segundos, linhas):
+        with self._trava:
+            self._estatistica(self.comandos, comando).linhas += linhas
+            self.fases["ler"].registrar(segundos)
+
+    def comando_lento(self, segundos):
+        return self.lento_ms is not None and segundos * 1000 >= self.lento_ms
+
+    def registrar_lenta(self, comando, parametros, segundos, plano):
+        registro = {
+            "quando": datetime.datetime.now().isoformat(timespec="seconds"),
+            "comando": comando,
+            "parametros": repr(parametros)[:200],
+            "ms": segundos * 1000,
+            "plano": plano,
+        }
+        with self._trava:
+            self.lentas.append(registro)
+        logging.warning(f"Consulta lenta ({registro['ms']:.1f} ms): {comando} | plano: {'; '.join(plano)}")
+
+    def instantaneo(self):
+        """Cópia das medições atuais, pronta para ser serializada em JSON."""
+        with self._trava:
+            return {
+                "inicio": self.inicio.isoformat(timespec="seconds"),
+                "momento": datetime.datetime.now().isoformat(timespec="seconds"),
+                "lento_ms": self.lento_ms,
+                "metodos": {nome: e.resumo() for nome, e in sorted(self.metodos.items())},
+                "comandos": {comando: e.resumo() for comando, e in
+                             sorted(self.comandos.items(), key=lambda item: -item[1].total)},
+                "fases": {fase: e.resumo() for fase, e in self.fases.items()},
+                "lentas": list(self.lentas),
+            }
+
+    def gravar(self, caminho):
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            json.dump(self.instantaneo(), arquivo, indent=2, ensure_ascii=False)
+        logging.info(f"Metricas do banco de dados gravadas em {caminho}")
+
+    def limpar(self):
+        with self._trava:
+            self.metodos.clear()
+            self.comandos.clear()
+            self.fases = {fase: Estatistica(self.janela) for fase in self.FASES}
+            self.lentas.clear()
+            self.inicio = datetime.datetime.now()
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    """Cursor que mede a execução e a leitura de cada comando."""
+
+    instrumentacao = None
+    _comando = None
+
+    def _medir_execucao(self, metodo, comando, parametros, varios):
+        instrumentacao = self.instrumentacao
+        chave = Instrumentacao.normalizar(comando)
+        self._comando = chave
+        inicio = time.perf_counter()
+        try:
+            resultado = metodo(comando, parametros)
+        except sqlite3.Error:
+            instrumentacao.registrar_comando(chave, time.perf_counter() - inicio, erro=True)
+            raise
+        segundos = time.perf_counter() - inicio
+        instrumentacao.registrar_comando(chave, segundos, self.rowcount)
+        if not varios and instrumentacao.comando_lento(segundos):
+            instrumentacao.registrar_lenta(chave, parametros, segundos, self._plano(comando, parametros))
+        return resultado
+
+    def _plano(self, comando, parametros):
+        try:
+            cursor = self.connection.cursor(sqlite3.Cursor)
+            return [linha[-1] for linha in cursor.execute("EXPLAIN QUERY PLAN " + comando, parametros)]
+        except sqlite3.Error as e:
+            return [f"plano indisponível: {e}"]
+
+    def _medir_leitura(self, metodo, *args):
+        inicio = time.perf_counter()
+        linhas = metodo(*args)
+        quantidade = len(linhas) if isinstance(linhas, list) else int(linhas is not None)
+        self.instrumentacao.registrar_leitura(self._comando, time.perf_counter() - inicio, quantidade)
+        return linhas
+
+    def execute(self, comando, parametros=()):
+        return self._medir_execucao(super().execute, comando, parametros, False)
+
+    def executemany(self, comando, parametros):
+        return self._medir_execucao(super().executemany, comando, parametros, True)
+
+    def fetchone(self):
+        return self._medir_leitura(super().fetchone)
+
+    def fetchmany(self, size=None):
+        if size is None:
+            size = self.arraysize
+        return self._medir_leitura(super().fetchmany, size)
+
+    def fetchall(self):
+        return self._medir_leitura(super().fetchall)
+
+    def __next__(self):
+        linha = self.fetchone()
+        if linha is None:
+            raise StopIteration
+        return linha
+
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexão cujos cursores são CursorInstrumentado; também mede commit e rollback."""
+
+    instrumentacao = None
+
+    def cursor(self, factory=CursorInstrumentado):
+        cursor = super().cursor(factory)
+        if isinstance(cursor, CursorInstrumentado):
+            cursor.instrumentacao = self.instrumentacao
+        return cursor
+
+    def execute(self, comando, parametros=()):
+        return self.cursor().execute(comando, parametros)
+
+    def executemany(self, comando, parametros):
+        return self.cursor().executemany(comando, parametros)
+
+    def executescript(self, script):
+        inicio = time.perf_counter()
+        try:
+            return super().executescript(script)
+        finally:
+            self.instrumentacao.registrar_comando("<script>", time.perf_counter() - inicio)
+
+    def commit(self):
+        inicio = time.perf_counter()
+        try:
+            return super().commit()
+        finally:
+            self.instrumentacao.registrar_fase("commit", time.perf_counter() - inicio)
+
+    def rollback(self):
+        inicio = time.perf_counter()
+        try:
+            return super().rollback()
+        finally:
+            self.instrumentacao.registrar_fase("commit", time.perf_counter() - inicio)
+
+
+def instrumentado(metodo):
+    """Mede o tempo de um método do BancoDeDados quando a instrumentação está ativa."""
+    nome = metodo.__name__
+
+    @functools.wraps(metodo)
+    def envoltorio(self, *args, **kwargs):
+        instrumentacao = self.instrumentacao
+        if instrumentacao is None:
+            return metodo(self, *args, **kwargs)
+        inicio = time.perf_counter()
+        erro = False
+        try:
+            return metodo(self, *args, **kwargs)
+        except BaseException:
+            erro = True
+            raise
+        finally:
+            instrumentacao.registrar_metodo(nome, time.perf_counter() - inicio, erro)
+
+    return envoltorio
@@ -1,27 +1,112 @@
-import flet as ft
-from negocio import Produto, Venda
-
+import asyncio
+import os
 
-def main(page: ft.Page):
+import flet as ft
+from cliente import ClienteHTTP, ProdutoRemotoAsync, VendaRemotaAsync
+from negocio import AlertasEstoque, CacheProdutos, ProdutoAsync, VendaAsync, criar_executor
+from renderizacao import Debounce, LoteDeAtualizacao, TabelaRender
+
+# quantidade de linhas exibidas por página nas tabelas
+TAMANHO_PAGINA = 50
+# espera (segundos) após a última tecla antes de pesquisar
+ATRASO_BUSCA = 0.3
+# sugestões exibidas no campo de produto da venda e espera entre teclas
+LIMITE_SUGESTOES = 8
+ATRASO_SUGESTAO = 0.15
+# threads (e conexões) usadas para o trabalho com o banco de dados
+THREADS_BANCO = 4
+
+
+class Paginador:
+    """
+    Controla a paginação por chave (keyset) de uma tabela.
+    Guarda o `apos_id` de cada página visitada para poder voltar.
+    """
+
+    def __init__(self, tamanho=TAMANHO_PAGINA):
+        self.tamanho = tamanho
+        self.inicios = [None]
+        self.tem_proxima = False
+        self.ultimo_id = None
+
+    @property
+    def numero(self):
+        return len(self.inicios)
+
+    # busca a página atual; consulta(apos_id, limite) deve ser uma corrotina
+    # que devolve uma lista
+    async def carregar(self, consulta, chave):
+        # pede uma linha a mais só para saber se existe próxima página
+        linhas = await consulta(self.inicios[-1], self.tamanho + 1)
+        # a página atual pode ter ficado vazia (ex.: último item excluído)
+        while not linhas and len(self.inicios) > 1:
+            self.inicios.pop()
+            linhas = await consulta(self.inicios[-1], self.tamanho + 1)
+        self.tem_proxima = len(linhas) > self.tamanho
+        linhas = linhas[:self.tamanho]
+        self.ultimo_id = linhas[-1][chave] if linhas else None
+        return linhas
+
+    def proxima(self):
+        if self.tem_proxima:
+            self.inicios.append(self.ultimo_id)
+
+    def anterior(self):
+        if len(self.inicios) > 1:
+            self.inicios.pop()
+
+    # volta para a primeira página (ex.: a consulta mudou)
+    def reiniciar(self):
+        self.inicios = [None]
+
+
+async def main(page: ft.Page):
     page.title = "Sistema de Gerenciamento de Estoque"
     page.theme_mode = ft.ThemeMode.LIGHT
     page.padding = 20
     page.scroll = "adaptive"
 
-    # Instâncias da camada de negócio
-    produto_negocio = Produto()
-    venda_negocio = Venda()
+    # Instâncias da camada de negócio (com o mesmo cache de produtos e o
+    # mesmo canal de alertas de estoque mínimo)
+    # todo acesso ao banco roda nas threads do executor, fora do laço de eventos
+    cache_produtos = CacheProdutos()
+    alertas_estoque = AlertasEstoque()
+    executor = criar_executor(THREADS_BANCO)
+    # ESTOQUE_SERVIDOR=http://host:8765: o caixa usa o servidor (servidor.py)
+    # em vez de abrir o arquivo SQLite diretamente
+    url_servidor = os.environ.get("ESTOQUE_SERVIDOR", "")
+    if url_servidor:
+        cliente = ClienteHTTP(url_servidor)
+        produto_negocio = ProdutoRemotoAsync(cliente, THREADS_BANCO, executor=executor, alertas=alertas_estoque)
+        venda_negocio = VendaRemotaAsync(cliente, THREADS_BANCO, executor=executor, alertas=alertas_estoque)
+    else:
+        produto_negocio = ProdutoAsync(max_workers=THREADS_BANCO, cache=cache_produtos, executor=executor,
+                                       alertas=alertas_estoque)
+        venda_negocio = VendaAsync(max_workers=THREADS_BANCO, cache=cache_produtos, executor=executor,
+                                   alertas=alertas_estoque)
+        # ESTOQUE_GRUPO_VENDAS=1: vendas gravadas em grupo (vários caixas no mesmo processo)
+        if os.environ.get("ESTOQUE_GRUPO_VENDAS", "") not in ("", "0"):
+            venda_negocio.negocio.ativar_gravacao_em_grupo()
 
     # ========== CAMPOS PRODUTO ==========
     nome_input = ft.TextField(label="Nome do Produto", width=250)
     descricao_input = ft.TextField(label="Descrição", width=400, multiline=True)
     preco_input = ft.TextField(label="Preço (R$)", width=150)
     quantidade_input = ft.TextField(label="Quantidade", width=150)
+    estoque_minimo_input = ft.TextField(label="Estoque mínimo", width=150, hint_text="0")
+    codigo_barras_input = ft.TextField(label="Código de barras", width=200)
+    busca_input = ft.TextField(label="Pesquisar produtos", width=400, prefix_icon=ft.Icons.SEARCH)
 
     # ========== CAMPOS VENDA ==========
-    produto_dropdown = ft.Dropdown(label="Produto", width=250)
+    # o produto é escolhido entre poucas sugestões pedidas ao banco a cada
+    # tecla (ID, início do nome ou código de barras), nunca o catálogo inteiro
+    produto_venda_input = ft.TextField(label="Produto (ID, nome ou código de barras)", width=300)
+    sugestoes_venda = ft.Column(spacing=0, visible=False)
     quantidade_venda_input = ft.TextField(label="Quantidade Vendida", width=150)
 
+    # indicador exibido enquanto houver operações aguardando o banco
+    progresso = ft.ProgressRing(width=20, height=20, visible=False)
+
     # ========== TABELAS ==========
     tabela_produtos = ft.DataTable(
         columns=[
@@ -30,6 +115,7 @@ def main(page: ft.Page):
             ft.DataColumn(ft.Text("Descrição")),
             ft.DataColumn(ft.Text("Preço")),
             ft.DataColumn(ft.Text("Quantidade")),
+            ft.DataColumn(ft.Text("Mínimo")),
             ft.DataColumn(ft.Text("Ações")),
         ],
         rows=[]
@@ -46,84 +132,271 @@ def main(page: ft.Page):
         rows=[]
     )
 
+    # todas as mudanças de uma ação do usuário saem num único page.update()
+    # (os blocos `with lote` nunca contêm await)
+    lote = LoteDeAtualizacao(page)
+
     # ========== FUNÇÕES AUXILIARES ==========
     def mostrar_mensagem(msg, cor="blue"):
         page.snack_bar = ft.SnackBar(ft.Text(msg, color="white"), bgcolor=cor, open=True)
+        lote.solicitar()
+
+    pendentes = 0
+
+    # aguarda uma operação do banco mostrando o estado pendente: os controles
+    # informados ficam desabilitados e o indicador de progresso aparece
+    async def aguardar(corrotina, *controles):
+        nonlocal pendentes
+        pendentes += 1
+        for controle in controles:
+            controle.disabled = True
+        progresso.visible = True
         page.update()
+        try:
+            return await corrotina
+        finally:
+            pendentes -= 1
+            for controle in controles:
+                controle.disabled = False
+            progresso.visible = pendentes > 0
+
+    paginador_produtos = Paginador()
+    paginador_vendas = Paginador()
+    pagina_produtos_texto = ft.Text()
+    pagina_vendas_texto = ft.Text()
+
+    def atualizar_paginacao(paginador, texto, anterior_btn, proxima_btn):
+        texto.value = f"Página {paginador.numero}"
+        anterior_btn.disabled = paginador.numero == 1
+        proxima_btn.disabled = not paginador.tem_proxima
+
+    # ID do produto escolhido para a venda (None enquanto nada foi escolhido)
+    produto_venda_id = None
+
+    def escolher_produto(produto):
+        nonlocal produto_venda_id
+        produto_venda_id = produto.ID
+        produto_venda_input.value = f"{produto.ID} - {produto.Nome}"
+        sugestoes_venda.controls = []
+        sugestoes_venda.visible = False
+        lote.solicitar()
+
+    def ao_escolher(produto):
+        async def escolher(e):
+            with lote:
+                escolher_produto(produto)
+        return escolher
+
+    # pede as sugestões do texto digitado e as mostra abaixo do campo
+    async def sugerir_produtos():
+        texto = (produto_venda_input.value or "").strip()
+        lista = await produto_negocio.sugerir(texto, LIMITE_SUGESTOES) if texto else []
+        # descarta a resposta se o campo mudou enquanto a consulta rodava
+        if texto != (produto_venda_input.value or "").strip() or produto_venda_id is not None:
+            return lista
+        with lote:
+            sugestoes_venda.controls = [
+                ft.TextButton(f"{p.ID} - {p.Nome}  (estoque: {p.Quantidade})", on_click=ao_escolher(p))
+                for p in lista
+            ]
+            sugestoes_venda.visible = bool(lista)
+            lote.solicitar()
+        return lista
+
+    sugerir = Debounce(sugerir_produtos, ATRASO_SUGESTAO)
+
+    async def ao_digitar_produto(e):
+        nonlocal produto_venda_id
+        produto_venda_id = None
+        sugerir()
+
+    # Enter (ou o leitor de código de barras) escolhe na hora o produto de ID
+    # ou código exato, ou a única sugestão
+    async def ao_confirmar_produto(e):
+        sugerir.cancelar()
+        texto = (produto_venda_input.value or "").strip()
+        lista = await sugerir_produtos()
+        if not lista or produto_venda_id is not None:
+            return
+        primeiro = lista[0]
+        if len(lista) == 1 or texto in (str(primeiro.ID), primeiro.codigo_barras):
+            with lote:
+                escolher_produto(primeiro)
+            quantidade_venda_input.focus()
+
+    produto_venda_input.on_change = ao_digitar_produto
+    produto_venda_input.on_submit = ao_confirmar_produto
+
+    async def remover(pid, botao):
+        resultado = await aguardar(produto_negocio.remover(pid), botao)
+        with lote:
+            mostrar_mensagem(resultado, "green" if "sucesso" in resultado else "red")
+        if "sucesso" in resultado:
+            await atualizar_tabela_produtos()
+
+    # +/- alteram só a célula de quantidade da linha do produto
+    async def ajustar(pid, delta, botao):
+        resultado = await aguardar(produto_negocio.ajustar_quantidade(pid, delta), botao)
+        produto = await produto_negocio.buscar_por_id(pid)
+        with lote:
+            mostrar_mensagem(resultado, "green" if "sucesso" in resultado else "red")
+            if produto:
+                render_produtos.atualizar(produto)
+
+    def botoes_produto(pid):
+        aumentar_btn = ft.IconButton(icon=ft.Icons.ADD, icon_color="green", tooltip="Aumentar")
+        diminuir_btn = ft.IconButton(icon=ft.Icons.REMOVE, icon_color="orange", tooltip="Diminuir")
+        excluir_btn = ft.IconButton(icon=ft.Icons.DELETE_FOREVER, icon_color="red", tooltip="Excluir")
+
+        async def aumentar(e):
+            await ajustar(pid, +1, aumentar_btn)
+
+        async def diminuir(e):
+            await ajustar(pid, -1, diminuir_btn)
+
+        async def excluir(e):
+            await remover(pid, excluir_btn)
+
+        aumentar_btn.on_click = aumentar
+        diminuir_btn.on_click = diminuir
+        excluir_btn.on_click = excluir
+        return ft.Row([aumentar_btn, diminuir_btn, excluir_btn])
+
+    render_produtos = TabelaRender(
+        tabela_produtos,
+        chave=lambda p: p.ID,
+        colunas=[
+            lambda p: str(p.ID),
+            lambda p: p.Nome,
+            lambda p: p.Descricao,
+            lambda p: f"R$ {p.Preco:.2f}",
+            lambda p: str(p.Quantidade),
+            lambda p: str(p.estoque_minimo),
+        ],
+        acoes=botoes_produto,
+    )
 
-    def atualizar_tabela_produtos(e=None):
-        tabela_produtos.rows.clear()
-        lista = produto_negocio.listar()
-        produto_dropdown.options.clear()
-
-        for p in lista:
-            pid = p["ID"]
-            produto_dropdown.options.append(ft.dropdown.Option(f'{pid} - {p["Nome"]}'))
-
-            def remover(pid=pid):
-                resultado = produto_negocio.remover(pid)
-                mostrar_mensagem(resultado, "green" if "sucesso" in resultado else "red")
-                atualizar_tabela_produtos()
-
-            def aumentar(pid=pid):
-                resultado = produto_negocio.ajustar_quantidade(pid, +1)
-                mostrar_mensagem(resultado, "green" if "sucesso" in resultado else "red")
-                atualizar_tabela_produtos()
-
-            def diminuir(pid=pid):
-                resultado = produto_negocio.ajustar_quantidade(pid, -1)
-                mostrar_mensagem(resultado, "green" if "sucesso" in resultado else "red")
-                atualizar_tabela_produtos()
-
-            tabela_produtos.rows.append(
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(ft.Text(str(p["ID"]))),
-                        ft.DataCell(ft.Text(p["Nome"])),
-                        ft.DataCell(ft.Text(p["Descricao"])),
-                        ft.DataCell(ft.Text(f'R$ {p["Preco"]:.2f}')),
-                        ft.DataCell(ft.Text(str(p["Quantidade"]))),
-                        ft.DataCell(
-                            ft.Row(
-                                [
-                                    ft.IconButton(icon=ft.Icons.ADD, icon_color="green", tooltip="Aumentar", on_click=lambda e, pid=pid: aumentar(pid)),
-                                    ft.IconButton(icon=ft.Icons.REMOVE, icon_color="orange", tooltip="Diminuir", on_click=lambda e, pid=pid: diminuir(pid)),
-                                    ft.IconButton(icon=ft.Icons.DELETE_FOREVER, icon_color="red", tooltip="Excluir", on_click=lambda e, pid=pid: remover(pid)),
-                                ]
-                            )
-                        ),
-                    ]
-                )
-            )
-
-        page.update()
+    render_vendas = TabelaRender(
+        tabela_vendas,
+        chave=lambda v: v.id_venda,
+        colunas=[
+            lambda v: str(v.id_venda),
+            lambda v: v.Produto,
+            lambda v: str(v.Quantidade_vendida),
+            lambda v: f"R$ {v.valor_total:.2f}",
+            lambda v: v.data_venda,
+        ],
+    )
 
-    def atualizar_tabela_vendas(e=None):
-        tabela_vendas.rows.clear()
-        lista = venda_negocio.listar()
-        produtos = {p["ID"]: p["Nome"] for p in produto_negocio.listar()}
-
-        for v in lista:
-            pid = v["id_produto"]
-            tabela_vendas.rows.append(
-                ft.DataRow(
-                    cells=[
-                        ft.DataCell(ft.Text(str(v["id_venda"]))),
-                        ft.DataCell(ft.Text(produtos.get(pid, "Desconhecido"))),
-                        ft.DataCell(ft.Text(str(v["Quantidade_vendida"]))),
-                        ft.DataCell(ft.Text(f'R$ {v["valor_total"]:.2f}')),
-                        ft.DataCell(ft.Text(v["data_venda"])),
-                    ]
+    # ========== ALERTAS DE ESTOQUE MÍNIMO ==========
+    # o selo mostra quantos produtos estão em falta; o conjunto é lido uma vez
+    # (pelo índice parcial) e depois mantido pelos alertas que a camada de
+    # dados publica após cada commit, sem consultar as listas de novo
+    em_falta = set()
+    mostrar_em_falta = False
+    loop = asyncio.get_running_loop()
+
+    def atualizar_selo():
+        alerta_btn.badge.text = str(len(em_falta))
+        alerta_btn.badge.label_visible = bool(em_falta)
+        alerta_btn.icon_color = "red" if em_falta else "grey"
+
+    # roda no laço de eventos (os alertas chegam na thread que gravou)
+    def aplicar_alerta(alerta):
+        with lote:
+            if alerta["em_falta"]:
+                em_falta.add(alerta["id_produto"])
+                mostrar_mensagem(
+                    f'Produto {alerta["id_produto"]} abaixo do mínimo '
+                    f'({alerta["quantidade"]}/{alerta["estoque_minimo"]})', "orange"
                 )
-            )
+            else:
+                em_falta.discard(alerta["id_produto"])
+            atualizar_selo()
+            lote.solicitar()
+
+    def ao_receber_alerta(alerta):
+        loop.call_soon_threadsafe(aplicar_alerta, alerta)
+
+    cancelar_alertas = alertas_estoque.assinar(ao_receber_alerta)
+    page.on_disconnect = lambda e: cancelar_alertas()
+
+    async def sincronizar_em_falta():
+        produtos = await produto_negocio.produtos_em_falta()
+        with lote:
+            em_falta.clear()
+            em_falta.update(p.ID for p in produtos)
+            atualizar_selo()
+            lote.solicitar()
+
+    # o selo alterna a tabela entre todos os produtos e só os em falta
+    async def alternar_em_falta(e):
+        nonlocal mostrar_em_falta
+        mostrar_em_falta = not mostrar_em_falta
+        paginador_produtos.reiniciar()
+        await atualizar_tabela_produtos()
+
+    async def atualizar_tabela_produtos(e=None):
+        texto = (busca_input.value or "").strip()
+        if texto:
+            # com pesquisa ativa a tabela mostra os resultados mais relevantes
+            lista = await aguardar(produto_negocio.buscar(texto, TAMANHO_PAGINA))
+        elif mostrar_em_falta:
+            lista = await aguardar(paginador_produtos.carregar(produto_negocio.produtos_em_falta, "ID"))
+        else:
+            # apenas a página visível é consultada; linhas já desenhadas são reaproveitadas
+            lista = await aguardar(paginador_produtos.carregar(produto_negocio.listar, "ID"))
+        with lote:
+            if texto:
+                produtos_anterior_btn.disabled = produtos_proxima_btn.disabled = True
+                pagina_produtos_texto.value = f"{len(lista)} resultado(s)"
+            else:
+                atualizar_paginacao(paginador_produtos, pagina_produtos_texto, produtos_anterior_btn, produtos_proxima_btn)
+            render_produtos.renderizar(lista)
+            lote.solicitar()
+
+    # "Atualizar Produtos" também ressincroniza o selo de produtos em falta
+    async def recarregar_produtos(e):
+        await sincronizar_em_falta()
+        await atualizar_tabela_produtos()
+
+    # a pesquisa roda só depois que o usuário para de digitar
+    pesquisar = Debounce(atualizar_tabela_produtos, ATRASO_BUSCA)
+
+    async def ao_digitar_busca(e):
+        pesquisar()
+
+    busca_input.on_change = ao_digitar_busca
+
+    async def atualizar_tabela_vendas(e=None):
+        # o nome do produto já vem da junção feita no SQL
+        lista = await aguardar(paginador_vendas.carregar(venda_negocio.historico, "id_venda"))
+        with lote:
+            render_vendas.renderizar(lista)
+            atualizar_paginacao(paginador_vendas, pagina_vendas_texto, vendas_anterior_btn, vendas_proxima_btn)
+            lote.solicitar()
+
+    async def mudar_pagina_produtos(avancar):
+        if avancar:
+            paginador_produtos.proxima()
+        else:
+            paginador_produtos.anterior()
+        await atualizar_tabela_produtos()
 
-        page.update()
+    async def mudar_pagina_vendas(avancar):
+        if avancar:
+            paginador_vendas.proxima()
+        else:
+            paginador_vendas.anterior()
+        await atualizar_tabela_vendas()
 
-    def cadastrar_produto(e):
+    async def cadastrar_produto(e):
         nome = nome_input.value.strip()
         descricao = descricao_input.value.strip()
         preco = preco_input.value.strip()
         quantidade = quantidade_input.value.strip()
+        estoque_minimo = (estoque_minimo_input.value or "").strip() or "0"
+        codigo_barras = (codigo_barras_input.value or "").strip() or None
 
         if not nome or not descricao or not preco or not quantidade:
             mostrar_mensagem("Preencha todos os campos!", "red")
@@ -132,68 +405,104 @@ def main(page: ft.Page):
         try:
             preco = float(preco)
             quantidade = int(quantidade)
+            estoque_minimo = int(estoque_minimo)
         except ValueError:
-            mostrar_mensagem("Preço e quantidade devem ser numéricos!", "red")
+            mostrar_mensagem("Preço, quantidade e estoque mínimo devem ser numéricos!", "red")
             return
 
-        resultado = produto_negocio.cadastrar(nome, descricao, preco, quantidade)
-        mostrar_mensagem(resultado, "green" if "sucesso" in resultado else "red")
-        atualizar_tabela_produtos()
-
-        nome_input.value = ""
-        descricao_input.value = ""
-        preco_input.value = ""
-        quantidade_input.value = ""
-        page.update()
-
-    def registrar_venda(e):
-        if not produto_dropdown.value or not quantidade_venda_input.value:
+        resultado = await aguardar(
+            produto_negocio.cadastrar(nome, descricao, preco, quantidade, estoque_minimo, codigo_barras), cadastrar_btn
+        )
+        with lote:
+            mostrar_mensagem(resultado, "green" if "sucesso" in resultado else "red")
+            nome_input.value = ""
+            descricao_input.value = ""
+            preco_input.value = ""
+            quantidade_input.value = ""
+            estoque_minimo_input.value = ""
+            codigo_barras_input.value = ""
+        if "sucesso" in resultado:
+            await atualizar_tabela_produtos()
+
+    async def registrar_venda(e):
+        if produto_venda_id is None or not quantidade_venda_input.value:
             mostrar_mensagem("Selecione um produto e informe a quantidade!", "red")
             return
 
+        id_produto = produto_venda_id
         try:
-            id_produto = int(produto_dropdown.value.split(" - ")[0])
             quantidade_vendida = int(quantidade_venda_input.value)
         except ValueError:
             mostrar_mensagem("Quantidade deve ser numérica!", "red")
             return
 
-        resultado = venda_negocio.registrar_venda(id_produto, quantidade_vendida)
-        if "erro" in resultado:
-            mostrar_mensagem(resultado, "red")
-        else:
-            mostrar_mensagem(resultado, "green")
-            atualizar_tabela_produtos()
-            atualizar_tabela_vendas()
-
-        quantidade_venda_input.value = ""
-        page.update()
+        resultado = await aguardar(venda_negocio.registrar_venda(id_produto, quantidade_vendida), registrar_venda_btn)
+        produto = await produto_negocio.buscar_por_id(id_produto) if "erro" not in resultado else None
+        with lote:
+            if "erro" in resultado:
+                mostrar_mensagem(resultado, "red")
+            else:
+                mostrar_mensagem(resultado, "green")
+                # só a linha do produto vendido muda na tabela de produtos
+                if produto:
+                    render_produtos.atualizar(produto)
+            quantidade_venda_input.value = ""
+            lote.solicitar()
+        if "erro" not in resultado:
+            await atualizar_tabela_vendas()
+
+    async def produtos_anterior(e):
+        await mudar_pagina_produtos(False)
+
+    async def produtos_proxima(e):
+        await mudar_pagina_produtos(True)
+
+    async def vendas_anterior(e):
+        await mudar_pagina_vendas(False)
+
+    async def vendas_proxima(e):
+        await mudar_pagina_vendas(True)
 
     # ========== BOTÕES ==========
     cadastrar_btn = ft.ElevatedButton("Cadastrar Produto", on_click=cadastrar_produto)
-    atualizar_btn = ft.ElevatedButton("Atualizar Produtos", on_click=atualizar_tabela_produtos)
+    atualizar_btn = ft.ElevatedButton("Atualizar Produtos", on_click=recarregar_produtos)
+    alerta_btn = ft.IconButton(
+        icon=ft.Icons.WARNING_AMBER,
+        icon_color="grey",
+        tooltip="Produtos em falta (clique para filtrar)",
+        badge=ft.Badge(text="0", label_visible=False),
+        on_click=alternar_em_falta,
+    )
     registrar_venda_btn = ft.ElevatedButton("Registrar Venda", on_click=registrar_venda)
+    produtos_anterior_btn = ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, tooltip="Página anterior", on_click=produtos_anterior)
+    produtos_proxima_btn = ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, tooltip="Próxima página", on_click=produtos_proxima)
+    vendas_anterior_btn = ft.IconButton(icon=ft.Icons.CHEVRON_LEFT, tooltip="Página anterior", on_click=vendas_anterior)
+    vendas_proxima_btn = ft.IconButton(icon=ft.Icons.CHEVRON_RIGHT, tooltip="Próxima página", on_click=vendas_proxima)
 
     # ========== TELAS ==========
     aba_produtos = ft.Column(
         [
-            ft.Text("📦 Cadastro de Produtos", size=22, weight="bold"),
-            ft.Row([nome_input, preco_input, quantidade_input]),
+            ft.Row([ft.Text("📦 Cadastro de Produtos", size=22, weight="bold"), progresso, alerta_btn]),
+            ft.Row([nome_input, preco_input, quantidade_input, estoque_minimo_input, codigo_barras_input]),
             descricao_input,
             ft.Row([cadastrar_btn, atualizar_btn]),
             ft.Divider(),
             ft.Text("Produtos Cadastrados", size=18, weight="bold"),
+            busca_input,
             tabela_produtos,
+            ft.Row([produtos_anterior_btn, pagina_produtos_texto, produtos_proxima_btn]),
         ]
     )
 
     aba_vendas = ft.Column(
         [
             ft.Text("💰 Registro de Vendas", size=22, weight="bold"),
-            ft.Row([produto_dropdown, quantidade_venda_input, registrar_venda_btn]),
+            ft.Row([produto_venda_input, quantidade_venda_input, registrar_venda_btn]),
+            sugestoes_venda,
             ft.Divider(),
             ft.Text("Histórico de Vendas", size=18, weight="bold"),
             tabela_vendas,
+            ft.Row([vendas_anterior_btn, pagina_vendas_texto, vendas_proxima_btn]),
         ]
     )
 
@@ -209,5 +518,6 @@ def main(page: ft.Page):
 
     page.add(abas)
 
-    atualizar_tabela_produtos()
-    atualizar_tabela_vendas()
+    await sincronizar_em_falta()
+    await atualizar_tabela_produtos()
+    await atualizar_tabela_vendas()
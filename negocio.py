@@ -1,81 +1,539 @@
 # negocio.py
 from BancoDeDados import BancoDeDados as BancoDados
-from typing import List, Optional, Dict
+from registros import HistoricoVendaRegistro, ProdutoRegistro, VendaRegistro
+from typing import Any, Iterator, List, Optional, Dict, Tuple
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+import asyncio
+import atexit
+import csv
+import functools
+import gzip
+import json
 import logging
+import math
+import os
+import queue
+import threading
+import time
+import weakref
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
+# Validações de produto compartilhadas pelo cadastro e pela importação
+# retorna a mensagem de erro ou None se os dados forem válidos
+def validar_produto(nome: str, descricao: str, preco: float, quantidade: int) -> Optional[str]:
+    if not nome:
+        return "erro: nome é obrigatório"
+    # NaN e infinito ("nan", "inf" num CSV) passam por float() mas não são preços
+    if not math.isfinite(preco):
+        return "erro: preço deve ser um número finito"
+    if preco < 0:
+        return "erro: preço deve ser >= 0"
+    if quantidade < 0:
+        return "erro: quantidade deve ser >= 0"
+    return None
+
+
+# Código de barras: sem espaços, até 64 caracteres; vazio significa "sem código"
+# retorna (codigo ou None, mensagem de erro ou None)
+def normalizar_codigo_barras(codigo: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    codigo = (codigo or "").strip()
+    if not codigo:
+        return None, None
+    if len(codigo) > 64 or any(c.isspace() for c in codigo):
+        return None, "erro: código de barras inválido"
+    return codigo, None
+
+
+# Lê um arquivo CSV (com cabeçalho) ou JSONL linha a linha
+# gera (numero_da_linha, dicionario) sem carregar o arquivo inteiro na memória
+def ler_registros(caminho: str) -> Iterator[Tuple[int, Any]]:
+    if caminho.lower().endswith((".jsonl", ".ndjson")):
+        with open(caminho, encoding="utf-8") as arquivo:
+            for numero, linha in enumerate(arquivo, start=1):
+                if not linha.strip():
+                    continue
+                try:
+                    yield numero, json.loads(linha)
+                except json.JSONDecodeError as e:
+                    yield numero, ValueError(f"JSON inválido: {e}")
+    else:
+        with open(caminho, encoding="utf-8", newline="") as arquivo:
+            # a linha 1 é o cabeçalho
+            for numero, registro in enumerate(csv.DictReader(arquivo), start=2):
+                yield numero, registro
+
+
+# Grava lotes de linhas (tuplas na ordem de `colunas`) em CSV (com cabeçalho)
+# ou JSONL, conforme a extensão; com ".gz" no final o arquivo é comprimido.
+# Escreve lote a lote num arquivo ".parcial", renomeado só no fim: se algo
+# falhar, o arquivo de destino não fica pela metade. Retorna as linhas gravadas.
+def gravar_registros(caminho: str, colunas: Tuple[str, ...], lotes: Iterator[List[Tuple]]) -> int:
+    nome = caminho.lower()
+    comprimido = nome.endswith(".gz")
+    if comprimido:
+        nome = nome[:-3]
+    if nome.endswith((".jsonl", ".ndjson")):
+        jsonl = True
+    elif nome.endswith(".csv"):
+        jsonl = False
+    else:
+        raise ValueError("formato de exportação não suportado (use .csv ou .jsonl, com .gz opcional)")
+
+    parcial = caminho + ".parcial"
+    gravadas = 0
+    try:
+        if comprimido:
+            arquivo = gzip.open(parcial, "wt", compresslevel=6, encoding="utf-8", newline="")
+        else:
+            arquivo = open(parcial, "w", encoding="utf-8", newline="")
+        with arquivo:
+            if jsonl:
+                for lote in lotes:
+                    arquivo.writelines(json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + "\n" for linha in lote)
+                    gravadas += len(lote)
+            else:
+                escritor = csv.writer(arquivo)
+                escritor.writerow(colunas)
+                for lote in lotes:
+                    escritor.writerows(lote)
+                    gravadas += len(lote)
+        os.replace(parcial, caminho)
+    except BaseException:
+        if os.path.exists(parcial):
+            os.remove(parcial)
+        raise
+    return gravadas
+
+
+class CacheProdutos:
+    """
+    Cache em memória de produtos, indexado por ID e por Nome.
+    Mantém no máximo `tamanho_maximo` produtos (descarta o usado há mais tempo)
+    e cada entrada expira após `ttl` segundos. É seguro entre threads.
+    Guarda e devolve os próprios ProdutoRegistro (sem cópia), que não devem
+    ser alterados por quem os recebe.
+    O mesmo cache deve ser compartilhado por Produto e Venda para que as
+    escritas de ambos o invalidem.
+    Cada invalidação avança uma geração e marca o ID e o nome invalidados;
+    quem lê do banco pega `geracao()` antes da leitura e a passa a `guardar`,
+    que descarta o produto se uma escrita o invalidou no meio do caminho
+    (senão o valor antigo ficaria no cache até expirar).
+    As marcas por chave ficam limitadas a MAXIMO_INVALIDACOES; acima disso
+    viram uma marca única para todas as chaves, e só as leituras que estavam
+    em andamento deixam de ser guardadas.
+    """
+
+    MAXIMO_INVALIDACOES = 4096
+
+    def __init__(self, tamanho_maximo: int = 1024, ttl: float = 30.0):
+        self.tamanho_maximo = tamanho_maximo
+        self.ttl = ttl
+        self._por_id: "OrderedDict[int, Tuple[float, ProdutoRegistro]]" = OrderedDict()
+        self._por_nome: Dict[str, int] = {}
+        self._trava = threading.Lock()
+        # geração atual e a geração em que cada ("id", ID)/("nome", Nome) foi
+        # invalidado pela última vez; `limpar` (e o excesso de marcas) vale
+        # para todas as chaves
+        self._geracao = 0
+        self._invalidado_em: Dict[Tuple[str, Any], int] = {}
+        self._limpo_em = 0
+        self.acertos = 0
+        self.falhas = 0
+
+    def _remover(self, id_produto: int) -> None:
+        entrada = self._por_id.pop(id_produto, None)
+        if entrada is not None:
+            self._por_nome.pop(entrada[1].Nome, None)
+
+    def obter_por_id(self, id_produto: int) -> Optional[ProdutoRegistro]:
+        with self._trava:
+            entrada = self._por_id.get(id_produto)
+            if entrada is None or entrada[0] < time.monotonic():
+                if entrada is not None:
+                    self._remover(id_produto)
+                self.falhas += 1
+                return None
+            self._por_id.move_to_end(id_produto)
+            self.acertos += 1
+            return entrada[1]
+
+    def obter_por_nome(self, nome: str) -> Optional[ProdutoRegistro]:
+        with self._trava:
+            id_produto = self._por_nome.get(nome)
+        if id_produto is None:
+            with self._trava:
+                self.falhas += 1
+            return None
+        return self.obter_por_id(id_produto)
+
+    # geração atual, a ser lida antes de consultar o banco
+    def geracao(self) -> int:
+        with self._trava:
+            return self._geracao
+
+    # geracao: valor de `geracao()` lido antes da consulta; se o produto foi
+    # invalidado depois disso, o registro lido pode estar velho e não é guardado
+    def guardar(self, produto: ProdutoRegistro, geracao: Optional[int] = None) -> None:
+        with self._trava:
+            id_produto = produto.ID
+            if geracao is not None and max(
+                self._limpo_em,
+                self._invalidado_em.get(("id", id_produto), 0),
+                self._invalidado_em.get(("nome", produto.Nome), 0),
+            ) > geracao:
+                return
+            self._remover(id_produto)
+            self._por_id[id_produto] = (time.monotonic() + self.ttl, produto)
+            self._por_nome[produto.Nome] = id_produto
+            while len(self._por_id) > self.tamanho_maximo:
+                self._remover(next(iter(self._por_id)))
+
+    # remove o produto do cache pelo ID e/ou pelo nome
+    def invalidar(self, id_produto: Optional[int] = None, nome: Optional[str] = None) -> None:
+        with self._trava:
+            self._geracao += 1
+            if id_produto is not None:
+                self._invalidado_em[("id", id_produto)] = self._geracao
+                self._remover(id_produto)
+            if nome is not None:
+                self._invalidado_em[("nome", nome)] = self._geracao
+                id_do_nome = self._por_nome.get(nome)
+                if id_do_nome is not None:
+                    self._invalidado_em[("id", id_do_nome)] = self._geracao
+                    self._remover(id_do_nome)
+            # sem isso o mapa cresceria com cada produto já alterado; a marca
+            # única só descarta as leituras feitas antes desta geração
+            if len(self._invalidado_em) > self.MAXIMO_INVALIDACOES:
+                self._limpo_em = self._geracao
+                self._invalidado_em.clear()
+
+    def limpar(self) -> None:
+        with self._trava:
+            self._geracao += 1
+            self._limpo_em = self._geracao
+            self._invalidado_em.clear()
+            self._por_id.clear()
+            self._por_nome.clear()
+
+    # contadores para dimensionar o cache
+    def estatisticas(self) -> Dict:
+        with self._trava:
+            consultas = self.acertos + self.falhas
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "itens": len(self._por_id),
+                "tamanho_maximo": self.tamanho_maximo,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+            }
+
+
+class AlertasEstoque:
+    """
+    Canal de alertas de estoque mínimo. A camada de dados publica um alerta
+    logo após o commit de cada escrita que faz um produto entrar ou sair da
+    situação "em falta" (Quantidade <= estoque_minimo); os assinantes recebem
+    o dicionário {id_produto, quantidade, estoque_minimo, em_falta} na thread
+    que gravou. O mesmo canal deve ser compartilhado por Produto e Venda.
+    """
+
+    def __init__(self, tamanho_historico: int = 100):
+        self._assinantes: List = []
+        self._trava = threading.Lock()
+        # últimos alertas publicados, para quem assinar depois
+        self.recentes: "deque[Dict]" = deque(maxlen=tamanho_historico)
+
+    # registra `funcao(alerta)` e devolve uma função que cancela a assinatura
+    def assinar(self, funcao) -> Any:
+        with self._trava:
+            self._assinantes.append(funcao)
+
+        def cancelar():
+            with self._trava:
+                if funcao in self._assinantes:
+                    self._assinantes.remove(funcao)
+        return cancelar
+
+    def publicar(self, alerta: Dict) -> None:
+        with self._trava:
+            self.recentes.append(alerta)
+            assinantes = list(self._assinantes)
+        for funcao in assinantes:
+            try:
+                funcao(alerta)
+            except Exception as e:
+                logging.error(f"Erro no assinante de alertas de estoque: {e}")
+
+
 class Estoque:
-    def __init__(self, nome_bd: str = 'DadosProdutos.sqlite'):
-        self.bd = BancoDados(nome_bd)
+    # bd: BancoDeDados já aberto a compartilhar (o servidor usa um só para Produto
+    # e Venda, com um único escritor); quem o criou é quem deve fechá-lo
+    def __init__(self, nome_bd: str = 'DadosProdutos.sqlite', tamanho_pool: int = 5,
+                 cache: Optional[CacheProdutos] = None, alertas: Optional[AlertasEstoque] = None,
+                 bd: Optional[BancoDados] = None):
+        self._proprio_bd = bd is None
+        self.bd = bd if bd is not None else BancoDados(nome_bd, tamanho_pool)
         self.bd.criar_tabelas()
+        # cache de leitura opcional (compartilhado entre Produto e Venda)
+        self.cache = cache
+        # alertas de estoque mínimo opcionais (também compartilhados)
+        self.alertas = alertas
+        if alertas is not None and alertas.publicar not in self.bd.ouvintes_estoque:
+            self.bd.ouvintes_estoque.append(alertas.publicar)
+
+    # descarta do cache os produtos alterados por uma escrita
+    def _invalidar_cache(self, *ids_produto: int, nome: Optional[str] = None) -> None:
+        if self.cache is None:
+            return
+        for id_produto in ids_produto:
+            self.cache.invalidar(id_produto=id_produto)
+        if nome is not None:
+            self.cache.invalidar(nome=nome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, rastreio):
+        self.fechar()
+
+    # libera as conexões mantidas pelo pool da camada de dados
+    def fechar(self):
+        if self._proprio_bd:
+            self.bd.fechar()
+
+    # Exportação em streaming de uma tabela para CSV/JSONL (ver gravar_registros)
+    # as linhas são lidas em lotes numa conexão só de leitura, então a memória
+    # não cresce com o tamanho da tabela; erros são registrados e propagados
+    def _exportar(self, tabela: str, caminho: str, tamanho_lote: int, **filtros) -> Dict:
+        inicio = time.perf_counter()
+        try:
+            colunas, lotes = self.bd.exportar(tabela, tamanho_lote, **filtros)
+            linhas = gravar_registros(caminho, colunas, lotes)
+        except Exception as e:
+            logging.error(f"Erro ao exportar {tabela} para '{caminho}': {e}")
+            raise
+        segundos = time.perf_counter() - inicio
+        relatorio = {
+            "tabela": tabela,
+            "linhas": linhas,
+            "segundos": round(segundos, 3),
+            "linhas_por_segundo": round(linhas / segundos, 1) if segundos > 0 else float(linhas),
+            "arquivo": caminho,
+        }
+        logging.info(f"Exportação concluída: {relatorio}")
+        return relatorio
 
 
 class Produto(Estoque):
-    def __init__(self, nome_bd: str = 'DadosProdutos.sqlite'):
-        super().__init__(nome_bd)
+    def __init__(self, nome_bd: str = 'DadosProdutos.sqlite', tamanho_pool: int = 5,
+                 cache: Optional[CacheProdutos] = None, alertas: Optional[AlertasEstoque] = None,
+                 bd: Optional[BancoDados] = None):
+        super().__init__(nome_bd, tamanho_pool, cache, alertas, bd)
 
     # Create
-    def cadastrar(self, nome: str, descricao: str, preco: float, quantidade: int) -> str:
+    def cadastrar(self, nome: str, descricao: str, preco: float, quantidade: int, estoque_minimo: int = 0,
+                  codigo_barras: Optional[str] = None) -> str:
         nome = nome.strip()
         descricao = descricao.strip()
 
         # Validações simples
-        if not nome:
-            return "erro: nome é obrigatório"
-        if preco < 0:
-            return "erro: preço deve ser >= 0"
-        if quantidade < 0:
-            return "erro: quantidade deve ser >= 0"
+        erro = validar_produto(nome, descricao, preco, quantidade)
+        if erro:
+            return erro
+        if estoque_minimo < 0:
+            return "erro: estoque mínimo deve ser >= 0"
+        codigo_barras, erro = normalizar_codigo_barras(codigo_barras)
+        if erro:
+            return erro
 
         # Verifica duplicidade por nome
         if self.bd.produto_existe(nome):
             return "erro: o produto já existe"
 
         # Insere
-        self.bd.inserir_produto(nome, descricao, preco, quantidade)
+        try:
+            self.bd.inserir_produto(nome, descricao, preco, quantidade, estoque_minimo, codigo_barras)
+        except ValueError as e:
+            return f"erro: {e}"
+        except Exception as e:
+            logging.error(f"Erro ao cadastrar produto: {e}")
+            return "erro: falha ao cadastrar produto"
+        self._invalidar_cache(nome=nome)
         return "produto cadastrado com sucesso"
 
-    # Read (listar todos)
-    def listar(self) -> List[Dict]:
+    # Importação em massa de um arquivo CSV ou JSONL
+    # cada linha passa pelas mesmas validações do cadastro e é inserida ou
+    # atualizada (pelo Nome) em lotes de `tamanho_lote`, um commit por lote.
+    # Linhas rejeitadas vão para `arquivo_rejeitados` (JSONL) com o motivo.
+    def importar(self, caminho: str, tamanho_lote: int = 1000, arquivo_rejeitados: Optional[str] = None) -> Dict:
+        if arquivo_rejeitados is None:
+            arquivo_rejeitados = os.path.splitext(caminho)[0] + ".rejeitados.jsonl"
+
+        lidas = importadas = rejeitadas = 0
+        lote = []
+        inicio = time.perf_counter()
+        with open(arquivo_rejeitados, "w", encoding="utf-8") as rejeitados:
+            def rejeitar(numero, registro, motivo):
+                nonlocal rejeitadas
+                rejeitadas += 1
+                rejeitados.write(json.dumps({"linha": numero, "motivo": motivo, "registro": registro}, ensure_ascii=False, default=str) + "\n")
+
+            for numero, registro in ler_registros(caminho):
+                lidas += 1
+                if isinstance(registro, Exception):
+                    rejeitar(numero, None, str(registro))
+                    continue
+                if not isinstance(registro, dict):
+                    rejeitar(numero, registro, "registro deve ser um objeto")
+                    continue
+
+                campos = {str(chave).strip().lower(): valor for chave, valor in registro.items()}
+                try:
+                    nome = str(campos.get("nome") or "").strip()
+                    descricao = str(campos.get("descricao") or "").strip()
+                    preco = float(campos.get("preco"))
+                    quantidade = int(campos.get("quantidade"))
+                except (TypeError, ValueError):
+                    rejeitar(numero, registro, "erro: preço e quantidade devem ser numéricos")
+                    continue
+
+                erro = validar_produto(nome, descricao, preco, quantidade)
+                if erro:
+                    rejeitar(numero, registro, erro)
+                    continue
+
+                lote.append((numero, registro, (nome, descricao, preco, quantidade)))
+                if len(lote) >= tamanho_lote:
+                    importadas += self._gravar_lote_importacao(lote, rejeitar)
+                    lote = []
+
+            if lote:
+                importadas += self._gravar_lote_importacao(lote, rejeitar)
+
+        segundos = time.perf_counter() - inicio
+        relatorio = {
+            "lidas": lidas,
+            "importadas": importadas,
+            "rejeitadas": rejeitadas,
+            "segundos": round(segundos, 3),
+            "linhas_por_segundo": round(lidas / segundos, 1) if segundos > 0 else float(lidas),
+            "arquivo_rejeitados": arquivo_rejeitados,
+        }
+        logging.info(f"Importação de '{caminho}' concluída: {relatorio}")
+        return relatorio
+
+    # Exportação do catálogo para CSV ou JSONL (".gz" comprime)
+    def exportar(self, caminho: str, tamanho_lote: int = 5000) -> Dict:
+        return self._exportar("produtos", caminho, tamanho_lote)
+
+    # lote: lista de (numero_da_linha, registro, (nome, descricao, preco, quantidade))
+    # se o banco recusar o lote inteiro, cada linha é gravada sozinha para
+    # rejeitar só a que falhou, com o número dela no arquivo
+    def _gravar_lote_importacao(self, lote, rejeitar) -> int:
+        try:
+            gravadas = self.bd.upsert_produtos([linha for _, _, linha in lote])
+        except Exception as e:
+            if len(lote) == 1:
+                numero, registro, _ = lote[0]
+                logging.error(f"Erro ao gravar a linha {numero} da importação: {e}")
+                rejeitar(numero, registro, f"erro: falha ao gravar linha ({e})")
+                return 0
+            logging.warning(f"Lote da importação recusado ({e}); gravando linha a linha.")
+            return sum(self._gravar_lote_importacao([item], rejeitar) for item in lote)
+        for _, _, linha in lote:
+            self._invalidar_cache(nome=linha[0])
+        return gravadas
+
+    # Read (listar todos ou uma página)
+    def listar(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[ProdutoRegistro]:
         """
-        Retorna lista de produtos (cada produto é um dict).
+        Retorna lista de produtos (cada produto é um ProdutoRegistro, que
+        também aceita produto["Nome"]), em ordem de ID.
+        Para paginar, passe o ID do último produto da página anterior em
+        `apos_id` e o tamanho da página em `limite`.
         Se ocorrer erro retorna lista vazia.
         """
         try:
-            return self.bd.listar_produtos() or []
+            return self.bd.listar_produtos(apos_id, limite) or []
         except Exception as e:
             logging.error(f"Erro ao listar produtos no negócio: {e}")
             return []
 
-    # Auxiliar: buscar por ID
-    def buscar_por_id(self, id_produto: int) -> Optional[Dict]:
-        produtos = self.listar()
-        for p in produtos:
-            # chave pode ser 'ID' ou 'Id' dependendo do DB; ajustamos para 'ID'
-            if int(p.get('ID', p.get('Id', p.get('id', 0)))) == int(id_produto):
-                return p
-        return None
+    # Read em streaming: gera lotes de produtos sem carregar o catálogo inteiro
+    def iterar(self, tamanho_lote: int = 500, apos_id: Optional[int] = None) -> Iterator[List[ProdutoRegistro]]:
+        return self.bd.iterar_produtos(tamanho_lote, apos_id)
+
+    # Auxiliar: buscar por ID (cache, se houver, e depois a chave primária)
+    def buscar_por_id(self, id_produto: int) -> Optional[ProdutoRegistro]:
+        try:
+            id_produto = int(id_produto)
+            if self.cache is not None:
+                produto = self.cache.obter_por_id(id_produto)
+                if produto is not None:
+                    return produto
+                geracao = self.cache.geracao()
+            produto = self.bd.obter_produto(id_produto)
+            if produto is not None and self.cache is not None:
+                self.cache.guardar(produto, geracao)
+            return produto
+        except Exception as e:
+            logging.error(f"Erro ao buscar produto por ID: {e}")
+            return None
+
+    # Auxiliar: buscar por nome (cache, se houver, e depois o índice único de Nome)
+    def buscar_por_nome(self, nome: str) -> Optional[ProdutoRegistro]:
+        try:
+            nome = nome.strip()
+            if self.cache is not None:
+                produto = self.cache.obter_por_nome(nome)
+                if produto is not None:
+                    return produto
+                geracao = self.cache.geracao()
+            produto = self.bd.obter_produto_por_nome(nome)
+            if produto is not None and self.cache is not None:
+                self.cache.guardar(produto, geracao)
+            return produto
+        except Exception as e:
+            logging.error(f"Erro ao buscar produto por nome: {e}")
+            return None
+
+    # Busca textual por Nome e Descricao (prefixo de cada palavra, por relevância)
+    def buscar(self, texto: str, limite: int = 20) -> List[ProdutoRegistro]:
+        try:
+            return self.bd.buscar_produtos(texto, limite)
+        except Exception as e:
+            logging.error(f"Erro ao buscar produtos: {e}")
+            return []
+
+    # Sugestões para o campo de produto do caixa (ID, início do nome ou
+    # código de barras); cada tecla custa algumas buscas em índice limitadas
+    # a `limite` linhas, qualquer que seja o tamanho do catálogo
+    def sugerir(self, texto: str, limite: int = 10) -> List[ProdutoRegistro]:
+        try:
+            return self.bd.sugerir_produtos(texto, limite)
+        except Exception as e:
+            logging.error(f"Erro ao sugerir produtos: {e}")
+            return []
 
     # Update (completo: altera todos os campos)
     def atualizar(self, id_produto: int, nome: str, descricao: str, preco: float, quantidade: int) -> str:
-        # Verifica existência
-        produto = self.buscar_por_id(id_produto)
+        # Verifica existência (direto no banco: escritas não confiam no cache)
+        produto = self.bd.obter_produto(id_produto)
         if not produto:
             return "erro: produto não encontrado"
 
         nome = nome.strip()
         descricao = descricao.strip()
-        if not nome:
-            return "erro: nome é obrigatório"
-        if preco < 0:
-            return "erro: preço deve ser >= 0"
-        if quantidade < 0:
-            return "erro: quantidade deve ser >= 0"
+        erro = validar_produto(nome, descricao, preco, quantidade)
+        if erro:
+            return erro
 
         try:
             self.bd.alterar_produto(id_produto, nome, descricao, preco, quantidade)
+            self._invalidar_cache(id_produto, nome=nome)
             return "produto atualizado com sucesso"
         except Exception as e:
             logging.error(f"Erro ao atualizar produto: {e}")
@@ -83,89 +541,380 @@ class Produto(Estoque):
 
     # Update de quantidade (ajuste incremental: delta pode ser negativo para diminuir)
     def ajustar_quantidade(self, id_produto: int, delta: int) -> str:
-        produto = self.buscar_por_id(id_produto)
-        if not produto:
-            return "erro: produto não encontrado"
-
-        nova_qnt = int(produto['Quantidade']) + int(delta)
-        if nova_qnt < 0:
-            return "erro: quantidade resultante não pode ser negativa"
-
+        # soma direto no banco (Quantidade = Quantidade + delta): ajustes
+        # simultâneos de dois terminais não se sobrescrevem
         try:
-            # Reaproveita alterar_produto (é necessário passar todos os campos)
-            self.bd.alterar_produto(
-                id_produto,
-                produto['Nome'],
-                produto['Descricao'],
-                float(produto['Preco']),
-                nova_qnt
-            )
+            self.bd.ajustar_estoque(int(id_produto), int(delta))
+            self._invalidar_cache(int(id_produto))
             return "quantidade atualizada com sucesso"
+        except ValueError as e:
+            return f"erro: {e}"
         except Exception as e:
             logging.error(f"Erro ao ajustar quantidade: {e}")
             return "erro: falha ao ajustar quantidade"
 
+    # Reposição de estoque (entrada de mercadoria)
+    def repor(self, id_produto: int, quantidade: int) -> str:
+        try:
+            self.bd.ajustar_estoque(int(id_produto), int(quantidade), "reposicao")
+            self._invalidar_cache(int(id_produto))
+            return "estoque reposto com sucesso"
+        except ValueError as e:
+            return f"erro: {e}"
+        except Exception as e:
+            logging.error(f"Erro ao repor estoque: {e}")
+            return "erro: falha ao repor estoque"
+
+    # Ponto de reposição: o produto fica "em falta" quando Quantidade <= estoque_minimo
+    def definir_estoque_minimo(self, id_produto: int, estoque_minimo: int) -> str:
+        try:
+            self.bd.definir_estoque_minimo(int(id_produto), int(estoque_minimo))
+            self._invalidar_cache(int(id_produto))
+            return "estoque mínimo definido com sucesso"
+        except ValueError as e:
+            return f"erro: {e}"
+        except Exception as e:
+            logging.error(f"Erro ao definir estoque mínimo: {e}")
+            return "erro: falha ao definir estoque mínimo"
+
+    # Código de barras do produto (vazio remove o código)
+    def definir_codigo_barras(self, id_produto: int, codigo_barras: Optional[str]) -> str:
+        codigo_barras, erro = normalizar_codigo_barras(codigo_barras)
+        if erro:
+            return erro
+        try:
+            self.bd.definir_codigo_barras(int(id_produto), codigo_barras)
+            self._invalidar_cache(int(id_produto))
+            return "código de barras definido com sucesso"
+        except ValueError as e:
+            return f"erro: {e}"
+        except Exception as e:
+            logging.error(f"Erro ao definir código de barras: {e}")
+            return "erro: falha ao definir código de barras"
+
+    # Produtos em falta (paginado por ID); usa só o índice parcial, sem varrer o catálogo
+    def produtos_em_falta(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[ProdutoRegistro]:
+        try:
+            return self.bd.listar_produtos_em_falta(apos_id, limite) or []
+        except Exception as e:
+            logging.error(f"Erro ao listar produtos em falta: {e}")
+            return []
+
+    # Histórico de movimentos de estoque (todos ou de um produto, paginado)
+    def movimentos(self, id_produto: Optional[int] = None, apos_id: Optional[int] = None,
+                   limite: Optional[int] = None) -> List[Dict]:
+        return self.bd.listar_movimentos(id_produto, apos_id, limite)
+
+    # Saldo de um produto num instante do passado ('AAAA-MM-DD HH:MM:SS', UTC);
+    # None se o produto não existe ou se o instante é anterior ao histórico
+    # apagado por compactar_estoque(descartar=True)
+    def estoque_em(self, id_produto: int, data: str) -> Optional[int]:
+        try:
+            return self.bd.estoque_em(int(id_produto), data)
+        except Exception as e:
+            logging.error(f"Erro ao consultar estoque em {data}: {e}")
+            return None
+
+    # Grava fotografias do saldo (ver BancoDeDados.compactar_estoque)
+    def compactar_estoque(self, ate_data: Optional[str] = None, descartar: bool = False) -> str:
+        try:
+            total = self.bd.compactar_estoque(ate_data, descartar)
+            return f"estoque compactado com sucesso ({total} produtos)"
+        except Exception as e:
+            logging.error(f"Erro ao compactar estoque: {e}")
+            return "erro: falha ao compactar estoque"
+
     # Delete
     def remover(self, id_produto: int) -> str:
-        produto = self.buscar_por_id(id_produto)
+        produto = self.bd.obter_produto(id_produto)
         if not produto:
             return "erro: produto não encontrado"
 
         try:
             self.bd.excluir_produto(id_produto)
+            self._invalidar_cache(id_produto)
             return "produto removido com sucesso"
         except Exception as e:
             logging.error(f"Erro ao remover produto: {e}")
             return "erro: falha ao remover produto"
 
 
+class FilaDeVendas:
+    """
+    Gravação em grupo (group commit) de vendas.
+
+    As vendas enviadas entram numa fila em memória; uma thread de gravação
+    junta até `tamanho_lote` vendas (ou o que chegar em `intervalo` segundos
+    depois da primeira) e grava todas num único commit. O Future de cada venda
+    só é resolvido depois desse commit, com o id da venda ou com o ValueError
+    que a recusou, então uma venda confirmada é tão durável quanto no modo normal.
+
+    Outras escritas podem passar pela mesma thread com `executar` (é o que o
+    servidor HTTP faz): elas rodam entre dois lotes, na ordem de chegada, e
+    assim o processo inteiro tem um único escritor.
+    """
+
+    def __init__(self, bd: BancoDados, tamanho_lote: int = 200, intervalo: float = 0.05):
+        self.bd = bd
+        self.tamanho_lote = max(1, tamanho_lote)
+        self.intervalo = intervalo
+        self._fila = queue.Queue()
+        self._trava = threading.Lock()
+        self._fechada = False
+        self._thread = threading.Thread(target=self._gravar_continuamente, name="fila-vendas", daemon=True)
+        self._thread.start()
+        _filas_ativas.add(self)
+
+    def enviar(self, id_produto: int, quantidade_vendida: int, valor_total: Optional[float] = None) -> Future:
+        futuro = Future()
+        with self._trava:
+            if self._fechada:
+                futuro.set_exception(RuntimeError("fila de vendas encerrada"))
+                return futuro
+            self._fila.put((id_produto, quantidade_vendida, valor_total, futuro))
+        return futuro
+
+    # executa `funcao(*args)` na thread de gravação, depois das vendas que já
+    # estavam na fila; o Future recebe o retorno (ou a exceção) da função
+    def executar(self, funcao, *args) -> Future:
+        futuro = Future()
+        with self._trava:
+            if self._fechada:
+                futuro.set_exception(RuntimeError("fila de vendas encerrada"))
+                return futuro
+            self._fila.put((_ESCRITA, funcao, args, futuro))
+        return futuro
+
+    @property
+    def encerrada(self) -> bool:
+        return self._fechada
+
+    def _gravar_continuamente(self):
+        encerrar = False
+        while not encerrar:
+            primeira = self._fila.get()
+            if primeira is None:
+                break
+            if primeira[0] is _ESCRITA:
+                self._executar(primeira)
+                continue
+            lote = [primeira]
+            escrita = None
+            prazo = time.monotonic() + self.intervalo
+            while len(lote) < self.tamanho_lote:
+                try:
+                    item = self._fila.get(timeout=max(0.0, prazo - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    encerrar = True
+                    break
+                if item[0] is _ESCRITA:
+                    # fecha o lote aqui para manter a ordem de chegada
+                    escrita = item
+                    break
+                lote.append(item)
+            self._gravar(lote)
+            if escrita is not None:
+                self._executar(escrita)
+
+    @staticmethod
+    def _executar(item):
+        _, funcao, args, futuro = item
+        try:
+            futuro.set_result(funcao(*args))
+        except Exception as e:
+            futuro.set_exception(e)
+
+    def _gravar(self, lote):
+        try:
+            resultados = self.bd.registrar_vendas_em_lote([item[:3] for item in lote])
+        except Exception as e:
+            logging.error(f"Erro ao gravar lote de {len(lote)} vendas: {e}")
+            for *_, futuro in lote:
+                futuro.set_exception(e)
+            return
+        for (*_, futuro), resultado in zip(lote, resultados):
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+    # para de aceitar vendas, grava o que estiver na fila e encerra a thread
+    def drenar(self, tempo_maximo: Optional[float] = None) -> None:
+        with self._trava:
+            if self._fechada:
+                return
+            self._fechada = True
+            self._fila.put(None)
+        self._thread.join(tempo_maximo)
+        _filas_ativas.discard(self)
+
+
+# marca os itens da fila que são escritas avulsas (FilaDeVendas.executar)
+_ESCRITA = object()
+
+# filas de vendas em uso, drenadas por encerrar() (e ao final do processo)
+_filas_ativas = weakref.WeakSet()
+
+
+# grava as vendas pendentes de todas as filas; chamado ao fechar o aplicativo
+def encerrar(tempo_maximo: Optional[float] = 10.0) -> None:
+    for fila in list(_filas_ativas):
+        fila.drenar(tempo_maximo)
+
+
+atexit.register(encerrar)
+
+
 class Venda(Estoque):
-    def __init__(self, nome_bd: str = 'DadosProdutos.sqlite'):
-        super().__init__(nome_bd)
+    def __init__(self, nome_bd: str = 'DadosProdutos.sqlite', tamanho_pool: int = 5,
+                 cache: Optional[CacheProdutos] = None, alertas: Optional[AlertasEstoque] = None,
+                 bd: Optional[BancoDados] = None):
+        super().__init__(nome_bd, tamanho_pool, cache, alertas, bd)
+        # fila de gravação em grupo (None = cada venda com seu próprio commit)
+        self.fila: Optional[FilaDeVendas] = None
+
+    # passa a gravar as vendas em grupo: registrar_venda continua devolvendo
+    # o resultado só depois do commit, mas várias vendas simultâneas dividem o mesmo
+    def ativar_gravacao_em_grupo(self, tamanho_lote: int = 200, intervalo: float = 0.05) -> None:
+        if self.fila is None:
+            self.fila = FilaDeVendas(self.bd, tamanho_lote, intervalo)
+
+    # True enquanto a fila estiver aceitando vendas (depois de encerrar(),
+    # as vendas voltam a ser gravadas uma a uma)
+    def gravando_em_grupo(self) -> bool:
+        return self.fila is not None and not self.fila.encerrada
+
+    def fechar(self):
+        if self.fila is not None:
+            self.fila.drenar()
+            self.fila = None
+        super().fechar()
+
+    # envia a venda para a fila de gravação em grupo e devolve o Future
+    # (resolvido com o id da venda após o commit); exige ativar_gravacao_em_grupo
+    def enviar_venda(self, id_produto: int, quantidade_vendida: int, valor_total: Optional[float] = None) -> Future:
+        if not self.gravando_em_grupo():
+            raise RuntimeError("gravação em grupo não está ativa")
+        return self.fila.enviar(int(id_produto), int(quantidade_vendida),
+                                None if valor_total is None else float(valor_total))
+
+    # traduz o resultado de uma venda da fila para a mensagem da camada de negócio
+    def _resultado_venda(self, id_produto: int, futuro: Future) -> str:
+        try:
+            futuro.result()
+            self._invalidar_cache(int(id_produto))
+            return "venda registrada com sucesso"
+        except ValueError as e:
+            return f"erro: {e}"
+        except Exception as e:
+            logging.error(f"Erro ao registrar venda: {e}")
+            return "erro: falha ao registrar venda"
 
     # Registrar venda (diminui o estoque automaticamente)
+    # venda e baixa de estoque acontecem na mesma transação: ou as duas
+    # são gravadas ou nenhuma é
     def registrar_venda(self, id_produto: int, quantidade_vendida: int, valor_total: Optional[float] = None) -> str:
         # validações
         if quantidade_vendida <= 0:
             return "erro: quantidade vendida deve ser maior que zero"
+        if valor_total is not None and valor_total < 0:
+            return "erro: valor total deve ser >= 0"
 
-        # busca produto
-        produto = Produto(self.bd.nomeBD).buscar_por_id(id_produto)
-        if not produto:
-            return "erro: produto não encontrado"
+        if self.gravando_em_grupo():
+            return self._resultado_venda(id_produto, self.enviar_venda(id_produto, quantidade_vendida, valor_total))
 
-        estoque_atual = int(produto['Quantidade'])
-        if quantidade_vendida > estoque_atual:
-            return "erro: quantidade vendida maior que o estoque disponível"
-
-        # se o valor_total não foi fornecido, calcula a partir do preço
-        if valor_total is None:
-            valor_total = float(produto['Preco']) * quantidade_vendida
-
-        try:
-            # registra venda
-            self.bd.registrar_venda(id_produto, quantidade_vendida, float(valor_total))
-            # decrementa estoque: reutiliza Produto.ajustar_quantidade com delta negativo
-            p = Produto(self.bd.nomeBD)
-            ajuste = p.ajustar_quantidade(id_produto, -int(quantidade_vendida))
-            # verificar se ajuste foi bem-sucedido
-            if "sucesso" not in ajuste:
-                # caso o ajuste falhe, registrar um log e avisar (ideal: rollback em transação)
-                logging.error(f"Venda registrada mas falha ao ajustar estoque: {ajuste}")
-                return "aviso: venda registrada, mas falha ao ajustar estoque"
+        try:
+            self.bd.registrar_venda_atomica(
+                int(id_produto),
+                int(quantidade_vendida),
+                None if valor_total is None else float(valor_total),
+            )
+            self._invalidar_cache(int(id_produto))
             return "venda registrada com sucesso"
+        except ValueError as e:
+            return f"erro: {e}"
         except Exception as e:
             logging.error(f"Erro ao registrar venda: {e}")
             return "erro: falha ao registrar venda"
 
-    # listar vendas
-    def listar(self) -> List[Dict]:
+    # Registrar várias vendas independentes num único commit (uma venda
+    # recusada não grava nada, então não desfaz as outras)
+    # vendas: lista de (id_produto, quantidade_vendida, valor_total ou None);
+    # devolve, na mesma ordem, a mensagem de cada venda
+    def registrar_vendas(self, vendas: List[Tuple[int, int, Optional[float]]]) -> List[str]:
         try:
-            return self.bd.listar_vendas() or []
+            resultados = self.bd.registrar_vendas_em_lote(vendas)
+        except Exception as e:
+            logging.error(f"Erro ao registrar lote de {len(vendas)} vendas: {e}")
+            return ["erro: falha ao registrar venda"] * len(vendas)
+        mensagens = []
+        for (id_produto, *_), resultado in zip(vendas, resultados):
+            if isinstance(resultado, Exception):
+                mensagens.append(f"erro: {resultado}")
+            else:
+                self._invalidar_cache(id_produto)
+                mensagens.append("venda registrada com sucesso")
+        return mensagens
+
+    # Registrar carrinho: vários produtos numa única transação (tudo ou nada)
+    # itens: lista de pares (id_produto, quantidade_vendida)
+    def registrar_carrinho(self, itens: List[Tuple[int, int]]) -> str:
+        try:
+            itens = [(int(id_produto), int(quantidade)) for id_produto, quantidade in itens]
+        except (TypeError, ValueError):
+            return "erro: itens do carrinho inválidos"
+        if not itens:
+            return "erro: carrinho vazio"
+        if any(quantidade <= 0 for _, quantidade in itens):
+            return "erro: quantidade vendida deve ser maior que zero"
+
+        try:
+            total = self.bd.registrar_carrinho_atomico(itens)
+            self._invalidar_cache(*{id_produto for id_produto, _ in itens})
+            return f"carrinho registrado com sucesso: {len(itens)} itens, total R$ {total:.2f}"
+        except ValueError as e:
+            return f"erro: {e}"
+        except Exception as e:
+            logging.error(f"Erro ao registrar carrinho: {e}")
+            return "erro: falha ao registrar carrinho"
+
+    # listar vendas (todas ou uma página, com filtros opcionais)
+    # data_inicio é inclusiva e data_fim exclusiva
+    def listar(self, apos_id: Optional[int] = None, limite: Optional[int] = None,
+               data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+               id_produto: Optional[int] = None) -> List[VendaRegistro]:
+        try:
+            return self.bd.listar_vendas(apos_id, limite, data_inicio, data_fim, id_produto) or []
         except Exception as e:
             logging.error(f"Erro ao listar vendas: {e}")
             return []
 
+    # histórico de vendas para exibição: id_venda, Produto (nome), Quantidade_vendida,
+    # valor_total e data_venda, com o nome do produto resolvido no próprio SQL
+    def historico(self, apos_id: Optional[int] = None, limite: Optional[int] = None,
+                  data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                  id_produto: Optional[int] = None) -> List[HistoricoVendaRegistro]:
+        try:
+            return self.bd.listar_historico_vendas(apos_id, limite, data_inicio, data_fim, id_produto) or []
+        except Exception as e:
+            logging.error(f"Erro ao listar histórico de vendas: {e}")
+            return []
+
+    # listar vendas em streaming: gera lotes paginados por id_venda
+    def iterar(self, tamanho_lote: int = 500, apos_id: Optional[int] = None,
+               data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+               id_produto: Optional[int] = None) -> Iterator[List[VendaRegistro]]:
+        return self.bd.iterar_vendas(tamanho_lote, apos_id, data_inicio, data_fim, id_produto)
+
+    # Exportação das vendas para CSV ou JSONL (".gz" comprime), em ordem de data;
+    # data_inicio é inclusiva e data_fim exclusiva; com_nomes inclui o nome do produto
+    def exportar(self, caminho: str, data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                 com_nomes: bool = True, tamanho_lote: int = 5000) -> Dict:
+        return self._exportar("vendas", caminho, tamanho_lote,
+                              data_inicio=data_inicio, data_fim=data_fim, com_nomes=com_nomes)
+
     # remover venda (nota: não repõe estoque automaticamente aqui)
     def remover_venda(self, id_venda: int) -> str:
         try:
@@ -175,6 +924,45 @@ class Venda(Estoque):
             logging.error(f"Erro ao remover venda: {e}")
             return "erro: falha ao remover venda"
 
+    # estornar venda: exclui a venda e devolve as unidades ao estoque
+    def estornar_venda(self, id_venda: int) -> str:
+        try:
+            id_produto = self.bd.estornar_venda(int(id_venda))
+            self._invalidar_cache(id_produto)
+            return "venda estornada com sucesso"
+        except ValueError as e:
+            return f"erro: {e}"
+        except Exception as e:
+            logging.error(f"Erro ao estornar venda: {e}")
+            return "erro: falha ao estornar venda"
+
+    # Arquivamento: move as vendas anteriores a `ate_data` para arquivos de
+    # partição (um por ano ou por mês) e compacta o arquivo principal; listagens
+    # e exportações continuam enxergando as vendas arquivadas
+    def arquivar(self, ate_data: str, periodo: str = "ano", tamanho_lote: int = 10_000,
+                 compactar: bool = True) -> str:
+        try:
+            movidas = self.bd.arquivar_vendas(ate_data, periodo, tamanho_lote)
+            total = sum(movidas.values())
+            if not total:
+                return "nenhuma venda para arquivar"
+            if compactar:
+                self.bd.compactar_banco()
+            return f"{total} venda(s) arquivada(s) com sucesso em {len(movidas)} partição(ões)"
+        except ValueError as e:
+            return f"erro: {e}"
+        except Exception as e:
+            logging.error(f"Erro ao arquivar vendas: {e}")
+            return "erro: falha ao arquivar vendas"
+
+    # partições de vendas arquivadas (periodo, inicio, fim, arquivo, vendas)
+    def particoes(self) -> List[Dict]:
+        try:
+            return self.bd.listar_particoes_vendas()
+        except Exception as e:
+            logging.error(f"Erro ao listar partições de vendas: {e}")
+            return []
+
     # atualizar venda (atenção: não atualiza automaticamente o estoque aqui)
     def atualizar_venda(self, id_venda: int, id_produto: int, quantidade_vendida: int, valor_total: float) -> str:
         try:
@@ -185,6 +973,133 @@ class Venda(Estoque):
             return "erro: falha ao atualizar venda"
 
 
+# ---------------------------------------------------------------------------
+# Versões assíncronas: executam as operações de Produto e Venda num pool
+# limitado de threads, para não bloquear o laço de eventos da interface.
+# O pool de conexões tem o mesmo tamanho do pool de threads, então cada
+# thread trabalha com uma conexão própria, reaproveitada entre as chamadas.
+# ---------------------------------------------------------------------------
+
+def criar_executor(max_workers: int = 4) -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="estoque-bd")
+
+
+class EstoqueAsync:
+    def __init__(self, negocio: Estoque, executor: Optional[ThreadPoolExecutor] = None, max_workers: int = 4):
+        self.negocio = negocio
+        self._proprio_executor = executor is None
+        self.executor = executor or criar_executor(max_workers)
+
+    # executa uma função síncrona numa thread do executor e aguarda o resultado
+    async def executar(self, funcao, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(funcao, *args, **kwargs))
+
+    def fechar(self) -> None:
+        if self._proprio_executor:
+            self.executor.shutdown(wait=True)
+        self.negocio.fechar()
+
+
+class ProdutoAsync(EstoqueAsync):
+    def __init__(self, nome_bd: str = 'DadosProdutos.sqlite', max_workers: int = 4,
+                 cache: Optional[CacheProdutos] = None, executor: Optional[ThreadPoolExecutor] = None,
+                 alertas: Optional[AlertasEstoque] = None, bd: Optional[BancoDados] = None):
+        super().__init__(Produto(nome_bd, max_workers, cache, alertas, bd), executor, max_workers)
+
+    async def cadastrar(self, nome: str, descricao: str, preco: float, quantidade: int, estoque_minimo: int = 0,
+                        codigo_barras: Optional[str] = None) -> str:
+        return await self.executar(self.negocio.cadastrar, nome, descricao, preco, quantidade, estoque_minimo,
+                                   codigo_barras)
+
+    async def listar(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[ProdutoRegistro]:
+        return await self.executar(self.negocio.listar, apos_id, limite)
+
+    async def buscar_por_id(self, id_produto: int) -> Optional[ProdutoRegistro]:
+        return await self.executar(self.negocio.buscar_por_id, id_produto)
+
+    async def buscar_por_nome(self, nome: str) -> Optional[ProdutoRegistro]:
+        return await self.executar(self.negocio.buscar_por_nome, nome)
+
+    async def buscar(self, texto: str, limite: int = 20) -> List[ProdutoRegistro]:
+        return await self.executar(self.negocio.buscar, texto, limite)
+
+    async def sugerir(self, texto: str, limite: int = 10) -> List[ProdutoRegistro]:
+        return await self.executar(self.negocio.sugerir, texto, limite)
+
+    async def atualizar(self, id_produto: int, nome: str, descricao: str, preco: float, quantidade: int) -> str:
+        return await self.executar(self.negocio.atualizar, id_produto, nome, descricao, preco, quantidade)
+
+    async def ajustar_quantidade(self, id_produto: int, delta: int) -> str:
+        return await self.executar(self.negocio.ajustar_quantidade, id_produto, delta)
+
+    async def repor(self, id_produto: int, quantidade: int) -> str:
+        return await self.executar(self.negocio.repor, id_produto, quantidade)
+
+    async def remover(self, id_produto: int) -> str:
+        return await self.executar(self.negocio.remover, id_produto)
+
+    async def definir_estoque_minimo(self, id_produto: int, estoque_minimo: int) -> str:
+        return await self.executar(self.negocio.definir_estoque_minimo, id_produto, estoque_minimo)
+
+    async def definir_codigo_barras(self, id_produto: int, codigo_barras: Optional[str]) -> str:
+        return await self.executar(self.negocio.definir_codigo_barras, id_produto, codigo_barras)
+
+    async def produtos_em_falta(self, apos_id: Optional[int] = None, limite: Optional[int] = None) -> List[ProdutoRegistro]:
+        return await self.executar(self.negocio.produtos_em_falta, apos_id, limite)
+
+    async def importar(self, caminho: str, tamanho_lote: int = 1000, arquivo_rejeitados: Optional[str] = None) -> Dict:
+        return await self.executar(self.negocio.importar, caminho, tamanho_lote, arquivo_rejeitados)
+
+    async def exportar(self, caminho: str, tamanho_lote: int = 5000) -> Dict:
+        return await self.executar(self.negocio.exportar, caminho, tamanho_lote)
+
+
+class VendaAsync(EstoqueAsync):
+    def __init__(self, nome_bd: str = 'DadosProdutos.sqlite', max_workers: int = 4,
+                 cache: Optional[CacheProdutos] = None, executor: Optional[ThreadPoolExecutor] = None,
+                 alertas: Optional[AlertasEstoque] = None, bd: Optional[BancoDados] = None):
+        super().__init__(Venda(nome_bd, max_workers, cache, alertas, bd), executor, max_workers)
+
+    async def registrar_venda(self, id_produto: int, quantidade_vendida: int, valor_total: Optional[float] = None) -> str:
+        venda = self.negocio
+        if not venda.gravando_em_grupo() or quantidade_vendida <= 0 or (valor_total is not None and valor_total < 0):
+            return await self.executar(venda.registrar_venda, id_produto, quantidade_vendida, valor_total)
+        # com gravação em grupo nenhuma thread fica parada esperando o commit
+        futuro = venda.enviar_venda(id_produto, quantidade_vendida, valor_total)
+        try:
+            await asyncio.wrap_future(futuro)
+        except Exception:
+            pass
+        return venda._resultado_venda(id_produto, futuro)
+
+    async def registrar_carrinho(self, itens: List[Tuple[int, int]]) -> str:
+        return await self.executar(self.negocio.registrar_carrinho, itens)
+
+    async def listar(self, apos_id: Optional[int] = None, limite: Optional[int] = None,
+                     data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                     id_produto: Optional[int] = None) -> List[VendaRegistro]:
+        return await self.executar(self.negocio.listar, apos_id, limite, data_inicio, data_fim, id_produto)
+
+    async def historico(self, apos_id: Optional[int] = None, limite: Optional[int] = None,
+                        data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                        id_produto: Optional[int] = None) -> List[HistoricoVendaRegistro]:
+        return await self.executar(self.negocio.historico, apos_id, limite, data_inicio, data_fim, id_produto)
+
+    async def exportar(self, caminho: str, data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                       com_nomes: bool = True, tamanho_lote: int = 5000) -> Dict:
+        return await self.executar(self.negocio.exportar, caminho, data_inicio, data_fim, com_nomes, tamanho_lote)
+
+    async def remover_venda(self, id_venda: int) -> str:
+        return await self.executar(self.negocio.remover_venda, id_venda)
+
+    async def estornar_venda(self, id_venda: int) -> str:
+        return await self.executar(self.negocio.estornar_venda, id_venda)
+
+    async def atualizar_venda(self, id_venda: int, id_produto: int, quantidade_vendida: int, valor_total: float) -> str:
+        return await self.executar(self.negocio.atualizar_venda, id_venda, id_produto, quantidade_vendida, valor_total)
+
+
 # --- Uso rápido de teste (apenas se executar o arquivo diretamente) ---
 if __name__ == "__main__":
     p = Produto()
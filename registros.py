@@ -0,0 +1,140 @@
+"""
+registros.py — Representação compacta das linhas lidas do banco.
+
+A camada de dados devolve produtos e vendas como objetos com `__slots__`
+em vez de um `dict` por linha: cada registro guarda só as referências aos
+valores (sem dicionário de atributos nem tabela de chaves própria), o que
+reduz bastante a memória de catálogos grandes mantidos em cache.
+
+Os registros continuam aceitando o acesso por chave (`produto["Nome"]`),
+`get`, `keys`, `items` e `dict(registro)`, então o código que tratava as
+linhas como dicionários segue funcionando. O acesso por atributo
+(`produto.Nome`) é o mais rápido.
+
+Os registros são compartilhados (por exemplo, pelo CacheProdutos) e não
+devem ser alterados; para obter uma versão modificada use `substituir`.
+"""
+
+
+class Registro:
+    __slots__ = ()
+
+    # fábrica para `cursor.row_factory`: a tupla do SQLite vira o registro
+    # direto, sem criar um sqlite3.Row intermediário (as colunas do SELECT
+    # devem estar na ordem de __slots__)
+    @classmethod
+    def fabrica(cls, cursor, linha):
+        return cls(*linha)
+
+    def __getitem__(self, campo):
+        try:
+            return getattr(self, campo)
+        except (AttributeError, TypeError):
+            raise KeyError(campo) from None
+
+    def get(self, campo, padrao=None):
+        try:
+            return self[campo]
+        except KeyError:
+            return padrao
+
+    def keys(self):
+        return self.__slots__
+
+    def values(self):
+        return tuple(getattr(self, campo) for campo in self.__slots__)
+
+    def items(self):
+        return tuple((campo, getattr(self, campo)) for campo in self.__slots__)
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __contains__(self, campo):
+        return campo in self.__slots__
+
+    def __eq__(self, outro):
+        if isinstance(outro, Registro):
+            return type(self) is type(outro) and self.values() == outro.values()
+        if isinstance(outro, dict):
+            return dict(self.items()) == outro
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        campos = ", ".join(f"{campo}={valor!r}" for campo, valor in self.items())
+        return f"{type(self).__name__}({campos})"
+
+    def como_dict(self):
+        return dict(self.items())
+
+    # cópia com alguns campos trocados (o original não muda)
+    def substituir(self, **campos):
+        valores = dict(self.items())
+        valores.update(campos)
+        return type(self)(**valores)
+
+
+class ProdutoRegistro(Registro):
+    __slots__ = ("ID", "Nome", "Descricao", "Preco", "Quantidade", "estoque_minimo", "codigo_barras")
+
+    ID: int
+    Nome: str
+    Descricao: str
+    Preco: float
+    Quantidade: int
+    estoque_minimo: int
+    codigo_barras: str
+
+    def __init__(self, ID, Nome, Descricao, Preco, Quantidade, estoque_minimo=0, codigo_barras=None):
+        self.ID = ID
+        self.Nome = Nome
+        self.Descricao = Descricao
+        self.Preco = Preco
+        self.Quantidade = Quantidade
+        self.estoque_minimo = estoque_minimo
+        self.codigo_barras = codigo_barras
+
+
+class VendaRegistro(Registro):
+    __slots__ = ("id_venda", "id_produto", "Quantidade_vendida", "data_venda", "valor_total")
+
+    id_venda: int
+    id_produto: int
+    Quantidade_vendida: int
+    data_venda: str
+    valor_total: float
+
+    def __init__(self, id_venda, id_produto, Quantidade_vendida, data_venda, valor_total):
+        self.id_venda = id_venda
+        self.id_produto = id_produto
+        self.Quantidade_vendida = Quantidade_vendida
+        self.data_venda = data_venda
+        self.valor_total = valor_total
+
+
+# linha do histórico exibido na tela: a venda com o nome do produto (JOIN)
+class HistoricoVendaRegistro(Registro):
+    __slots__ = ("id_venda", "Produto", "Quantidade_vendida", "valor_total", "data_venda")
+
+    id_venda: int
+    Produto: str
+    Quantidade_vendida: int
+    valor_total: float
+    data_venda: str
+
+    def __init__(self, id_venda, Produto, Quantidade_vendida, valor_total, data_venda):
+        self.id_venda = id_venda
+        self.Produto = Produto
+        self.Quantidade_vendida = Quantidade_vendida
+        self.valor_total = valor_total
+        self.data_venda = data_venda
+
+
+# colunas do SELECT na ordem esperada pela fábrica de cada registro
+COLUNAS_PRODUTO = ", ".join(ProdutoRegistro.__slots__)
+COLUNAS_VENDA = ", ".join(VendaRegistro.__slots__)
@@ -0,0 +1,62 @@
+# relatorios.py
+from negocio import Estoque
+from typing import Dict, List, Optional
+import datetime
+import logging
+
+
+# Primeiro dia do mês e primeiro dia do mês seguinte ('AAAA-MM-DD')
+def intervalo_do_mes(ano: Optional[int] = None, mes: Optional[int] = None):
+    hoje = datetime.date.today()
+    ano = ano or hoje.year
+    mes = mes or hoje.month
+    inicio = datetime.date(ano, mes, 1)
+    fim = datetime.date(ano + (mes == 12), mes % 12 + 1, 1)
+    return inicio.isoformat(), fim.isoformat()
+
+
+class Relatorio(Estoque):
+    """
+    Relatórios de vendas calculados a partir do resumo diário (VendasDiarias),
+    que é atualizado na mesma transação de cada venda. Nenhuma consulta daqui
+    percorre a tabela Vendas, exceto reconstruir().
+    Datas no formato 'AAAA-MM-DD'; data_inicio é inclusiva e data_fim exclusiva.
+    """
+
+    # Top N produtos por receita no período
+    def mais_vendidos(self, n: int = 10, data_inicio: Optional[str] = None, data_fim: Optional[str] = None) -> List[Dict]:
+        try:
+            return self.bd.consultar_mais_vendidos(n, data_inicio, data_fim)
+        except Exception as e:
+            logging.error(f"Erro ao consultar produtos mais vendidos: {e}")
+            return []
+
+    # Top N produtos do mês (mês atual se não informado)
+    def mais_vendidos_do_mes(self, n: int = 10, ano: Optional[int] = None, mes: Optional[int] = None) -> List[Dict]:
+        return self.mais_vendidos(n, *intervalo_do_mes(ano, mes))
+
+    # Receita e unidades de cada dia do período
+    def receita_diaria(self, data_inicio: Optional[str] = None, data_fim: Optional[str] = None) -> List[Dict]:
+        try:
+            return self.bd.consultar_receita_diaria(data_inicio, data_fim)
+        except Exception as e:
+            logging.error(f"Erro ao consultar receita diária: {e}")
+            return []
+
+    # Unidades vendidas por produto no período
+    def unidades_por_produto(self, data_inicio: Optional[str] = None, data_fim: Optional[str] = None,
+                             id_produto: Optional[int] = None) -> List[Dict]:
+        try:
+            return self.bd.consultar_unidades_por_produto(data_inicio, data_fim, id_produto)
+        except Exception as e:
+            logging.error(f"Erro ao consultar unidades por produto: {e}")
+            return []
+
+    # Recalcula o resumo do zero a partir das vendas registradas
+    def reconstruir(self) -> str:
+        try:
+            total = self.bd.reconstruir_resumo_vendas()
+            return f"resumo de vendas reconstruído com sucesso ({total} linhas)"
+        except Exception as e:
+            logging.error(f"Erro ao reconstruir resumo de vendas: {e}")
+            return "erro: falha ao reconstruir resumo de vendas"
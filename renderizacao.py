@@ -0,0 +1,141 @@
+"""
+renderizacao.py — Camada de renderização incremental da interface Flet.
+
+Em vez de limpar e recriar todas as linhas de uma DataTable a cada ação,
+as tabelas guardam um mapa chave -> linha e alteram apenas as células cujo
+texto mudou. Todas as mudanças de uma mesma ação do usuário são enviadas ao
+cliente num único page.update().
+"""
+
+import asyncio
+import threading
+
+import flet as ft
+
+
+class LoteDeAtualizacao:
+    """
+    Agrupa as mudanças de controles num único page.update().
+
+    Dentro de um bloco `with lote:` as chamadas a `solicitar()` apenas marcam
+    que há algo a enviar; o update acontece uma vez, ao sair do bloco mais
+    externo. Fora de um bloco, `solicitar()` atualiza a página na hora.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self._local = threading.local()
+
+    def __enter__(self):
+        self._local.nivel = getattr(self._local, "nivel", 0) + 1
+        return self
+
+    def __exit__(self, tipo, valor, rastreio):
+        self._local.nivel -= 1
+        if self._local.nivel == 0 and getattr(self._local, "pendente", False):
+            self._local.pendente = False
+            self.page.update()
+
+    def solicitar(self):
+        if getattr(self._local, "nivel", 0):
+            self._local.pendente = True
+        else:
+            self.page.update()
+
+
+class _LinhaRenderizada:
+    __slots__ = ("linha", "textos", "valores", "registro")
+
+    def __init__(self, linha, textos, valores, registro):
+        self.linha = linha
+        self.textos = textos
+        self.valores = valores
+        self.registro = registro
+
+
+class TabelaRender:
+    """
+    Mantém uma ft.DataTable sincronizada com uma lista de registros.
+
+    chave:   função registro -> identificador da linha (ex.: o ID do produto)
+    colunas: funções registro -> texto de cada célula
+    acoes:   função opcional chave -> controle da última célula (botões);
+             é criada uma única vez por linha
+    """
+
+    def __init__(self, tabela, chave, colunas, acoes=None):
+        self.tabela = tabela
+        self.chave = chave
+        self.colunas = colunas
+        self.acoes = acoes
+        self.linhas = {}
+
+    def _criar(self, registro):
+        valores = [coluna(registro) for coluna in self.colunas]
+        textos = [ft.Text(valor) for valor in valores]
+        celulas = [ft.DataCell(texto) for texto in textos]
+        if self.acoes is not None:
+            celulas.append(ft.DataCell(self.acoes(self.chave(registro))))
+        return _LinhaRenderizada(ft.DataRow(cells=celulas), textos, valores, registro)
+
+    def _aplicar(self, renderizada, registro):
+        # registro igual ao já desenhado: nenhum texto precisa ser formatado
+        if registro is renderizada.registro or registro == renderizada.registro:
+            return False
+        renderizada.registro = registro
+        alterou = False
+        for i, coluna in enumerate(self.colunas):
+            valor = coluna(registro)
+            if valor != renderizada.valores[i]:
+                renderizada.valores[i] = valor
+                renderizada.textos[i].value = valor
+                alterou = True
+        return alterou
+
+    def renderizar(self, registros):
+        """Mostra `registros` reaproveitando as linhas que já estavam na tela."""
+        novas = {}
+        for registro in registros:
+            chave = self.chave(registro)
+            renderizada = self.linhas.get(chave)
+            if renderizada is None:
+                renderizada = self._criar(registro)
+            else:
+                self._aplicar(renderizada, registro)
+            novas[chave] = renderizada
+        self.linhas = novas
+        self.tabela.rows = [renderizada.linha for renderizada in novas.values()]
+
+    def atualizar(self, registro):
+        """Altera só as células que mudaram; retorna False se a linha não está visível."""
+        renderizada = self.linhas.get(self.chave(registro))
+        if renderizada is None:
+            return False
+        self._aplicar(renderizada, registro)
+        return True
+
+
+class Debounce:
+    """
+    Adia a execução de `funcao` (uma corrotina) até que `atraso` segundos se
+    passem sem nova chamada; útil para pesquisar enquanto o usuário digita.
+    Deve ser chamado de dentro do laço de eventos da página.
+    """
+
+    def __init__(self, funcao, atraso=0.3):
+        self.funcao = funcao
+        self.atraso = atraso
+        self._tarefa = None
+
+    async def _executar(self, args):
+        await asyncio.sleep(self.atraso)
+        await self.funcao(*args)
+
+    def __call__(self, *args):
+        self.cancelar()
+        self._tarefa = asyncio.get_running_loop().create_task(self._executar(args))
+
+    def cancelar(self):
+        if self._tarefa is not None and not self._tarefa.done():
+            self._tarefa.cancel()
+        self._tarefa = None
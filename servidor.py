@@ -0,0 +1,600 @@
+"""
+servidor.py — Servidor HTTP/JSON local para vários caixas.
+
+Em vez de cada caixa abrir o mesmo arquivo SQLite (e disputar os locks),
+um único processo é dono do banco e os caixas conversam com ele pela rede
+local (ver cliente.py e a variável ESTOQUE_SERVIDOR da interface).
+
+    python servidor.py --banco DadosProdutos.sqlite --porta 8765
+
+Arquitetura:
+    * as requisições são atendidas por um laço asyncio, com conexões HTTP/1.1
+      mantidas abertas (keep-alive); cada conexão é um asyncio.Protocol que
+      separa as requisições direto dos bytes recebidos, sem uma Task por linha;
+    * Produto e Venda compartilham um único BancoDeDados (um só pool e um só
+      escritor); leituras rodam num pool de `leitores` threads, cada uma com
+      sua conexão, e o banco fica em WAL para que elas não bloqueiem a escrita;
+    * todas as escritas passam por uma única thread (a FilaDeVendas), então
+      um commit lento ou um lock segurado por outro processo (ferramentas.py
+      no mesmo arquivo) atrasa só as escritas, nunca o laço. As vendas são
+      juntadas em lotes antes de ir para essa thread: enquanto alguma conexão
+      aberta estiver parada (e puder mandar a próxima venda) o lote espera
+      por ela até ESPERA_LOTE segundos, e então todas entram num único
+      commit; as demais escritas (cadastro, ajuste, carrinho...) rodam entre
+      um lote e outro.
+
+Rotas (corpo e respostas em JSON):
+    GET    /saude
+    GET    /produtos?apos_id=&limite=             {"dados": [produto, ...]}
+    GET    /produtos/busca?texto=&limite=
+    GET    /produtos/sugestoes?texto=&limite=     ID, início do nome ou código de barras
+    GET    /produtos/em-falta?apos_id=&limite=
+    GET    /produtos/nome/<nome>                  404 se não existir
+    GET    /produtos/<id>                         404 se não existir
+    POST   /produtos                              {nome, descricao, preco, quantidade, estoque_minimo, codigo_barras}
+    PUT    /produtos/<id>                         {nome, descricao, preco, quantidade}
+    DELETE /produtos/<id>
+    POST   /produtos/<id>/ajuste                  {delta}
+    POST   /produtos/<id>/reposicao               {quantidade}
+    PUT    /produtos/<id>/estoque-minimo          {estoque_minimo}
+    PUT    /produtos/<id>/codigo-barras           {codigo_barras}
+    POST   /vendas                                {id_produto, quantidade_vendida, valor_total}
+    POST   /carrinhos                             {itens: [[id_produto, quantidade], ...]}
+    GET    /vendas?apos_id=&limite=&data_inicio=&data_fim=&id_produto=
+    GET    /vendas/historico?(mesmos filtros)
+    POST   /vendas/<id>/estorno
+    GET    /alertas?apos=&espera=                 alertas de estoque mínimo (long polling)
+
+As escritas respondem {"resultado": "<mensagem da camada de negócio>"}, a
+mesma que o Produto/Venda local devolveria ("... com sucesso" ou "erro: ...").
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import logging
+import os
+import re
+import sys
+import urllib.parse
+
+from BancoDeDados import BancoDeDados
+from negocio import AlertasEstoque, CacheProdutos, ProdutoAsync, VendaAsync, criar_executor
+
+PORTA_PADRAO = 8765
+# maior corpo aceito numa requisição (bytes)
+TAMANHO_MAXIMO_CORPO = 1_000_000
+# maior cabeçalho aceito numa requisição (bytes)
+TAMANHO_MAXIMO_CABECALHO = 16_384
+# conexões sem nenhuma requisição por este tempo (s) são fechadas
+TEMPO_OCIOSO = 300.0
+# espera máxima (s) pelas vendas das outras conexões antes de gravar um lote
+ESPERA_LOTE = 0.002
+# espera máxima (s) de GET /alertas quando não há alerta novo
+ESPERA_MAXIMA_ALERTAS = 30.0
+# alertas mantidos para os clientes que ainda não os buscaram
+HISTORICO_ALERTAS = 1000
+
+MOTIVOS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class ErroRequisicao(Exception):
+    """Erro do cliente (parâmetro inválido, rota inexistente...), com o status HTTP."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+def _inteiro(valor, nome, opcional=False):
+    if valor is None or valor == "":
+        if opcional:
+            return None
+        raise ErroRequisicao(400, f"parâmetro obrigatório: {nome}")
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        raise ErroRequisicao(400, f"parâmetro inválido: {nome}") from None
+
+
+def _numero(valor, nome, opcional=False):
+    if valor is None or valor == "":
+        if opcional:
+            return None
+        raise ErroRequisicao(400, f"parâmetro obrigatório: {nome}")
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        raise ErroRequisicao(400, f"parâmetro inválido: {nome}") from None
+
+
+def _resolver(futuro):
+    if not futuro.done():
+        futuro.set_result(None)
+
+
+def _texto(valor, nome):
+    if not isinstance(valor, str):
+        raise ErroRequisicao(400, f"parâmetro obrigatório: {nome}")
+    return valor
+
+
+# registros (ProdutoRegistro, VendaRegistro...) viram objetos JSON
+def _para_json(objeto):
+    if hasattr(objeto, "keys"):
+        return dict(objeto.items())
+    raise TypeError(f"{type(objeto).__name__} não é serializável")
+
+
+class ServidorEstoque:
+    """
+    Produto e Venda expostos por HTTP. As leituras usam `leitores` threads;
+    as escritas, a thread única da FilaDeVendas, com as vendas gravadas em lote.
+    """
+
+    def __init__(self, nome_bd="DadosProdutos.sqlite", leitores=4, tamanho_lote=200):
+        self.cache = CacheProdutos()
+        self.alertas = AlertasEstoque()
+        self.leitura = criar_executor(leitores)
+        # um único BancoDeDados para Produto e Venda: uma conexão por leitor e
+        # mais uma para a thread de escrita, que é a única a gravar no arquivo
+        self.bd = BancoDeDados(nome_bd, leitores + 1)
+        self.produtos = ProdutoAsync(nome_bd, leitores + 1, self.cache, self.leitura, self.alertas, self.bd)
+        self.vendas = VendaAsync(nome_bd, leitores + 1, self.cache, self.leitura, self.alertas, self.bd)
+        # a thread da FilaDeVendas é o escritor único: nenhuma escrita (nem a
+        # espera por um lock de outro processo) roda no laço de eventos
+        self.vendas.negocio.ativar_gravacao_em_grupo(tamanho_lote, 0.0)
+        self.escritor = self.vendas.negocio.fila
+        self.tamanho_lote = tamanho_lote
+        # vendas aguardando o próximo lote: ((id_produto, quantidade, valor), futuro)
+        self._vendas_pendentes = []
+        self._gravando_vendas = False
+        # resolvido quando o lote em montagem se completa (ou no fim da espera)
+        self._lote_pronto = None
+        self._conexoes = set()
+
+        self._alertas = collections.deque(maxlen=HISTORICO_ALERTAS)
+        self._ultimo_alerta = 0
+        self._novo_alerta = None
+        self._laco = None
+        self._servidor = None
+
+        # (método, padrão do caminho, função); os grupos do padrão viram argumentos
+        self.rotas = [(metodo, re.compile(padrao + r"/?"), funcao) for metodo, padrao, funcao in (
+            ("GET", r"/saude", self.saude),
+            ("GET", r"/produtos", self.listar_produtos),
+            ("POST", r"/produtos", self.cadastrar_produto),
+            ("GET", r"/produtos/busca", self.buscar_produtos),
+            ("GET", r"/produtos/sugestoes", self.sugerir_produtos),
+            ("GET", r"/produtos/em-falta", self.produtos_em_falta),
+            ("GET", r"/produtos/nome/(.+)", self.produto_por_nome),
+            ("GET", r"/produtos/(\d+)", self.produto_por_id),
+            ("PUT", r"/produtos/(\d+)", self.atualizar_produto),
+            ("DELETE", r"/produtos/(\d+)", self.remover_produto),
+            ("POST", r"/produtos/(\d+)/ajuste", self.ajustar_quantidade),
+            ("POST", r"/produtos/(\d+)/reposicao", self.repor),
+            ("PUT", r"/produtos/(\d+)/estoque-minimo", self.definir_estoque_minimo),
+            ("PUT", r"/produtos/(\d+)/codigo-barras", self.definir_codigo_barras),
+            ("POST", r"/vendas", self.registrar_venda),
+            ("GET", r"/vendas", self.listar_vendas),
+            ("GET", r"/vendas/historico", self.historico_vendas),
+            ("POST", r"/vendas/(\d+)/estorno", self.estornar_venda),
+            ("POST", r"/carrinhos", self.registrar_carrinho),
+            ("GET", r"/alertas", self.buscar_alertas),
+        )]
+
+    # ---------- ciclo de vida ----------
+
+    async def iniciar(self, host="127.0.0.1", porta=PORTA_PADRAO):
+        self._laco = asyncio.get_running_loop()
+        self._novo_alerta = asyncio.Event()
+        self.alertas.assinar(self._receber_alerta)
+        self._servidor = await self._laco.create_server(lambda: _ConexaoHTTP(self), host, porta)
+        endereco = self._servidor.sockets[0].getsockname()
+        logging.info(f"Servidor de estoque ouvindo em http://{endereco[0]}:{endereco[1]}")
+        return endereco
+
+    async def servir_para_sempre(self):
+        async with self._servidor:
+            await self._servidor.serve_forever()
+
+    # grava as escritas já enviadas à thread de escrita e libera executor e conexões
+    def fechar(self):
+        if self._servidor is not None:
+            self._servidor.close()
+        self.vendas.fechar()
+        self.produtos.fechar()
+        self.leitura.shutdown(wait=True)
+        self.bd.fechar()
+
+    # ---------- HTTP ----------
+
+    # cabeçalho e corpo JSON da resposta, prontos para enviar
+    @staticmethod
+    def _resposta(status, resposta, manter):
+        dados = json.dumps(resposta, ensure_ascii=False, default=_para_json).encode("utf-8")
+        linhas = [
+            f"HTTP/1.1 {status} {MOTIVOS.get(status, '')}",
+            "Content-Type: application/json; charset=utf-8",
+            f"Content-Length: {len(dados)}",
+        ]
+        if not manter:
+            linhas.append("Connection: close")
+        return ("\r\n".join(linhas) + "\r\n\r\n").encode("latin-1") + dados
+
+    async def _despachar(self, metodo, alvo, corpo):
+        partes = urllib.parse.urlsplit(alvo)
+        caminho = urllib.parse.unquote(partes.path)
+        consulta = dict(urllib.parse.parse_qsl(partes.query))
+        metodo_permitido = False
+        for metodo_rota, padrao, funcao in self.rotas:
+            encontrado = padrao.fullmatch(caminho)
+            if encontrado is None:
+                continue
+            if metodo_rota != metodo:
+                metodo_permitido = True
+                continue
+            try:
+                dados = json.loads(corpo) if corpo else {}
+                if not isinstance(dados, dict):
+                    raise ErroRequisicao(400, "o corpo deve ser um objeto JSON")
+                return await funcao(*encontrado.groups(), consulta=consulta, dados=dados)
+            except json.JSONDecodeError:
+                return 400, {"erro": "JSON inválido"}
+            except ErroRequisicao as e:
+                return e.status, {"erro": str(e)}
+            except Exception as e:
+                logging.error(f"Erro ao atender {metodo} {caminho}: {e}")
+                return 500, {"erro": "falha interna do servidor"}
+        if metodo_permitido:
+            return 405, {"erro": f"método {metodo} não permitido em {caminho}"}
+        return 404, {"erro": f"rota não encontrada: {caminho}"}
+
+    # roda `funcao(*args)` na thread de escrita e espera o resultado sem
+    # bloquear o laço (um commit demorado ou um lock de outro processo só
+    # atrasa as outras escritas; as leituras seguem normalmente)
+    async def _gravar(self, funcao, *args):
+        return await asyncio.wrap_future(self.escritor.executar(funcao, *args))
+
+    # ---------- produtos ----------
+
+    async def saude(self, consulta, dados):
+        return 200, {"status": "ok"}
+
+    async def listar_produtos(self, consulta, dados):
+        return 200, {"dados": await self.produtos.listar(
+            _inteiro(consulta.get("apos_id"), "apos_id", True), _inteiro(consulta.get("limite"), "limite", True))}
+
+    async def buscar_produtos(self, consulta, dados):
+        limite = _inteiro(consulta.get("limite"), "limite", True) or 20
+        return 200, {"dados": await self.produtos.buscar(consulta.get("texto", ""), limite)}
+
+    async def sugerir_produtos(self, consulta, dados):
+        limite = _inteiro(consulta.get("limite"), "limite", True) or 10
+        return 200, {"dados": await self.produtos.sugerir(consulta.get("texto", ""), limite)}
+
+    async def produtos_em_falta(self, consulta, dados):
+        return 200, {"dados": await self.produtos.produtos_em_falta(
+            _inteiro(consulta.get("apos_id"), "apos_id", True), _inteiro(consulta.get("limite"), "limite", True))}
+
+    async def produto_por_id(self, id_produto, consulta, dados):
+        produto = await self.produtos.buscar_por_id(int(id_produto))
+        if produto is None:
+            raise ErroRequisicao(404, "produto não encontrado")
+        return 200, {"dados": produto}
+
+    async def produto_por_nome(self, nome, consulta, dados):
+        produto = await self.produtos.buscar_por_nome(nome)
+        if produto is None:
+            raise ErroRequisicao(404, "produto não encontrado")
+        return 200, {"dados": produto}
+
+    async def cadastrar_produto(self, consulta, dados):
+        resultado = await self._gravar(
+            self.produtos.negocio.cadastrar,
+            _texto(dados.get("nome"), "nome"), _texto(dados.get("descricao"), "descricao"),
+            _numero(dados.get("preco"), "preco"), _inteiro(dados.get("quantidade"), "quantidade"),
+            _inteiro(dados.get("estoque_minimo"), "estoque_minimo", True) or 0,
+            dados.get("codigo_barras") or None,
+        )
+        return 200, {"resultado": resultado}
+
+    async def atualizar_produto(self, id_produto, consulta, dados):
+        resultado = await self._gravar(
+            self.produtos.negocio.atualizar, int(id_produto),
+            _texto(dados.get("nome"), "nome"), _texto(dados.get("descricao"), "descricao"),
+            _numero(dados.get("preco"), "preco"), _inteiro(dados.get("quantidade"), "quantidade"),
+        )
+        return 200, {"resultado": resultado}
+
+    async def remover_produto(self, id_produto, consulta, dados):
+        return 200, {"resultado": await self._gravar(self.produtos.negocio.remover, int(id_produto))}
+
+    async def ajustar_quantidade(self, id_produto, consulta, dados):
+        resultado = await self._gravar(
+            self.produtos.negocio.ajustar_quantidade, int(id_produto), _inteiro(dados.get("delta"), "delta"))
+        return 200, {"resultado": resultado}
+
+    async def repor(self, id_produto, consulta, dados):
+        resultado = await self._gravar(
+            self.produtos.negocio.repor, int(id_produto), _inteiro(dados.get("quantidade"), "quantidade"))
+        return 200, {"resultado": resultado}
+
+    async def definir_estoque_minimo(self, id_produto, consulta, dados):
+        resultado = await self._gravar(
+            self.produtos.negocio.definir_estoque_minimo, int(id_produto),
+            _inteiro(dados.get("estoque_minimo"), "estoque_minimo"))
+        return 200, {"resultado": resultado}
+
+    async def definir_codigo_barras(self, id_produto, consulta, dados):
+        codigo_barras = dados.get("codigo_barras")
+        if codigo_barras is not None and not isinstance(codigo_barras, str):
+            raise ErroRequisicao(400, "parâmetro inválido: codigo_barras")
+        resultado = await self._gravar(self.produtos.negocio.definir_codigo_barras, int(id_produto), codigo_barras)
+        return 200, {"resultado": resultado}
+
+    # ---------- vendas ----------
+
+    # a venda entra no próximo lote; a resposta só sai depois do commit,
+    # como no registrar_venda local
+    async def registrar_venda(self, consulta, dados):
+        venda = (
+            _inteiro(dados.get("id_produto"), "id_produto"),
+            _inteiro(dados.get("quantidade_vendida"), "quantidade_vendida"),
+            _numero(dados.get("valor_total"), "valor_total", True),
+        )
+        futuro = self._laco.create_future()
+        self._vendas_pendentes.append((venda, futuro))
+        if self._lote_pronto is not None and not self._lote_incompleto():
+            _resolver(self._lote_pronto)
+        if not self._gravando_vendas:
+            self._gravando_vendas = True
+            self._laco.create_task(self._gravar_vendas())
+        return 200, {"resultado": await futuro}
+
+    # grava as vendas pendentes, um lote por vez; o que chega durante a
+    # gravação de um lote forma o seguinte
+    async def _gravar_vendas(self):
+        try:
+            while self._vendas_pendentes:
+                await self._completar_lote()
+                lote = self._vendas_pendentes[:self.tamanho_lote]
+                del self._vendas_pendentes[:self.tamanho_lote]
+                try:
+                    resultados = await self._gravar(self.vendas.negocio.registrar_vendas, [venda for venda, _ in lote])
+                except Exception as e:
+                    logging.error(f"Erro ao gravar lote de {len(lote)} vendas: {e}")
+                    resultados = ["erro: falha ao registrar venda"] * len(lote)
+                for (_, futuro), resultado in zip(lote, resultados):
+                    if not futuro.done():
+                        futuro.set_result(resultado)
+        finally:
+            self._gravando_vendas = False
+
+    # cada caixa manda uma venda por vez: enquanto houver conexão parada (que
+    # pode mandar a próxima venda) o lote está incompleto
+    def _lote_incompleto(self):
+        return (len(self._vendas_pendentes) < self.tamanho_lote
+                and any(not conexao.atendendo for conexao in self._conexoes))
+
+    # espera o lote se completar, no máximo ESPERA_LOTE segundos; assim um
+    # lote junta uma venda de cada caixa ativo em vez de gravar cada venda
+    # assim que chega
+    async def _completar_lote(self):
+        if not self._lote_incompleto():
+            return
+        self._lote_pronto = self._laco.create_future()
+        aviso = self._laco.call_later(ESPERA_LOTE, _resolver, self._lote_pronto)
+        try:
+            await self._lote_pronto
+        finally:
+            aviso.cancel()
+            self._lote_pronto = None
+
+    async def registrar_carrinho(self, consulta, dados):
+        itens = dados.get("itens")
+        if not isinstance(itens, list):
+            raise ErroRequisicao(400, "parâmetro obrigatório: itens")
+        try:
+            itens = [(int(id_produto), int(quantidade)) for id_produto, quantidade in itens]
+        except (TypeError, ValueError):
+            raise ErroRequisicao(400, "parâmetro inválido: itens") from None
+        return 200, {"resultado": await self._gravar(self.vendas.negocio.registrar_carrinho, itens)}
+
+    def _filtros_vendas(self, consulta):
+        return (
+            _inteiro(consulta.get("apos_id"), "apos_id", True),
+            _inteiro(consulta.get("limite"), "limite", True),
+            consulta.get("data_inicio") or None,
+            consulta.get("data_fim") or None,
+            _inteiro(consulta.get("id_produto"), "id_produto", True),
+        )
+
+    async def listar_vendas(self, consulta, dados):
+        return 200, {"dados": await self.vendas.listar(*self._filtros_vendas(consulta))}
+
+    async def historico_vendas(self, consulta, dados):
+        return 200, {"dados": await self.vendas.historico(*self._filtros_vendas(consulta))}
+
+    async def estornar_venda(self, id_venda, consulta, dados):
+        return 200, {"resultado": await self._gravar(self.vendas.negocio.estornar_venda, int(id_venda))}
+
+    # ---------- alertas de estoque mínimo ----------
+    # cada alerta recebe um número crescente; o cliente pede os posteriores ao
+    # último que viu e, se não houver nenhum, a resposta espera até `espera` s
+
+    # chamado na thread de escrita; o alerta é guardado pelo próprio laço
+    def _receber_alerta(self, alerta):
+        self._laco.call_soon_threadsafe(self._guardar_alerta, alerta)
+
+    def _guardar_alerta(self, alerta):
+        self._ultimo_alerta += 1
+        self._alertas.append((self._ultimo_alerta, alerta))
+        # acorda quem está esperando e prepara o evento do próximo alerta
+        self._novo_alerta.set()
+        self._novo_alerta = asyncio.Event()
+
+    async def buscar_alertas(self, consulta, dados):
+        apos = _inteiro(consulta.get("apos"), "apos", True)
+        if apos is None:
+            # primeira chamada: só informa de onde começar
+            return 200, {"ultimo": self._ultimo_alerta, "alertas": []}
+        espera = min(_numero(consulta.get("espera"), "espera", True) or 0.0, ESPERA_MAXIMA_ALERTAS)
+        if self._ultimo_alerta <= apos and espera > 0:
+            try:
+                await asyncio.wait_for(self._novo_alerta.wait(), espera)
+            except asyncio.TimeoutError:
+                pass
+        novos = [alerta for numero, alerta in self._alertas if numero > apos]
+        return 200, {"ultimo": self._ultimo_alerta, "alertas": novos}
+
+
+class _ConexaoHTTP(asyncio.Protocol):
+    """
+    Uma conexão de caixa. Os bytes recebidos são juntados num buffer, as
+    requisições completas (cabeçalho + Content-Length bytes de corpo) são
+    separadas ali mesmo e atendidas uma de cada vez, na ordem de chegada.
+    Requisição malformada recebe o erro e a conexão é fechada.
+    """
+
+    def __init__(self, servidor):
+        self.servidor = servidor
+        self.laco = servidor._laco
+        self.transporte = None
+        self._buffer = bytearray()
+        # (metodo, alvo, corpo, manter) ou (None, status, resposta, False)
+        self._pendentes = collections.deque()
+        self.atendendo = False
+        self._encerrando = False
+        self._usada_em = 0.0
+        self._verificacao = None
+
+    def connection_made(self, transporte):
+        self.transporte = transporte
+        self.servidor._conexoes.add(self)
+        self._usada_em = self.laco.time()
+        self._verificacao = self.laco.call_later(TEMPO_OCIOSO, self._verificar_ociosa)
+
+    def connection_lost(self, erro):
+        self.transporte = None
+        self.servidor._conexoes.discard(self)
+        self._pendentes.clear()
+        if self._verificacao is not None:
+            self._verificacao.cancel()
+
+    # fecha a conexão sem nenhuma requisição há TEMPO_OCIOSO segundos
+    def _verificar_ociosa(self):
+        parada = self.laco.time() - self._usada_em
+        if self.transporte is None:
+            return
+        if not self.atendendo and parada >= TEMPO_OCIOSO:
+            self.transporte.close()
+            return
+        self._verificacao = self.laco.call_later(max(1.0, TEMPO_OCIOSO - parada), self._verificar_ociosa)
+
+    def data_received(self, dados):
+        if self._encerrando:
+            return
+        self._usada_em = self.laco.time()
+        self._buffer += dados
+        while True:
+            fim = self._buffer.find(b"\r\n\r\n")
+            if fim < 0:
+                if len(self._buffer) > TAMANHO_MAXIMO_CABECALHO:
+                    self._recusar(413, "cabeçalho da requisição grande demais")
+                return
+            linhas = self._buffer[:fim].decode("latin-1").split("\r\n")
+            try:
+                metodo, alvo, versao = linhas[0].split()
+            except ValueError:
+                self._recusar(400, "requisição inválida")
+                return
+            cabecalhos = {}
+            for linha in linhas[1:]:
+                nome, _, valor = linha.partition(":")
+                cabecalhos[nome.strip().lower()] = valor.strip()
+            try:
+                tamanho = int(cabecalhos.get("content-length") or 0)
+            except ValueError:
+                tamanho = -1
+            if not 0 <= tamanho <= TAMANHO_MAXIMO_CORPO:
+                self._recusar(413, "corpo da requisição inválido ou grande demais")
+                return
+            inicio_corpo = fim + 4
+            if len(self._buffer) < inicio_corpo + tamanho:
+                return
+            corpo = bytes(self._buffer[inicio_corpo:inicio_corpo + tamanho])
+            del self._buffer[:inicio_corpo + tamanho]
+            manter = versao == "HTTP/1.1" and cabecalhos.get("connection", "").lower() != "close"
+            self._enfileirar((metodo, alvo, corpo, manter))
+            if not manter:
+                self._encerrando = True
+                return
+
+    def _recusar(self, status, mensagem):
+        self._encerrando = True
+        self._buffer.clear()
+        self._enfileirar((None, status, {"erro": mensagem}, False))
+
+    def _enfileirar(self, requisicao):
+        self._pendentes.append(requisicao)
+        if not self.atendendo:
+            self.atendendo = True
+            self.laco.create_task(self._atender())
+
+    async def _atender(self):
+        try:
+            while self._pendentes and self.transporte is not None:
+                metodo, alvo, corpo, manter = self._pendentes.popleft()
+                if metodo is None:
+                    status, resposta = alvo, corpo
+                else:
+                    status, resposta = await self.servidor._despachar(metodo, alvo, corpo)
+                if self.transporte is None:
+                    break
+                self.transporte.write(self.servidor._resposta(status, resposta, manter))
+                self._usada_em = self.laco.time()
+                if not manter:
+                    self.transporte.close()
+                    break
+        finally:
+            self.atendendo = False
+
+
+async def servir(nome_bd, host="127.0.0.1", porta=PORTA_PADRAO, leitores=4, tamanho_lote=200, pronto=None):
+    """Executa o servidor até ser interrompido; `pronto(endereco)` é chamado ao começar a ouvir."""
+    servidor = ServidorEstoque(nome_bd, leitores, tamanho_lote)
+    try:
+        endereco = await servidor.iniciar(host, porta)
+        if pronto is not None:
+            pronto(endereco)
+        await servidor.servir_para_sempre()
+    finally:
+        servidor.fechar()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP/JSON do Sistema de Gerenciamento de Estoque")
+    parser.add_argument("--banco", default="DadosProdutos.sqlite", help="arquivo SQLite")
+    parser.add_argument("--host", default="127.0.0.1", help="endereço de escuta (0.0.0.0 para a rede local)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    parser.add_argument("--leitores", type=int, default=4, help="threads (e conexões) de leitura")
+    parser.add_argument("--lote", type=int, default=200, help="máximo de vendas por commit")
+    parser.add_argument("--sem-wal", action="store_true", help="não ativa o journal_mode WAL")
+    args = parser.parse_args(argv)
+
+    # com WAL as leituras do pool não esperam pela thread de escrita
+    if not args.sem_wal:
+        os.environ.setdefault("ESTOQUE_CONCORRENTE", "1")
+    print(f"🚀 Servidor de estoque em http://{args.host}:{args.porta} (banco {args.banco})")
+    try:
+        asyncio.run(servir(args.banco, args.host, args.porta, args.leitores, args.lote))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())